@@ -0,0 +1,107 @@
+# Latency of admitted /query requests under overload, with and without the
+# admission controller. A stub agent stands in for the model: it serves
+# --capacity queries at a time and each takes about --service-ms. Requests
+# arrive as a Poisson process at --load times that capacity and carry a
+# deadline --timeout seconds out, like a client that gives up.
+#
+#   PYTHONPATH=src python benchmarks/bench_admission.py --load 0.8 1.5 3
+import argparse
+import asyncio
+import random
+import time
+from typing import Dict, List, Optional
+
+from fastapi import HTTPException
+
+from atlas.core.deadline import DeadlineExceeded, check_deadline, request_deadline
+from atlas.services.admission import AdmissionController
+
+class StubAgent:
+    def __init__(self, capacity: int, service_seconds: float, rng: random.Random):
+        self.slots = asyncio.Semaphore(capacity)
+        self.service_seconds = service_seconds
+        self.rng = rng
+    
+    async def process_query(self) -> None:
+        async with self.slots:
+            # The agent's check before generation
+            check_deadline("generation")
+            await asyncio.sleep(self.rng.uniform(0.5, 1.5) * self.service_seconds)
+
+def percentile(samples: List[float], q: float) -> float:
+    samples = sorted(samples)
+    return samples[int(q * (len(samples) - 1))] if samples else float("nan")
+
+async def run(load: float, admission: Optional[AdmissionController], args: argparse.Namespace) -> Dict[str, float]:
+    rng = random.Random(0)
+    service_seconds = args.service_ms / 1000
+    agent = StubAgent(args.capacity, service_seconds, rng)
+    rate = load * args.capacity / service_seconds
+    latencies: List[float] = []
+    outcomes = {"ok": 0, "shed": 0, "expired": 0, "late": 0}
+    
+    async def request() -> None:
+        start = time.time()
+        deadline = start + args.timeout
+        request_deadline.set(deadline)
+        try:
+            if admission is None:
+                await agent.process_query()
+            else:
+                async with admission.admit(deadline=deadline):
+                    await agent.process_query()
+        except HTTPException as e:
+            outcomes["expired" if e.status_code == 504 else "shed"] += 1
+            return
+        except DeadlineExceeded:
+            outcomes["expired"] += 1
+            return
+        elapsed = time.time() - start
+        if elapsed > args.timeout:
+            # Answered after the client stopped waiting: wasted work
+            outcomes["late"] += 1
+            return
+        outcomes["ok"] += 1
+        latencies.append(elapsed)
+    
+    tasks = []
+    end = time.monotonic() + args.seconds
+    while time.monotonic() < end:
+        tasks.append(asyncio.ensure_future(request()))
+        await asyncio.sleep(rng.expovariate(rate))
+    await asyncio.gather(*tasks)
+    return {
+        "offered": len(tasks),
+        **outcomes,
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000
+    }
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--load", type=float, nargs="+", default=[0.8, 1.5, 3.0], help="offered load / capacity")
+    parser.add_argument("--capacity", type=int, default=8)
+    parser.add_argument("--service-ms", type=float, default=50.0)
+    parser.add_argument("--timeout", type=float, default=2.0, help="client deadline in seconds")
+    parser.add_argument("--queue", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+    
+    print(f"{'load':>5} {'admission':>9} {'offered':>8} {'ok':>6} {'shed':>6} {'expired':>7} "
+          f"{'late':>6} {'p50_ms':>8} {'p99_ms':>8}")
+    for load in args.load:
+        for enabled in (False, True):
+            admission = AdmissionController(
+                max_concurrent=args.capacity,
+                max_queue=args.queue,
+                initial_service_time=args.service_ms / 1000
+            ) if enabled else None
+            result = asyncio.run(run(load, admission, args))
+            print(
+                f"{load:>5.1f} {'on' if enabled else 'off':>9} {result['offered']:>8} {result['ok']:>6} "
+                f"{result['shed']:>6} {result['expired']:>7} {result['late']:>6} "
+                f"{result['p50_ms']:>8.1f} {result['p99_ms']:>8.1f}"
+            )
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,46 @@
+# Per-request cost of API key verification: the old path (AtlasConfig()
+# built per request, plain != compare) against ApiKeyAuth (hash, constant-
+# time compare over every configured key, token bucket and concurrency slot).
+#
+#   PYTHONPATH=src python benchmarks/bench_auth.py --keys 1 10 100
+import argparse
+import os
+import secrets
+import timeit
+
+from atlas.core.config import AtlasConfig
+from atlas.services.auth import ApiKeyAuth, hash_api_key
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--keys", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args()
+    
+    presented = secrets.token_urlsafe(32)
+    os.environ["ATLAS_API_KEY"] = presented
+    
+    def old_path() -> None:
+        config = AtlasConfig()
+        if config.API_KEY and presented != config.API_KEY:
+            raise RuntimeError("rejected")
+    
+    calls = max(args.calls // 20, 100)
+    seconds = min(timeit.repeat(old_path, number=calls, repeat=3)) / calls
+    print(f"AtlasConfig() per request: {seconds * 1e6:9.1f}us")
+    
+    for count in args.keys:
+        keys = {f"client{i}": hash_api_key(secrets.token_urlsafe(32)) for i in range(count - 1)}
+        keys["bench"] = hash_api_key(presented)
+        auth = ApiKeyAuth(keys, rate=1e12, burst=1e12, max_concurrent=1000)
+        
+        def new_path() -> None:
+            client = auth.authenticate(presented)
+            auth.acquire(client)
+            auth.release(client)
+        
+        seconds = min(timeit.repeat(new_path, number=args.calls, repeat=3)) / args.calls
+        print(f"ApiKeyAuth, {count:>4} keys:    {seconds * 1e6:9.1f}us")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
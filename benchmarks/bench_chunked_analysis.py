@@ -0,0 +1,61 @@
+# Peak memory of collect_data + analyze_data on a generated CSV, comparing
+# the chunked artifact path with loading every row into one inline payload.
+# Each mode runs in its own process so peak RSS is not shared between them;
+# the chunked peak should stay flat as --rows grows.
+#
+#   PYTHONPATH=src python benchmarks/bench_chunked_analysis.py --rows 2000000
+import argparse
+import asyncio
+import csv
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+def write_csv(path: str, rows: int) -> None:
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["district", "spend", "population"])
+        for i in range(rows):
+            writer.writerow([f"d{i % 97}", i % 10007, (i * 31) % 50021])
+
+async def run(mode: str, path: str, root: str) -> None:
+    from atlas.workflows.artifacts import artifact_store
+    from atlas.workflows.engine import analyze_data, collect_data
+    artifact_store.configure(root=root, chunk_rows=65536)
+    start = time.perf_counter()
+    if mode == "chunked":
+        analysis = await analyze_data(await collect_data("bench", [path]))
+    else:
+        with open(path, newline="") as f:
+            rows = list(csv.DictReader(f))
+        analysis = await analyze_data({"data": rows})
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{mode:<8} rows={analysis.metadata['rows']:<9} {elapsed:7.2f}s  peak rss={peak:8.1f}MB")
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--mode", choices=["chunked", "inline"])
+    parser.add_argument("--path")
+    parser.add_argument("--root")
+    args = parser.parse_args()
+    if args.mode:
+        asyncio.run(run(args.mode, args.path, args.root))
+        return
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "data.csv")
+        write_csv(path, args.rows)
+        print(f"csv size: {os.path.getsize(path) / 2 ** 20:.1f}MB")
+        for mode in ("chunked", "inline"):
+            subprocess.run(
+                [sys.executable, __file__, "--mode", mode, "--path", path, "--root", os.path.join(tmp, "artifacts")],
+                check=True
+            )
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,77 @@
+# Compares per-request load()/release() against CollectionManager on a local
+# stand-in collection whose load/release/search costs mimic a Milvus query node.
+#
+#   PYTHONPATH=src python benchmarks/bench_collection_manager.py
+import argparse
+import statistics
+import time
+from typing import Callable, List
+
+from atlas.memory.vector_store import CollectionManager
+
+class StandInCollection:
+    def __init__(self, name: str, load_ms: float, release_ms: float, search_ms: float):
+        self.name = name
+        self.load_ms = load_ms
+        self.release_ms = release_ms
+        self.search_ms = search_ms
+    
+    def load(self) -> None:
+        time.sleep(self.load_ms / 1000)
+    
+    def release(self) -> None:
+        time.sleep(self.release_ms / 1000)
+    
+    def search(self, **kwargs) -> list:
+        time.sleep(self.search_ms / 1000)
+        return []
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def run(label: str, retrieve: Callable[[], None], iterations: int) -> None:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        retrieve()
+        samples.append((time.perf_counter() - start) * 1000)
+    print(
+        f"{label:<22} p50={statistics.median(samples):7.2f}ms "
+        f"p99={percentile(samples, 99):7.2f}ms"
+    )
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--load-ms", type=float, default=25.0)
+    parser.add_argument("--release-ms", type=float, default=5.0)
+    parser.add_argument("--search-ms", type=float, default=1.0)
+    args = parser.parse_args()
+    
+    def factory(name: str) -> StandInCollection:
+        return StandInCollection(name, args.load_ms, args.release_ms, args.search_ms)
+    
+    # Before: the original AtlasMemory pattern
+    def retrieve_per_request() -> None:
+        collection = factory("atlas_memories")
+        collection.load()
+        try:
+            collection.search(limit=5)
+        finally:
+            collection.release()
+    
+    # After: resident handles from CollectionManager
+    manager = CollectionManager(idle_timeout=600.0, collection_factory=factory)
+    
+    def retrieve_managed() -> None:
+        with manager.acquire("atlas_memories") as collection:
+            collection.search(limit=5)
+    
+    run("load/release per call", retrieve_per_request, args.iterations)
+    run("collection manager", retrieve_managed, args.iterations)
+    print(f"manager stats: {manager.stats()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+# Recall/latency/memory trade-off of the local index settings. Ingests the
+# embeddings once, then reindexes the collection for every index type and
+# nlist and measures every nprobe against exact (brute force) neighbours.
+# Queries are held-out rows, never inserted. Pass recorded embeddings as a
+# float32 .npy matrix, or let it generate clustered unit vectors:
+#
+#   OMP_NUM_THREADS=1 OPENBLAS_NUM_THREADS=1 PYTHONPATH=src \
+#       python benchmarks/bench_index_tuning.py --n 200000 --dim 384
+#   PYTHONPATH=src python benchmarks/bench_index_tuning.py --embeddings recorded.npy
+import argparse
+import tempfile
+import time
+from typing import List
+
+import numpy as np
+
+from atlas.memory.local_store import LocalVectorStore
+
+def synthetic(n: int, dim: int, clusters: int, spread: float, rng: np.random.Generator) -> np.ndarray:
+    centers = rng.standard_normal((clusters, dim), dtype=np.float32)
+    vectors = centers[rng.integers(0, clusters, n)] + spread * rng.standard_normal((n, dim), dtype=np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+def exact_neighbours(data: np.ndarray, queries: np.ndarray, k: int, chunk_rows: int = 65536) -> np.ndarray:
+    best_ids = np.empty((len(queries), 0), dtype=np.int64)
+    best_distances = np.empty((len(queries), 0), dtype=np.float32)
+    query_norms = np.einsum("ij,ij->i", queries, queries)[:, None]
+    for start in range(0, len(data), chunk_rows):
+        chunk = data[start:start + chunk_rows]
+        distances = query_norms + np.einsum("ij,ij->i", chunk, chunk)[None, :] - 2 * queries @ chunk.T
+        ids = np.broadcast_to(np.arange(start, start + len(chunk)), distances.shape)
+        distances = np.concatenate([best_distances, distances], axis=1)
+        ids = np.concatenate([best_ids, ids], axis=1)
+        top = np.argpartition(distances, k - 1, axis=1)[:, :k]
+        best_distances = np.take_along_axis(distances, top, axis=1)
+        best_ids = np.take_along_axis(ids, top, axis=1)
+    return best_ids
+
+def percentile(samples: List[float], q: float) -> float:
+    samples = sorted(samples)
+    return samples[int(q * (len(samples) - 1))]
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--embeddings", help="float32 .npy matrix of recorded embeddings")
+    parser.add_argument("--n", type=int, default=200000)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--clusters", type=int, default=256)
+    parser.add_argument("--spread", type=float, default=1.5, help="noise around cluster centres")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--index-types", default="FLAT,IVF_FLAT,IVF_SQ8")
+    parser.add_argument("--nlist", default="256,1024")
+    parser.add_argument("--nprobe", default="1,4,16,64")
+    parser.add_argument("--batch", type=int, default=50000)
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(0)
+    if args.embeddings:
+        embeddings = np.load(args.embeddings, mmap_mode="r")
+    else:
+        embeddings = synthetic(args.n + args.queries, args.dim, args.clusters, args.spread, rng)
+    data = np.asarray(embeddings[:-args.queries], dtype=np.float32)
+    queries = np.asarray(embeddings[-args.queries:], dtype=np.float32)
+    truth = exact_neighbours(data, queries, args.k)
+    print(f"{len(data)} x {data.shape[1]} vectors, {len(queries)} held-out queries, recall@{args.k}")
+    
+    with tempfile.TemporaryDirectory() as path:
+        store = LocalVectorStore(path, index_type="FLAT")
+        store.ensure_collection("bench", data.shape[1])
+        for offset in range(0, len(data), args.batch):
+            rows = data[offset:offset + args.batch]
+            store.insert("bench", [""] * len(rows), rows, list(range(offset, offset + len(rows))), [{}] * len(rows))
+        collection = store._collection("bench")
+        
+        print(f"{'index':<10} {'nlist':>6} {'nprobe':>6} {'build_s':>8} {'recall':>7} "
+              f"{'p50_ms':>8} {'p99_ms':>8} {'index_mb':>9} {'vectors_mb':>10}")
+        for index_type in args.index_types.split(","):
+            nlists = [0] if index_type == "FLAT" else [int(v) for v in args.nlist.split(",")]
+            for nlist in nlists:
+                start = time.perf_counter()
+                store.reindex("bench", index_type, {"nlist": nlist} if nlist else {})
+                build = time.perf_counter() - start
+                sizes = collection.index_bytes()
+                index_mb = (sizes["centroids"] + sizes["lists"] + sizes["codes"]) / 2**20
+                nprobes = [0] if index_type == "FLAT" else [int(v) for v in args.nprobe.split(",")]
+                for nprobe in nprobes:
+                    if nprobe > nlist > 0:
+                        continue
+                    params = {"params": {"nprobe": nprobe}}
+                    samples, found = [], 0
+                    for query, expected in zip(queries, truth):
+                        start = time.perf_counter()
+                        hits = store.search("bench", [query], args.k, params)[0]
+                        samples.append((time.perf_counter() - start) * 1000)
+                        found += len({hit["id"] for hit in hits} & set(expected.tolist()))
+                    print(
+                        f"{index_type:<10} {nlist or '-':>6} {nprobe or '-':>6} {build:>8.1f} "
+                        f"{found / truth.size:>7.3f} {percentile(samples, 0.5):>8.2f} "
+                        f"{percentile(samples, 0.99):>8.2f} {index_mb:>9.1f} {sizes['vectors'] / 2**20:>10.1f}"
+                    )
+        store.close()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
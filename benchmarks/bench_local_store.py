@@ -0,0 +1,59 @@
+# Top-k latency of LocalVectorStore (IVF over a memory-mapped matrix) on a
+# single core. Pin BLAS to one thread to measure the single-core number:
+#
+#   OMP_NUM_THREADS=1 OPENBLAS_NUM_THREADS=1 PYTHONPATH=src \
+#       python benchmarks/bench_local_store.py --n 1000000 --dim 128
+import argparse
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from atlas.memory.local_store import LocalVectorStore
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=1000000)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--nlist", type=int, default=1024)
+    parser.add_argument("--nprobe", type=int, default=10)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=50000)
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as path:
+        store = LocalVectorStore(path, nlist=args.nlist)
+        store.ensure_collection("bench", args.dim)
+        
+        start = time.perf_counter()
+        for offset in range(0, args.n, args.batch):
+            rows = min(args.batch, args.n - offset)
+            vectors = rng.standard_normal((rows, args.dim), dtype=np.float32)
+            store.insert(
+                "bench",
+                [""] * rows,
+                vectors,
+                list(range(offset, offset + rows)),
+                [{}] * rows
+            )
+        print(f"ingested {args.n} x {args.dim} in {time.perf_counter() - start:.1f}s")
+        
+        queries = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+        params = {"params": {"nprobe": args.nprobe}}
+        samples = []
+        for query in queries:
+            start = time.perf_counter()
+            store.search("bench", [query], args.k, params)
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        print(
+            f"top-{args.k} nprobe={args.nprobe}: p50={statistics.median(samples):.2f}ms "
+            f"p99={samples[int(0.99 * (len(samples) - 1))]:.2f}ms"
+        )
+        store.close()
+
+if __name__ == "__main__":
+    main()
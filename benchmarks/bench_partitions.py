@@ -0,0 +1,71 @@
+# Search latency for one tenant while other tenants' data grows. The tenant
+# keeps a fixed number of memories; every step adds --step vectors spread over
+# other tenants. "scoped" searches the tenant's partition (what AtlasMemory
+# does when the query context has a user or domain), "unscoped" searches the
+# whole collection as every query did before partitioning.
+#
+#   OMP_NUM_THREADS=1 PYTHONPATH=src python benchmarks/bench_partitions.py --steps 5
+import argparse
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from atlas.memory.local_store import LocalVectorStore
+from atlas.memory.store import partition_key
+
+def p50_ms(store: LocalVectorStore, queries: np.ndarray, partition, k: int) -> float:
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        store.search("memories", [query.tolist()], k, {"params": {"nprobe": 10}}, [partition])
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+def insert(store: LocalVectorStore, vectors: np.ndarray, partitions) -> None:
+    for start in range(0, len(vectors), 50000):
+        chunk = vectors[start:start + 50000]
+        store.insert(
+            "memories",
+            [""] * len(chunk),
+            chunk.tolist(),
+            [0] * len(chunk),
+            [{}] * len(chunk),
+            partitions[start:start + 50000]
+        )
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tenant-rows", type=int, default=20000)
+    parser.add_argument("--step", type=int, default=200000)
+    parser.add_argument("--steps", type=int, default=5)
+    parser.add_argument("--tenants", type=int, default=50)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--nlist", type=int, default=256)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(0)
+    tenant = partition_key("tenant-0", "finance")
+    with tempfile.TemporaryDirectory() as path:
+        store = LocalVectorStore(path, nlist=args.nlist)
+        store.ensure_collection("memories", args.dim)
+        own = rng.standard_normal((args.tenant_rows, args.dim)).astype(np.float32)
+        insert(store, own, [tenant] * len(own))
+        queries = own[rng.integers(len(own), size=100)]
+        
+        print(f"{'other rows':>10} {'scoped p50':>11} {'unscoped p50':>13}")
+        for step in range(args.steps + 1):
+            if step:
+                others = rng.standard_normal((args.step, args.dim)).astype(np.float32)
+                owners = rng.integers(1, args.tenants, size=args.step)
+                insert(store, others, [partition_key(f"tenant-{i}", "finance") for i in owners])
+            print(
+                f"{step * args.step:>10} {p50_ms(store, queries, tenant, args.k):>9.2f}ms "
+                f"{p50_ms(store, queries, None, args.k):>11.2f}ms"
+            )
+        store.close()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,85 @@
+# Measures prefill time for a persona/domain prompt with and without the prefix
+# KV cache, on CPU with a small causal LM. "full" runs a forward pass over the
+# whole prompt; "cached" reuses the preamble state from PrefixKVCache and only
+# runs the per-request body.
+#
+#   PYTHONPATH=src python benchmarks/bench_prefix_cache.py --model distilgpt2
+import argparse
+import statistics
+import time
+from typing import Callable, List
+
+import torch
+from transformers import AutoModelForCausalLM, AutoTokenizer
+
+from atlas.core.kv_cache import PrefixKVCache, as_model_cache
+from atlas.core.prompt import PromptBuilder
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def run(label: str, prefill: Callable[[], None], iterations: int) -> float:
+    prefill()
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        prefill()
+        samples.append((time.perf_counter() - start) * 1000)
+    median = statistics.median(samples)
+    print(f"{label:<8} p50={median:7.2f}ms p99={percentile(samples, 99):7.2f}ms")
+    return median
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default="distilgpt2")
+    parser.add_argument("--iterations", type=int, default=30)
+    parser.add_argument("--preamble-repeat", type=int, default=12)
+    args = parser.parse_args()
+    
+    torch.set_num_threads(1)
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    model = AutoModelForCausalLM.from_pretrained(args.model).eval()
+    
+    builder = PromptBuilder(tokenizer, token_budget=4096)
+    prompt = builder.build(
+        "How did asthma inhaler adherence change in 2024?",
+        [],
+        persona="healthcare_analyst",
+        domain="healthcare"
+    )
+    # Stand-in for a long house-style preamble
+    prefix = prompt.prefix * args.preamble_repeat
+    prefix_ids = tokenizer(prefix, return_tensors="pt")["input_ids"]
+    body_ids = tokenizer(prompt.body, add_special_tokens=False, return_tensors="pt")["input_ids"]
+    full_ids = torch.cat([prefix_ids, body_ids], dim=1)
+    print(f"model={args.model} prefix_tokens={prefix_ids.shape[1]} body_tokens={body_ids.shape[1]}")
+    
+    cache = PrefixKVCache(max_bytes=256 * 1024 * 1024)
+    with torch.inference_mode():
+        cache.put(
+            prompt.prefix_key,
+            model(input_ids=prefix_ids, use_cache=True).past_key_values,
+            prefix_ids[0].tolist()
+        )
+        
+        def prefill_full() -> None:
+            model(input_ids=full_ids, use_cache=True)
+        
+        def prefill_cached() -> None:
+            entry = cache.get(prompt.prefix_key)
+            model(
+                input_ids=body_ids,
+                past_key_values=as_model_cache(entry.layers),
+                attention_mask=torch.ones_like(full_ids),
+                use_cache=True
+            )
+        
+        full = run("full", prefill_full, args.iterations)
+        cached = run("cached", prefill_cached, args.iterations)
+    print(f"prefill speedup: {full / cached:.1f}x")
+    print(f"cache stats: {cache.stats()}")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,101 @@
+# Sentiment throughput in texts/second: one text per call (the old per-text
+# tool) against vectorized batches, on one core and on all cores (one worker
+# process per core, each with its own classifier), plus a second pass served
+# from the text-hash cache. Synthetic civic feedback unless --texts points at
+# a file with one text per line.
+#
+#   OMP_NUM_THREADS=1 PYTHONPATH=src python benchmarks/bench_sentiment.py --n 50000
+#   PYTHONPATH=src python benchmarks/bench_sentiment.py --backend local --n 5000
+import argparse
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+from atlas.core.sentiment import LexiconClassifier, SentimentClassifier, SentimentEngine, TransformerSentimentClassifier
+
+SUBJECTS = ["The bus", "The new bike lane", "Trash pickup", "The permit office", "Our park", "Street lighting", "The clinic", "Road repair"]
+OPINIONS = [
+    "is great", "was terrible", "is not very reliable", "has improved a lot", "is always late",
+    "was clean and safe", "is confusing", "works well", "is dangerous at night", "was fine"
+]
+DETAILS = ["", " this week", ", thanks to the staff", " and nobody answered my complaint", " near the school", " again"]
+
+_engine: Optional[SentimentEngine] = None
+
+def classifier(backend: str, model: str) -> SentimentClassifier:
+    if backend == "local":
+        import torch
+        torch.set_num_threads(1)
+        return TransformerSentimentClassifier(model)
+    return LexiconClassifier()
+
+def synthetic(n: int, unique: float, rng: random.Random) -> List[str]:
+    pool = [
+        f"{rng.choice(SUBJECTS)} {rng.choice(OPINIONS)}{rng.choice(DETAILS)} (ref {i})"
+        for i in range(max(int(n * unique), 1))
+    ]
+    return [rng.choice(pool) for _ in range(n)]
+
+def init_worker(backend: str, model: str, batch_size: int) -> None:
+    global _engine
+    _engine = SentimentEngine(classifier(backend, model), batch_size=batch_size, cache_size=0)
+
+def score_chunk(texts: List[str]) -> int:
+    return sum(1 for _ in _engine.analyze_iter(texts))
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", choices=["lexicon", "local"], default="lexicon")
+    parser.add_argument("--model", default="distilbert-base-uncased-finetuned-sst-2-english")
+    parser.add_argument("--texts", help="file with one text per line")
+    parser.add_argument("--n", type=int, default=50000)
+    parser.add_argument("--unique", type=float, default=1.0, help="share of distinct texts")
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--per-text", type=int, default=2000, help="texts for the one-at-a-time baseline")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    
+    if args.texts:
+        with open(args.texts) as f:
+            texts = [line.rstrip("\n") for line in f][:args.n]
+    else:
+        texts = synthetic(args.n, args.unique, random.Random(0))
+    print(f"{len(texts)} texts, {args.backend} backend, batch size {args.batch_size}, {args.workers} cores")
+    
+    def report(label: str, count: int, seconds: float) -> None:
+        print(f"{label:<28} {count / seconds:>12,.0f} texts/s")
+    
+    model = classifier(args.backend, args.model)
+    baseline = texts[:args.per_text]
+    start = time.perf_counter()
+    for text in baseline:
+        model.score_batch([text])
+    report("1 core, one text per call", len(baseline), time.perf_counter() - start)
+    
+    engine = SentimentEngine(model, batch_size=args.batch_size, cache_size=0)
+    start = time.perf_counter()
+    count = sum(1 for _ in engine.analyze_iter(texts))
+    report("1 core, batched", count, time.perf_counter() - start)
+    
+    chunk = args.batch_size * 8
+    with ProcessPoolExecutor(
+        args.workers,
+        initializer=init_worker,
+        initargs=(args.backend, args.model, args.batch_size)
+    ) as pool:
+        # Warm up every worker (imports, model load) before timing
+        list(pool.map(score_chunk, [texts[:1]] * args.workers))
+        start = time.perf_counter()
+        count = sum(pool.map(score_chunk, [texts[i:i + chunk] for i in range(0, len(texts), chunk)]))
+        report(f"all cores ({args.workers}), batched", count, time.perf_counter() - start)
+    
+    cached = SentimentEngine(model, batch_size=args.batch_size, cache_size=len(texts))
+    cached.analyze(texts)
+    start = time.perf_counter()
+    count = sum(1 for _ in cached.analyze_iter(texts))
+    report("1 core, cached second pass", count, time.perf_counter() - start)
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,105 @@
+# Measures API startup: import time of the query handler, time until /health
+# and /ready answer, and the memory of every process. Run it once per
+# inference mode to compare a model per worker against the shared sidecar.
+# RSS counts shared pages in every process; PSS splits them, so the PSS total
+# is the real footprint. Linux only (reads /proc).
+#
+#   PYTHONPATH=src python benchmarks/bench_startup.py --mode local --workers 4
+#   PYTHONPATH=src python benchmarks/bench_startup.py --mode sidecar --workers 4
+import argparse
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List, Optional
+
+def import_seconds(module: str) -> float:
+    code = f"import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+def wait_for(url: str, timeout: float) -> Optional[float]:
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return time.perf_counter() - start
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.05)
+    return None
+
+def children(pid: int) -> List[int]:
+    pids = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{task}/children") as f:
+            pids.extend(int(child) for child in f.read().split())
+    return pids
+
+def memory_mb(pid: int) -> Dict[str, float]:
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            name, _, rest = line.partition(":")
+            if name in ("Rss", "Pss"):
+                values[name.lower()] = int(rest.split()[0]) / 1024
+    return values
+
+def report(label: str, pid: int) -> float:
+    usage = memory_mb(pid)
+    print(f"  {label:<10} pid={pid:<7} rss={usage['rss']:8.1f}MB pss={usage['pss']:8.1f}MB")
+    return usage["pss"]
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", choices=["local", "sidecar"], default="sidecar")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--sidecar-port", type=int, default=8766)
+    parser.add_argument("--ready-timeout", type=float, default=600.0)
+    args = parser.parse_args()
+    
+    print(f"import atlas.services.query_handler: {import_seconds('atlas.services.query_handler'):.2f}s")
+    
+    env = dict(os.environ)
+    env["ATLAS_INFERENCE_MODE"] = args.mode
+    env["ATLAS_INFERENCE_SIDECAR_URL"] = f"http://127.0.0.1:{args.sidecar_port}"
+    processes = []
+    try:
+        sidecar = None
+        if args.mode == "sidecar":
+            sidecar = subprocess.Popen([sys.executable, "-m", "atlas.services.inference_server"], env=env)
+            processes.append(sidecar)
+        api = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "atlas.services.query_handler:app",
+                "--host", "127.0.0.1", "--port", str(args.port), "--workers", str(args.workers),
+                "--log-level", "warning"
+            ],
+            env=env
+        )
+        processes.append(api)
+        
+        base = f"http://127.0.0.1:{args.port}"
+        healthy = wait_for(f"{base}/health", timeout=60)
+        print(f"/health after: {healthy:.2f}s" if healthy is not None else "/health: timed out")
+        ready = wait_for(f"{base}/ready", timeout=args.ready_timeout)
+        print(f"/ready after:  {ready:.2f}s" if ready is not None else "/ready: timed out")
+        
+        print(f"memory ({args.mode}, {args.workers} workers):")
+        total = 0.0
+        for pid in children(api.pid):
+            total += report("worker", pid)
+        if sidecar is not None:
+            total += report("sidecar", sidecar.pid)
+        print(f"  total pss={total:.1f}MB")
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+            process.wait()
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,86 @@
+# Search latency as memory grows month over month: one flat collection versus
+# the hot/cold tiers kept by MemoryCompactor. Each simulated day inserts
+# --per-day memories, a share of which repeat an earlier question almost
+# verbatim, and the compactor runs at the end of every day. The tiered number
+# is one search per tier, as AtlasMemory issues them.
+#
+#   OMP_NUM_THREADS=1 PYTHONPATH=src python benchmarks/bench_tiered_memory.py --months 6
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from atlas.memory.compaction import MemoryCompactor, cold_collection
+from atlas.memory.local_store import LocalVectorStore
+
+DAY = 86400
+
+async def run(fn, *args):
+    return fn(*args)
+
+def unit(vectors: np.ndarray) -> np.ndarray:
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+def p50_ms(store: LocalVectorStore, names, queries: np.ndarray, k: int) -> float:
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        for name in names:
+            store.search(name, [query.tolist()], k * 4, {"params": {"nprobe": 10}})
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--months", type=int, default=6)
+    parser.add_argument("--per-day", type=int, default=1000)
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--repeat-share", type=float, default=0.5)
+    parser.add_argument("--hot-days", type=float, default=7)
+    parser.add_argument("--nlist", type=int, default=256)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+    
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as path:
+        store = LocalVectorStore(path, nlist=args.nlist)
+        for name in ("flat", "memories", cold_collection("memories")):
+            store.ensure_collection(name, args.dim)
+        compactor = MemoryCompactor(
+            store, run, "memories",
+            hot_age_seconds=args.hot_days * DAY,
+            max_age_seconds=365 * DAY,
+            batch_size=512,
+            max_batches=1000
+        )
+        seen = unit(rng.standard_normal((1, args.dim)))
+        print(f"{'month':>5} {'rows':>9} {'flat p50':>9} {'hot':>7} {'cold':>7} {'tiered p50':>11}")
+        for month in range(1, args.months + 1):
+            for day in range(30):
+                now = ((month - 1) * 30 + day) * DAY
+                repeats = int(args.per_day * args.repeat_share)
+                vectors = np.concatenate([
+                    unit(seen[rng.integers(len(seen), size=repeats)]
+                         + rng.normal(0, 0.005, (repeats, args.dim))),
+                    unit(rng.standard_normal((args.per_day - repeats, args.dim)))
+                ])
+                seen = np.concatenate([seen, vectors[repeats:]])
+                texts = [f"memory {now}-{i}" for i in range(len(vectors))]
+                for name in ("flat", "memories"):
+                    store.insert(name, texts, vectors.tolist(), [now] * len(vectors), [{}] * len(vectors))
+                await compactor.compact(now=now + DAY)
+            queries = seen[rng.integers(len(seen), size=100)]
+            stats = store.stats()
+            print(
+                f"{month:>5} {stats['flat']['live']:>9} "
+                f"{p50_ms(store, ['flat'], queries, args.k):>7.2f}ms "
+                f"{stats['memories']['live']:>7} {stats[cold_collection('memories')]['live']:>7} "
+                f"{p50_ms(store, ['memories', cold_collection('memories')], queries, args.k):>9.2f}ms"
+            )
+        store.close()
+
+if __name__ == "__main__":
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,91 @@
+# Compares the previous linear collect -> analyze -> report chain with the
+# fan-out DAG in InsightGenerationWorkflow on Temporal's local test server.
+# Activities are stand-ins with a fixed latency per source (one slow source);
+# the linear chain fetches and analyzes every source inside one activity.
+#
+#   PYTHONPATH=src python benchmarks/bench_workflow_dag.py --sources 8
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import timedelta
+from typing import Any, Dict, List
+
+from temporalio import activity, workflow
+from temporalio.testing import WorkflowEnvironment
+from temporalio.worker import UnsandboxedWorkflowRunner, Worker
+
+from atlas.workflows.engine import (
+    AnalysisResult,
+    InsightGenerationWorkflow,
+    ReportFormat,
+    generate_report,
+    merge_analyses
+)
+
+SOURCE_SECONDS = 0.2
+SLOW_SOURCE_SECONDS = 1.0
+ANALYZE_SECONDS_PER_SOURCE = 0.1
+
+def source_seconds(source: str) -> float:
+    return SLOW_SOURCE_SECONDS if source == "slow" else SOURCE_SECONDS
+
+@activity.defn(name="collect_data")
+async def collect_data(query: str, sources: List[str]) -> Dict[str, Any]:
+    for source in sources:
+        await asyncio.sleep(source_seconds(source))
+    return {"data": [{"source": source} for source in sources], "metadata": {}}
+
+@activity.defn(name="analyze_data")
+async def analyze_data(data: Dict[str, Any]) -> AnalysisResult:
+    await asyncio.sleep(ANALYZE_SECONDS_PER_SOURCE * len(data["data"]))
+    return AnalysisResult(insights=[{"rows": len(data["data"])}], confidence=0.5)
+
+@workflow.defn
+class LinearInsightWorkflow:
+    # The chain InsightGenerationWorkflow ran before the DAG
+    @workflow.run
+    async def run(self, query: str, sources: List[str], report_format: ReportFormat) -> Dict[str, Any]:
+        data = await workflow.execute_activity(
+            collect_data, args=[query, sources], start_to_close_timeout=timedelta(minutes=5)
+        )
+        analysis = await workflow.execute_activity(
+            analyze_data, args=[data], start_to_close_timeout=timedelta(minutes=10)
+        )
+        return await workflow.execute_activity(
+            generate_report, args=[analysis, report_format], start_to_close_timeout=timedelta(minutes=5)
+        )
+
+async def timed(client: Any, run: Any, args: List[Any]) -> float:
+    start = time.perf_counter()
+    await client.execute_workflow(run, args=args, id=f"bench-{uuid.uuid4()}", task_queue="atlas_bench")
+    return time.perf_counter() - start
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sources", type=int, default=8)
+    parser.add_argument("--parallelism", type=int, default=8)
+    args = parser.parse_args()
+    sources = ["slow"] + [f"source_{i}" for i in range(args.sources - 1)]
+    report_format = ReportFormat()
+    
+    async with await WorkflowEnvironment.start_local() as env:
+        async with Worker(
+            env.client,
+            task_queue="atlas_bench",
+            workflows=[LinearInsightWorkflow, InsightGenerationWorkflow],
+            activities=[collect_data, analyze_data, merge_analyses, generate_report],
+            workflow_runner=UnsandboxedWorkflowRunner()
+        ):
+            linear = await timed(env.client, LinearInsightWorkflow.run, ["q", sources, report_format])
+            dag = await timed(
+                env.client,
+                InsightGenerationWorkflow.run,
+                ["q", sources, report_format, args.parallelism]
+            )
+    print(f"sources={len(sources)} parallelism={args.parallelism}")
+    print(f"linear chain  {linear:6.2f}s")
+    print(f"fan-out DAG   {dag:6.2f}s  ({linear / dag:.1f}x)")
+
+if __name__ == "__main__":
+    asyncio.run(main())
\ No newline at end of file
@@ -1,10 +1,28 @@
-from typing import Optional, List, Dict, Any
+import asyncio
+import functools
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Optional, List, Dict, Any, AsyncIterator, Tuple, Union
 from pydantic import BaseModel
-from transformers import AutoModelForCausalLM, AutoTokenizer
+from .analytics import AnalyticsEngine, analyze_data, render_report
 from .config import AtlasConfig
-from ..memory.vector_store import AtlasMemory
+from .deadline import check_deadline
+from .metrics import instrumented, stage
+from .scheduler import InferenceScheduler, GenerationOutput
+from .semantic_cache import INTERACTION_SOURCE, SemanticCache
+from .sentiment import analyze_sentiment
+from .prompt import PromptBuilder, PreparedPrompt
+from .generation import ModelGenerator, load_model, load_tokenizer
+from .sidecar import InferenceClient
+from .singleflight import SingleFlight, query_key
+from .tools import ToolCall, ToolResult, ToolRuntime
+from ..memory.store import partition_key
 from loguru import logger
 
+if TYPE_CHECKING:
+    # pymilvus and transformers are imported on first use to keep startup fast
+    from ..memory.vector_store import AtlasMemory
+
 class QueryContext(BaseModel):
     persona: Optional[str] = None
     domain: Optional[str] = None
@@ -17,40 +35,91 @@ class AtlasResponse(BaseModel):
     sources: List[Dict[str, Any]] = []
     metadata: Dict[str, Any] = {}
 
+class StreamEvent(BaseModel):
+    event: str  # token, done, error
+    data: Dict[str, Any] = {}
+
 class AtlasAgent:
     def __init__(self, config: AtlasConfig):
         self.config = config
         self.llm = self._initialize_llm()
         self.tokenizer = self._initialize_tokenizer()
+        self.prompt_builder = self._initialize_prompt_builder()
+        self.generator = self._initialize_generator()
+        self.scheduler = self._initialize_scheduler()
         self.memory = self._initialize_memory()
+        self.cache = self._initialize_cache()
+        self.analytics = AnalyticsEngine(
+            anomaly_z_score=config.ANALYTICS_ANOMALY_Z_SCORE,
+            min_correlation=config.ANALYTICS_MIN_CORRELATION,
+            min_trend=config.ANALYTICS_MIN_TREND
+        )
         self.tools = self._initialize_tools()
+        self.inflight = SingleFlight(layer="agent")
+        self.ttft_ms: deque = deque(maxlen=1000)  # Recent time-to-first-token samples
         logger.info("Atlas Agent initialized successfully")
     
-    def _initialize_llm(self) -> AutoModelForCausalLM:
+    def _initialize_llm(self) -> Any:
+        if self.config.INFERENCE_MODE == "sidecar":
+            # Weights live in the inference sidecar, shared by every worker
+            logger.info(f"Using inference sidecar at {self.config.INFERENCE_SIDECAR_URL}")
+            return None
         try:
-            model = AutoModelForCausalLM.from_pretrained(
-                self.config.DEFAULT_MODEL,
-                trust_remote_code=True
-            )
+            model = load_model(self.config)
             logger.info(f"Loaded LLM model: {self.config.DEFAULT_MODEL}")
             return model
         except Exception as e:
             logger.error(f"Failed to initialize LLM: {str(e)}")
             raise
     
-    def _initialize_tokenizer(self) -> AutoTokenizer:
+    def _initialize_tokenizer(self) -> Any:
+        # Loaded in every worker: prompt assembly counts tokens locally
         try:
-            tokenizer = AutoTokenizer.from_pretrained(
-                self.config.DEFAULT_MODEL,
-                trust_remote_code=True
-            )
+            tokenizer = load_tokenizer(self.config)
             logger.info("Tokenizer initialized successfully")
             return tokenizer
         except Exception as e:
             logger.error(f"Failed to initialize tokenizer: {str(e)}")
             raise
     
-    def _initialize_memory(self) -> AtlasMemory:
+    def _initialize_prompt_builder(self) -> PromptBuilder:
+        budget = min(
+            self.config.PROMPT_TOKEN_BUDGET,
+            self.config.CONTEXT_WINDOW - self.config.MAX_NEW_TOKENS
+        )
+        prompt_builder = PromptBuilder(
+            self.tokenizer,
+            token_budget=budget,
+            decay_factor=self.config.MEMORY_DECAY_FACTOR
+        )
+        logger.info(f"Prompt builder initialized with a {budget}-token budget")
+        return prompt_builder
+    
+    def _initialize_generator(self) -> Optional[ModelGenerator]:
+        if self.llm is None:
+            return None
+        return ModelGenerator(self.config, self.llm, self.tokenizer)
+    
+    def _initialize_scheduler(self) -> Union[InferenceScheduler, InferenceClient]:
+        if self.generator is None:
+            client = InferenceClient(
+                self.config.INFERENCE_SIDECAR_URL,
+                max_new_tokens=self.config.MAX_NEW_TOKENS,
+                timeout=self.config.INFERENCE_SIDECAR_TIMEOUT
+            )
+            logger.info("Inference sidecar client initialized successfully")
+            return client
+        scheduler = InferenceScheduler(
+            self.generator.generate_batch,
+            max_batch_size=self.config.INFERENCE_MAX_BATCH_SIZE,
+            max_wait=self.config.INFERENCE_MAX_WAIT_MS / 1000,
+            max_new_tokens=self.config.MAX_NEW_TOKENS
+        )
+        logger.info("Inference scheduler initialized successfully")
+        return scheduler
+    
+    def _initialize_memory(self) -> "AtlasMemory":
+        from ..memory.vector_store import AtlasMemory
         try:
             memory = AtlasMemory(self.config)
             logger.info("Memory system initialized successfully")
@@ -59,61 +128,382 @@ class AtlasAgent:
             logger.error(f"Failed to initialize memory: {str(e)}")
             raise
     
-    def _initialize_tools(self) -> Dict[str, Any]:
-        # Initialize available tools/skills
-        tools = {
-            "data_analysis": self._analyze_data,
-            "sentiment_analysis": self._analyze_sentiment,
-            "report_generation": self._generate_report
-        }
+    def _initialize_cache(self) -> Optional[SemanticCache]:
+        if not self.config.SEMANTIC_CACHE_ENABLED:
+            return None
+        # Reuses the memory embedding path (and its content-hash cache)
+        cache = SemanticCache(
+            embed=lambda text: self.memory.embeddings.embed(text),
+            threshold=self.config.SEMANTIC_CACHE_THRESHOLD,
+            ttl_seconds=self.config.SEMANTIC_CACHE_TTL_SECONDS,
+            max_entries=self.config.SEMANTIC_CACHE_MAX_ENTRIES
+        )
+        self.memory.add_store_listener(cache.on_memory_stored)
+        logger.info("Semantic cache initialized successfully")
+        return cache
+    
+    def _initialize_tools(self) -> ToolRuntime:
+        # Initialize available tools/skills. cpu tools run in worker
+        # processes, so they are plain functions over picklable arguments.
+        tools = ToolRuntime(
+            max_workers=self.config.TOOL_MAX_WORKERS,
+            timeout=self.config.TOOL_TIMEOUT_SECONDS,
+            cache_size=self.config.TOOL_CACHE_SIZE
+        )
+        timeouts = self.config.TOOL_TIMEOUTS
+        tools.register(
+            "data_analysis",
+            functools.partial(analyze_data, self.analytics),
+            kind="cpu",
+            timeout=timeouts.get("data_analysis")
+        )
+        # Each worker's sentiment engine caches per text, which also serves
+        # overlapping batches, so the whole-call memo would only duplicate it
+        tools.register(
+            "sentiment_analysis",
+            functools.partial(
+                analyze_sentiment,
+                self.config.SENTIMENT_BACKEND,
+                self.config.SENTIMENT_MODEL,
+                self.config.SENTIMENT_BATCH_SIZE,
+                self.config.SENTIMENT_CACHE_SIZE
+            ),
+            kind="cpu",
+            timeout=timeouts.get("sentiment_analysis"),
+            memoize=False
+        )
+        tools.register("report_generation", self._generate_report, kind="io", timeout=timeouts.get("report_generation"))
         logger.info(f"Initialized {len(tools)} tools")
         return tools
     
+    @instrumented("agent")
     async def process_query(
         self,
         query: str,
         context: Optional[QueryContext] = None
+    ) -> AtlasResponse:
+        # Identical queries already in flight share one pipeline run
+        key = query_key(
+            query,
+            persona=context.persona if context else None,
+            domain=context.domain if context else None,
+            metadata=context.metadata if context else None,
+            user_id=context.user_id if context else None
+        )
+        response, coalesced = await self.inflight.run(
+            key,
+            lambda: self._process_query(query, context)
+        )
+        if coalesced:
+            response = response.copy(deep=True)
+            response.metadata["coalesced"] = True
+        return response
+    
+    async def _process_query(
+        self,
+        query: str,
+        context: Optional[QueryContext]
     ) -> AtlasResponse:
         try:
+            # 0. Serve near-identical questions from the semantic cache
+            with stage("agent", "cache_lookup"):
+                cached = await self._lookup_cache(query, context)
+            if cached is not None:
+                return cached
+            
             # 1. Retrieve relevant memories
-            memories = await self.memory.retrieve_relevant(query)
+            with stage("agent", "retrieve"):
+                memories = await self.memory.retrieve_relevant(query, partition=self._partition(context))
             
             # 2. Prepare context for LLM
-            prompt = self._prepare_prompt(query, memories, context)
+            with stage("agent", "prompt"):
+                prompt = self._prepare_prompt(query, memories, context)
             
             # 3. Generate response
-            response = self._generate_response(prompt)
+            check_deadline("generation")
+            with stage("agent", "generate"):
+                response = await self._generate_response(prompt)
             
             # 4. Store interaction in memory
-            await self.memory.store_memory(
-                text=query,
-                metadata={
-                    "response": response.text,
-                    "context": context.dict() if context else {}
-                }
-            )
+            with stage("agent", "memory_write"):
+                await self.memory.store_memory(
+                    text=query,
+                    metadata=self._interaction_metadata(response, context),
+                    partition=self._partition(context)
+                )
+            
+            # 5. Cache the answer
+            with stage("agent", "cache_store"):
+                await self._store_cache(query, context, response)
             
             return response
         except Exception as e:
             logger.error(f"Error processing query: {str(e)}")
             raise
     
-    def _prepare_prompt(self, query: str, memories: List[Dict], context: Optional[QueryContext]) -> str:
-        # Implement prompt engineering logic
-        pass
+    async def process_queries(
+        self,
+        queries: List[Tuple[str, Optional[QueryContext]]]
+    ) -> AsyncIterator[Tuple[int, Union[AtlasResponse, Exception]]]:
+        # Bulk path for offline jobs. Yields (index, response) as each query
+        # finishes, or (index, exception) when only that query failed
+        texts = [query for query, _ in queries]
+        tasks: Dict[asyncio.Future, int] = {}
+        try:
+            # 0. Embed every query in one batch; the cache lookups and the
+            # retrieval below are served from the embedding cache
+            await self.memory.embeddings.embed_many(texts)
+            misses = []
+            for index, (query, context) in enumerate(queries):
+                cached = await self._lookup_cache(query, context)
+                if cached is not None:
+                    yield index, cached
+                else:
+                    misses.append(index)
+            if not misses:
+                return
+            
+            # 1. Retrieve memories for every query with one multi-vector search
+            try:
+                with stage("agent_batch", "retrieve"):
+                    memories = await self.memory.retrieve_relevant_many(
+                        [texts[index] for index in misses],
+                        partitions=[self._partition(queries[index][1]) for index in misses]
+                    )
+            except Exception as e:
+                for index in misses:
+                    yield index, e
+                return
+            
+            # 2. Prepare context for LLM
+            prompts: Dict[int, PreparedPrompt] = {}
+            for index, found in zip(misses, memories):
+                try:
+                    prompts[index] = self._prepare_prompt(texts[index], found, queries[index][1])
+                except Exception as e:
+                    yield index, e
+            
+            # 3. Generate responses; the scheduler batches the queued prompts
+            tasks = {
+                asyncio.ensure_future(self._generate_response(prompt)): index
+                for index, prompt in prompts.items()
+            }
+            completed: List[Tuple[int, AtlasResponse]] = []
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    index = tasks[task]
+                    try:
+                        response = task.result()
+                    except Exception as e:
+                        logger.error(f"Error processing batch query {index}: {str(e)}")
+                        yield index, e
+                        continue
+                    completed.append((index, response))
+                    yield index, response
+            
+            # 4. Store every interaction in memory with one bulk insert
+            with stage("agent_batch", "memory_write"):
+                await self.memory.store_memories([
+                    (
+                        texts[index],
+                        self._interaction_metadata(response, queries[index][1])
+                    )
+                    for index, response in completed
+                ], partitions=[self._partition(queries[index][1]) for index, _ in completed])
+            
+            # 5. Cache the answers
+            for index, response in completed:
+                await self._store_cache(texts[index], queries[index][1], response)
+        except Exception as e:
+            logger.error(f"Error processing query batch: {str(e)}")
+            raise
+        finally:
+            # Client went away mid-batch: drop generations still queued
+            for task in tasks:
+                task.cancel()
+    
+    async def _lookup_cache(
+        self,
+        query: str,
+        context: Optional[QueryContext]
+    ) -> Optional[AtlasResponse]:
+        if self.cache is None:
+            return None
+        try:
+            hit = await self.cache.lookup(
+                query,
+                context.persona if context else None,
+                context.domain if context else None,
+                user_id=context.user_id if context else None
+            )
+        except Exception as e:
+            # The cache is an optimization; fall through to the full pipeline
+            logger.warning(f"Semantic cache lookup failed: {str(e)}")
+            return None
+        if hit is None:
+            return None
+        response, similarity = hit
+        cached = response.copy(deep=True)
+        cached.metadata.update({"cache": "hit", "cache_similarity": similarity})
+        return cached
+    
+    async def _store_cache(
+        self,
+        query: str,
+        context: Optional[QueryContext],
+        response: AtlasResponse
+    ) -> None:
+        if self.cache is None:
+            return
+        try:
+            await self.cache.store(
+                query,
+                context.persona if context else None,
+                context.domain if context else None,
+                response,
+                user_id=context.user_id if context else None
+            )
+        except Exception as e:
+            logger.warning(f"Failed to cache response: {str(e)}")
+    
+    async def stream_query(
+        self,
+        query: str,
+        context: Optional[QueryContext] = None
+    ) -> AsyncIterator[StreamEvent]:
+        started = time.monotonic()
+        try:
+            # 1. Retrieve relevant memories
+            with stage("agent_stream", "retrieve"):
+                memories = await self.memory.retrieve_relevant(query, partition=self._partition(context))
+            
+            # 2. Prepare context for LLM
+            with stage("agent_stream", "prompt"):
+                prompt = self._prepare_prompt(query, memories, context)
+            
+            # 3. Stream tokens while the response is generated; the stage
+            # includes the time the client takes to read them
+            output = None
+            ttft_ms = None
+            check_deadline("generation")
+            with stage("agent_stream", "generate"):
+                async for item in self.scheduler.stream(prompt):
+                    if isinstance(item, GenerationOutput):
+                        output = item
+                        continue
+                    if ttft_ms is None:
+                        ttft_ms = (time.monotonic() - started) * 1000
+                        self.ttft_ms.append(ttft_ms)
+                    yield StreamEvent(event="token", data={"text": item})
+            
+            response = self._build_response(output, prompt)
+            response.metadata["time_to_first_token_ms"] = ttft_ms
+            yield StreamEvent(event="done", data=response.dict())
+            
+            # 4. Store interaction in memory once the stream is complete
+            with stage("agent_stream", "memory_write"):
+                await self.memory.store_memory(
+                    text=query,
+                    metadata=self._interaction_metadata(response, context),
+                    partition=self._partition(context)
+                )
+        except Exception as e:
+            logger.error(f"Error streaming query: {str(e)}")
+            raise
+    
+    def stats(self) -> Dict[str, Any]:
+        ttft = sorted(self.ttft_ms)
+        return {
+            "scheduler": self.scheduler.stats(),
+            "semantic_cache": self.cache.stats() if self.cache else {},
+            "prompts": self.prompt_builder.stats(),
+            "coalescing": self.inflight.stats(),
+            "generator": self.generator.stats() if self.generator else {},
+            "tools": self.tools.stats(),
+            "time_to_first_token_ms": {
+                "count": len(ttft),
+                "p50": ttft[len(ttft) // 2] if ttft else 0.0,
+                "p99": ttft[int(0.99 * (len(ttft) - 1))] if ttft else 0.0
+            }
+        }
+    
+    async def run_tools(self, calls: List[ToolCall]) -> List[ToolResult]:
+        # Independent tool calls (POST /tools), run concurrently; each result
+        # carries its latency and the process pool load it saw
+        with stage("agent", "tools"):
+            return await self.tools.run(calls)
+    
+    async def start(self) -> None:
+        # Background work that needs the running event loop
+        await self.memory.start_compactor()
+    
+    async def ready(self) -> bool:
+        # Ready once constructed, unless generation depends on the sidecar
+        if isinstance(self.scheduler, InferenceClient):
+            return await self.scheduler.ready()
+        return True
+    
+    async def shutdown(self) -> None:
+        # Flush buffered memory writes before the process exits
+        try:
+            await self.scheduler.stop()
+            self.tools.shutdown()
+            await self.memory.aclose()
+            logger.info("Atlas Agent shut down successfully")
+        except Exception as e:
+            logger.error(f"Error shutting down agent: {str(e)}")
+            raise
+    
+    @staticmethod
+    def _interaction_metadata(response: AtlasResponse, context: Optional[QueryContext]) -> Dict[str, Any]:
+        # Tagged so the semantic cache does not drop the domain's answers for
+        # the agent's own question/answer records
+        return {
+            "response": response.text,
+            "context": context.dict() if context else {},
+            "source": INTERACTION_SOURCE
+        }
+    
+    @staticmethod
+    def _partition(context: Optional[QueryContext]) -> Optional[str]:
+        # Memories are scoped to the caller's user and domain
+        return partition_key(context.user_id, context.domain) if context else None
     
-    def _generate_response(self, prompt: str) -> AtlasResponse:
-        # Implement response generation logic
-        pass
+    def _prepare_prompt(self, query: str, memories: List[Dict], context: Optional[QueryContext]) -> PreparedPrompt:
+        return self.prompt_builder.build(
+            query,
+            memories,
+            persona=context.persona if context else None,
+            domain=context.domain if context else None
+        )
     
-    async def _analyze_data(self, data: Dict) -> Dict:
-        # Implement data analysis logic
-        pass
+    async def _generate_response(self, prompt: PreparedPrompt) -> AtlasResponse:
+        # The scheduler hands the PreparedPrompt to the generator, which
+        # resumes from the cached prefix state when there is one
+        output = await self.scheduler.generate(prompt)
+        return self._build_response(output, prompt)
     
-    async def _analyze_sentiment(self, text: str) -> Dict:
-        # Implement sentiment analysis logic
-        pass
+    def _build_response(self, output: GenerationOutput, prompt: PreparedPrompt) -> AtlasResponse:
+        return AtlasResponse(
+            text=output.text,
+            confidence=output.confidence,
+            sources=prompt.sources,
+            metadata={
+                "tokens": output.num_tokens,
+                "prompt_tokens": prompt.prompt_tokens,
+                "prompt_tokens_saved": prompt.tokens_saved,
+                "memories_used": prompt.memories_used,
+                "queue_wait_ms": output.queue_wait_ms,
+                "generation_ms": output.generation_ms
+            }
+        )
     
-    async def _generate_report(self, data: Dict) -> Dict:
-        # Implement report generation logic
-        pass
\ No newline at end of file
+    async def _generate_report(self, analysis: Dict, format_type: str = "markdown", title: str = "Insight Report") -> Dict:
+        # Renders a data_analysis result; cheap enough to run on the loop
+        try:
+            return render_report(analysis, format_type=format_type, title=title)
+        except Exception as e:
+            logger.error(f"Error generating report: {str(e)}")
+            raise
\ No newline at end of file
@@ -0,0 +1,362 @@
+import math
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+import numpy as np
+
+Columns = Dict[str, np.ndarray]
+
+def columns_from_rows(rows: List[Dict[str, Any]]) -> Columns:
+    # Numeric columns become float64 (blank -> nan); anything else is text
+    names: List[str] = []
+    for row in rows:
+        names.extend(name for name in row if name not in names)
+    columns = {}
+    for name in names:
+        values = [row.get(name) for row in rows]
+        try:
+            columns[name] = np.array(
+                [np.nan if value is None or value == "" else value for value in values],
+                dtype=np.float64
+            )
+        except (TypeError, ValueError):
+            columns[name] = np.array(["" if value is None else str(value) for value in values])
+    return columns
+
+def to_columns(data: Any) -> Columns:
+    # Row dicts, {name: array-like} or anything with .items() (a DataFrame)
+    if isinstance(data, list):
+        return columns_from_rows(data)
+    return {str(name): np.asarray(values) for name, values in data.items()}
+
+def _as_float(values: np.ndarray) -> np.ndarray:
+    # A column that turns to text in a later chunk contributes nothing there
+    values = np.asarray(values)
+    if values.dtype.kind in "biuf":
+        return values.astype(np.float64, copy=False)
+    return np.full(len(values), np.nan)
+
+def _number(value: float) -> Optional[float]:
+    return float(value) if math.isfinite(value) else None
+
+def correlation_confidence(r: float, n: float) -> float:
+    # 1 - p-value of r != 0 under the Fisher transform
+    if n < 4 or not math.isfinite(r):
+        return 0.0
+    z = math.atanh(min(abs(r), 0.999999)) * math.sqrt(n - 3)
+    return math.erf(z / math.sqrt(2))
+
+class ColumnMoments:
+    # Count, mean, M2, min and max per column, plus the co-moment with row
+    # position for trends. Vectorized over columns, non-finite values are
+    # skipped per column, and chunks merge with the pairwise update of Chan
+    # et al. so the result does not depend on chunking.
+    def __init__(self, width: int):
+        self.rows = 0
+        self.n = np.zeros(width)
+        self.mean = np.zeros(width)
+        self.m2 = np.zeros(width)
+        self.min = np.full(width, np.inf)
+        self.max = np.full(width, -np.inf)
+        self.mean_t = np.zeros(width)
+        self.m2_t = np.zeros(width)
+        self.c_ty = np.zeros(width)
+    
+    def update(self, x: np.ndarray, offset: int) -> None:
+        # x is columns x rows, so every reduction runs over contiguous memory
+        t = np.arange(offset, offset + x.shape[1], dtype=np.float64)
+        valid = np.isfinite(x)
+        if valid.all():
+            n = np.full(len(x), float(x.shape[1]))
+            mean = x.mean(axis=1)
+            mean_t = np.full(len(x), t.mean())
+            dx = x - mean[:, None]
+            dt = np.broadcast_to(t - t.mean(), x.shape)
+            low, high = x.min(axis=1), x.max(axis=1)
+        else:
+            n = valid.sum(axis=1).astype(np.float64)
+            safe_n = np.maximum(n, 1)
+            mean = np.where(valid, x, 0.0).sum(axis=1) / safe_n
+            mean_t = np.where(valid, t, 0.0).sum(axis=1) / safe_n
+            dx = np.where(valid, x - mean[:, None], 0.0)
+            dt = np.where(valid, t - mean_t[:, None], 0.0)
+            low = np.where(valid, x, np.inf).min(axis=1)
+            high = np.where(valid, x, -np.inf).max(axis=1)
+        
+        total = self.n + n
+        safe_total = np.maximum(total, 1)
+        weight = self.n * n / safe_total
+        delta = mean - self.mean
+        delta_t = mean_t - self.mean_t
+        self.m2 += np.einsum("ij,ij->i", dx, dx) + delta * delta * weight
+        self.m2_t += np.einsum("ij,ij->i", dt, dt) + delta_t * delta_t * weight
+        self.c_ty += np.einsum("ij,ij->i", dx, dt) + delta * delta_t * weight
+        self.mean += delta * n / safe_total
+        self.mean_t += delta_t * n / safe_total
+        self.n = total
+        self.min = np.minimum(self.min, low)
+        self.max = np.maximum(self.max, high)
+        self.rows += x.shape[1]
+    
+    @property
+    def std(self) -> np.ndarray:
+        return np.sqrt(self.m2 / np.maximum(self.n, 1))
+
+class Covariance:
+    # Co-moment matrix over rows where every column is finite
+    def __init__(self, width: int):
+        self.n = 0
+        self.mean = np.zeros(width)
+        self.c = np.zeros((width, width))
+    
+    def update(self, x: np.ndarray) -> None:
+        complete = np.isfinite(x).all(axis=0)
+        if not complete.all():
+            x = x[:, complete]
+        n = x.shape[1]
+        if not n:
+            return
+        mean = x.mean(axis=1)
+        d = x - mean[:, None]
+        total = self.n + n
+        delta = mean - self.mean
+        self.c += d @ d.T + np.outer(delta, delta) * self.n * n / total
+        self.mean += delta * n / total
+        self.n = total
+    
+    def correlation(self) -> np.ndarray:
+        std = np.sqrt(np.diag(self.c))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.c / np.outer(std, std)
+
+class AnomalyScan:
+    # Second pass: values more than z_threshold standard deviations from the
+    # column mean, keeping the most extreme few per column
+    def __init__(self, mean: np.ndarray, std: np.ndarray, z_threshold: float, max_examples: int):
+        self.mean = mean
+        self.std = np.where(std > 0, std, np.nan)
+        self.z_threshold = z_threshold
+        self.max_examples = max_examples
+        self.counts = np.zeros(len(mean), dtype=np.int64)
+        self.examples: List[List[Dict[str, float]]] = [[] for _ in mean]
+    
+    def update(self, x: np.ndarray, offset: int) -> None:
+        with np.errstate(invalid="ignore"):
+            z = np.abs(x - self.mean[:, None]) / self.std[:, None]
+            flagged = z > self.z_threshold
+        self.counts += flagged.sum(axis=1)
+        for column in np.flatnonzero(flagged.any(axis=1)):
+            rows = np.flatnonzero(flagged[column])
+            if len(rows) > self.max_examples:
+                rows = rows[np.argpartition(-z[column, rows], self.max_examples)[:self.max_examples]]
+            merged = self.examples[column] + [
+                {"row": int(offset + row), "value": float(x[column, row]), "z_score": float(z[column, row])}
+                for row in rows
+            ]
+            merged.sort(key=lambda example: -example["z_score"])
+            self.examples[column] = merged[:self.max_examples]
+
+class AnalyticsEngine:
+    # Computes the standard insight set -- aggregates, trends (against row
+    # order), anomalies and pairwise correlations -- for the numeric columns
+    # of a dataset. Work is vectorized per block of rows, and a dataset given
+    # as chunks is read twice (moments, then anomalies), never held whole.
+    def __init__(
+        self,
+        anomaly_z_score: float = 3.0,
+        min_correlation: float = 0.5,
+        min_trend: float = 0.3,
+        block_rows: int = 65536,
+        max_examples: int = 5
+    ):
+        self.anomaly_z_score = anomaly_z_score
+        self.min_correlation = min_correlation
+        self.min_trend = min_trend
+        self.block_rows = block_rows
+        self.max_examples = max_examples
+    
+    def configure(self, anomaly_z_score: float, min_correlation: float, min_trend: float) -> None:
+        self.anomaly_z_score = anomaly_z_score
+        self.min_correlation = min_correlation
+        self.min_trend = min_trend
+    
+    def analyze(self, data: Any) -> List[Dict[str, Any]]:
+        columns = to_columns(data)
+        return self.analyze_chunks(lambda: self._blocks(columns))
+    
+    def _blocks(self, columns: Columns) -> Iterator[Columns]:
+        rows = len(next(iter(columns.values()))) if columns else 0
+        for start in range(0, rows, self.block_rows):
+            yield {name: values[start:start + self.block_rows] for name, values in columns.items()}
+    
+    def analyze_chunks(self, chunks: Callable[[], Iterable[Columns]]) -> List[Dict[str, Any]]:
+        # chunks() must return a fresh iterator over the same data each call
+        names: Optional[List[str]] = None
+        offset = 0
+        for chunk in chunks():
+            if names is None:
+                names = [name for name, values in chunk.items() if np.asarray(values).dtype.kind in "biuf"]
+                if not names:
+                    return []
+                moments = ColumnMoments(len(names))
+                covariance = Covariance(len(names))
+            x = np.stack([_as_float(chunk[name]) for name in names])
+            moments.update(x, offset)
+            covariance.update(x)
+            offset += x.shape[1]
+        if names is None:
+            return []
+        
+        anomalies = AnomalyScan(moments.mean, moments.std, self.anomaly_z_score, self.max_examples)
+        offset = 0
+        for chunk in chunks():
+            x = np.stack([_as_float(chunk[name]) for name in names])
+            anomalies.update(x, offset)
+            offset += x.shape[1]
+        
+        return [
+            *self._aggregates(names, moments),
+            *self._trends(names, moments),
+            *self._anomalies(names, moments, anomalies),
+            *self._correlations(names, covariance)
+        ]
+    
+    def _aggregates(self, names: List[str], moments: ColumnMoments) -> List[Dict[str, Any]]:
+        return [
+            {
+                "type": "aggregate",
+                "column": name,
+                "count": int(moments.n[i]),
+                "missing": int(moments.rows - moments.n[i]),
+                "sum": _number(moments.mean[i] * moments.n[i]),
+                "mean": _number(moments.mean[i]) if moments.n[i] else None,
+                "std": _number(moments.std[i]) if moments.n[i] else None,
+                "min": _number(moments.min[i]),
+                "max": _number(moments.max[i]),
+                # Share of rows with a usable value
+                "confidence": float(moments.n[i] / max(moments.rows, 1))
+            }
+            for i, name in enumerate(names)
+        ]
+    
+    def _trends(self, names: List[str], moments: ColumnMoments) -> List[Dict[str, Any]]:
+        with np.errstate(divide="ignore", invalid="ignore"):
+            r = moments.c_ty / np.sqrt(moments.m2 * moments.m2_t)
+            slope = moments.c_ty / moments.m2_t
+        insights = []
+        for i in np.flatnonzero(np.abs(np.nan_to_num(r)) >= self.min_trend):
+            insights.append({
+                "type": "trend",
+                "column": names[i],
+                "direction": "increasing" if slope[i] > 0 else "decreasing",
+                "slope_per_row": float(slope[i]),
+                "r": float(r[i]),
+                "confidence": correlation_confidence(float(r[i]), float(moments.n[i]))
+            })
+        return insights
+    
+    def _anomalies(
+        self,
+        names: List[str],
+        moments: ColumnMoments,
+        anomalies: AnomalyScan
+    ) -> List[Dict[str, Any]]:
+        # Confidence is 1 - (Bonferroni bound on) the chance that the most
+        # extreme value is Gaussian noise, so one huge outlier in a large
+        # column counts and a 3.5 sigma value in a million rows does not
+        insights = []
+        for i in np.flatnonzero(anomalies.counts):
+            count = int(anomalies.counts[i])
+            top = anomalies.examples[i][0]["z_score"]
+            chance = moments.n[i] * math.erfc(top / math.sqrt(2))
+            insights.append({
+                "type": "anomaly",
+                "column": names[i],
+                "count": count,
+                "rate": float(count / moments.n[i]),
+                "z_threshold": self.anomaly_z_score,
+                "examples": anomalies.examples[i],
+                "confidence": float(max(0.0, 1.0 - chance))
+            })
+        return insights
+    
+    def _correlations(self, names: List[str], covariance: Covariance) -> List[Dict[str, Any]]:
+        r = covariance.correlation()
+        first, second = np.triu_indices(len(names), k=1)
+        values = r[first, second]
+        strong = np.abs(np.nan_to_num(values)) >= self.min_correlation
+        return [
+            {
+                "type": "correlation",
+                "columns": [names[i], names[j]],
+                "r": float(value),
+                "count": covariance.n,
+                "confidence": correlation_confidence(float(value), covariance.n)
+            }
+            for i, j, value in zip(first[strong], second[strong], values[strong])
+        ]
+    
+    @staticmethod
+    def confidence(insights: List[Dict[str, Any]]) -> float:
+        if not insights:
+            return 0.0
+        return float(np.mean([insight["confidence"] for insight in insights]))
+
+def analyze_data(engine: AnalyticsEngine, data: Dict[str, Any]) -> Dict[str, Any]:
+    # The agent's data_analysis tool. data is {"data": [rows]} or
+    # {"columns": {name: values}}; a plain function so it can run in a
+    # tool worker process
+    insights = engine.analyze(data["columns"] if "columns" in data else data.get("data", []))
+    return {
+        "insights": insights,
+        "confidence": engine.confidence(insights),
+        "metadata": {"insight_count": len(insights)}
+    }
+
+REPORT_SECTIONS = {
+    "aggregate": "Summary",
+    "trend": "Trends",
+    "anomaly": "Anomalies",
+    "correlation": "Correlations"
+}
+
+def _format(value: Optional[float]) -> str:
+    return "n/a" if value is None else f"{value:.4g}"
+
+def _describe(insight: Dict[str, Any]) -> str:
+    kind = insight["type"]
+    if kind == "aggregate":
+        return (
+            f"{insight['column']}: mean {_format(insight['mean'])}, std {_format(insight['std'])}, "
+            f"range {_format(insight['min'])} to {_format(insight['max'])} "
+            f"over {insight['count']} values ({insight['missing']} missing)"
+        )
+    if kind == "trend":
+        return f"{insight['column']} is {insight['direction']} by {_format(insight['slope_per_row'])} per row (r = {insight['r']:.2f})"
+    if kind == "anomaly":
+        return (
+            f"{insight['column']}: {insight['count']} values beyond {insight['z_threshold']:g} standard deviations "
+            f"({insight['rate']:.1%})"
+        )
+    if kind == "correlation":
+        first, second = insight["columns"]
+        return f"{first} and {second} are correlated (r = {insight['r']:.2f}, n = {insight['count']})"
+    return str(insight)
+
+def render_report(analysis: Dict[str, Any], format_type: str = "markdown", title: str = "Insight Report") -> Dict[str, Any]:
+    # The agent's report_generation tool: an analysis as returned by
+    # analyze_data, rendered with one section per insight type
+    if format_type != "markdown":
+        raise ValueError(f"Unsupported report format: {format_type}")
+    insights = analysis.get("insights", [])
+    lines = [f"# {title}", "", f"Confidence: {analysis.get('confidence', 0.0):.2f}"]
+    for kind, heading in REPORT_SECTIONS.items():
+        matching = [insight for insight in insights if insight.get("type") == kind]
+        if matching:
+            lines += ["", f"## {heading}", ""]
+            lines += [f"- {_describe(insight)}" for insight in matching]
+    if not insights:
+        lines += ["", "No insights were found."]
+    return {
+        "content": "\n".join(lines) + "\n",
+        "format": format_type,
+        "metadata": {"insight_count": len(insights)}
+    }
\ No newline at end of file
@@ -1,33 +1,174 @@
-from pydantic import BaseSettings
-from typing import Optional
+from pydantic import BaseSettings, validator
+from typing import Any, Dict, Optional
 
 class AtlasConfig(BaseSettings):
     # Core LLM Settings
     DEFAULT_MODEL: str = "mixtral-8x7b"
     CONTEXT_WINDOW: int = 128000
     MODEL_TEMPERATURE: float = 0.7
+    MAX_NEW_TOKENS: int = 512
+    PROMPT_TOKEN_BUDGET: int = 8192  # Capped at CONTEXT_WINDOW - MAX_NEW_TOKENS
+    INFERENCE_MAX_BATCH_SIZE: int = 8  # Prompts generated together in one batch
+    INFERENCE_MAX_WAIT_MS: float = 10.0  # How long a prompt waits for batch-mates
+    PREFIX_CACHE_ENABLED: bool = True  # Reuse attention state for shared persona/domain preambles
+    PREFIX_CACHE_MAX_MB: int = 512
+    INFERENCE_MODE: str = "local"  # local (model in every worker) or sidecar (one shared model process)
+    INFERENCE_SIDECAR_URL: str = "http://127.0.0.1:8100"
+    INFERENCE_SIDECAR_TIMEOUT: float = 300.0
     
     # Service Endpoints
+    VECTOR_STORE_BACKEND: str = "milvus"  # milvus, local
+    LOCAL_STORE_PATH: str = ".atlas/vectors"  # Data directory for the local backend
+    LOCAL_STORE_MAX_OPEN_PARTITIONS: int = 256  # Tenant partitions kept open by the local backend
     VECTOR_DB_URL: str = "localhost"
     VECTOR_DB_PORT: int = 19530  # Default Milvus port
     WORKFLOW_ENGINE_URL: str = "localhost:7233"  # Default Temporal port
+    WORKFLOW_MAX_PARALLELISM: int = 8  # Concurrent activities per workflow run
+    WORKFLOW_RESULT_TTL_SECONDS: int = 3600  # Identical submissions reuse a completed run this recent
+    ACTIVITY_CACHE_TTL_SECONDS: int = 3600
+    ACTIVITY_CACHE_MAX_ENTRIES: int = 1024
+    ARTIFACT_STORE_PATH: str = ".atlas/artifacts"  # Columnar chunks passed between activities
+    ARTIFACT_CHUNK_ROWS: int = 65536
+    ARTIFACT_TTL_SECONDS: int = 86400  # Keep above ACTIVITY_CACHE_TTL_SECONDS, whose entries hold dataset references; 0 disables cleanup
+    
+    # Tool Settings
+    TOOL_MAX_WORKERS: int = 0  # Processes for CPU-bound tools; 0 = one per core
+    TOOL_TIMEOUT_SECONDS: float = 30.0
+    TOOL_TIMEOUTS: Dict[str, float] = {}  # Per tool, e.g. {"data_analysis": 120}
+    TOOL_CACHE_SIZE: int = 1024  # Memoized tool results; 0 disables
+    
+    # Sentiment Settings
+    SENTIMENT_BACKEND: str = "lexicon"  # lexicon, local
+    SENTIMENT_MODEL: str = "distilbert-base-uncased-finetuned-sst-2-english"  # Used by the local backend; each tool worker loads it
+    SENTIMENT_BATCH_SIZE: int = 256
+    SENTIMENT_CACHE_SIZE: int = 100000  # Results kept by text hash in each tool worker; 0 disables
+    
+    # Analytics Settings
+    ANALYTICS_ANOMALY_Z_SCORE: float = 3.0
+    ANALYTICS_MIN_CORRELATION: float = 0.5  # Weaker correlations are not reported
+    ANALYTICS_MIN_TREND: float = 0.3  # Minimum |r| against row order for a trend
     
     # Memory Settings
     MEMORY_DECAY_FACTOR: float = 0.95
     MAX_MEMORY_AGE_DAYS: int = 30
     MEMORY_COLLECTION_NAME: str = "atlas_memories"
+    MEMORY_COLLECTION_IDLE_SECONDS: int = 600  # Release loaded collections after this idle time
+    MEMORY_IO_CONCURRENCY: int = 8  # Max concurrent blocking vector store calls
+    MEMORY_WRITE_BEHIND: bool = True  # Buffer inserts and flush them in batches
+    MEMORY_INGEST_BATCH_SIZE: int = 64
+    MEMORY_INGEST_FLUSH_SECONDS: float = 1.0
+    MEMORY_INGEST_QUEUE_SIZE: int = 1024  # store_memory waits when this many records are pending
+    MEMORY_INGEST_SPILL_PATH: Optional[str] = ".atlas/memory_spill.jsonl"  # Unflushed records survive restarts; each process writes memory_spill.<pid>.jsonl
+    MEMORY_TIERED: bool = True  # Hot collection for recent memories, <name>_cold for compacted older ones
+    MEMORY_HOT_TIER_DAYS: float = 7.0
+    MEMORY_RETRIEVAL_OVERFETCH: int = 4  # Candidates per tier = k * this, re-ranked with decay
+    MEMORY_DEDUP_DISTANCE: float = 0.05  # Squared L2 under which memories are merged when demoted
+    MEMORY_COMPACTION_INTERVAL_SECONDS: float = 300.0
+    MEMORY_COMPACTION_BATCH_SIZE: int = 512
+    MEMORY_COMPACTION_MAX_BATCHES: int = 16  # Per tier and pass
+    MEMORY_NUM_PARTITIONS: int = 64  # Milvus partition-key buckets for per-tenant memories
+    MEMORY_INDEX_TYPE: str = "IVF_FLAT"  # FLAT, IVF_FLAT, IVF_SQ8, IVF_PQ, HNSW (local backend: the first three)
+    MEMORY_INDEX_PARAMS: Dict[str, Any] = {"nlist": 1024}  # e.g. {"M": 16, "efConstruction": 200} for HNSW
+    MEMORY_SEARCH_PARAMS: Dict[str, Any] = {"nprobe": 10}  # e.g. {"ef": 64} for HNSW
+    
+    # Embedding Settings
+    EMBEDDING_BACKEND: str = "hashing"  # hashing, local
+    EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"  # Used by the local backend
+    EMBEDDING_DIM: int = 1536  # Must match the collection schema and the local model (all-MiniLM-L6-v2 needs 384)
+    EMBEDDING_BATCH_SIZE: int = 32
+    EMBEDDING_BATCH_WAIT_MS: float = 5.0
+    EMBEDDING_CACHE_SIZE: int = 10000
+    EMBEDDING_CACHE_PATH: Optional[str] = None  # SQLite file for a persistent embedding cache
+    
+    # Semantic Cache Settings
+    SEMANTIC_CACHE_ENABLED: bool = True
+    SEMANTIC_CACHE_THRESHOLD: float = 0.95  # Minimum cosine similarity for a cache hit
+    SEMANTIC_CACHE_TTL_SECONDS: int = 3600
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 1024
     
     # API Settings
     API_HOST: str = "0.0.0.0"
     API_PORT: int = 8000
     API_WORKERS: int = 4
+    QUERY_BATCH_MAX_SIZE: int = 4096  # Queries accepted by one /query/batch call
     
     # Security Settings
-    API_KEY: Optional[str] = None
+    API_KEY: Optional[str] = None  # Single plain key, client "default"
+    API_KEYS: Dict[str, str] = {}  # Client name -> SHA-256 hex digest of its key (python -m atlas.services.auth <key>)
+    API_RATE_LIMIT_PER_SECOND: float = 20.0  # Per client; 0 disables
+    API_RATE_LIMIT_BURST: int = 40
+    API_MAX_CONCURRENT_REQUESTS: int = 8  # Per client; 0 disables
+    API_KEY_QUOTAS: Dict[str, Dict[str, float]] = {}  # e.g. {"etl": {"rate": 2, "burst": 10, "concurrency": 2}}
     ENABLE_SSL: bool = False
     SSL_CERT_PATH: Optional[str] = None
     SSL_KEY_PATH: Optional[str] = None
     
+    # Admission Settings
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_MAX_CONCURRENT: int = 16  # Queries in the agent at once, per API worker
+    ADMISSION_QUEUE_SIZE: int = 64  # Queries waiting for a slot; more are shed with 503
+    ADMISSION_PRIORITIES: Dict[str, int] = {}  # e.g. {"persona:analyst": 10, "domain:reporting": -5}; default 0
+    ADMISSION_DEADLINE_HEADER: str = "X-Request-Deadline"  # Absolute unix time in seconds
+    ADMISSION_DEFAULT_TIMEOUT_SECONDS: Optional[float] = 60.0  # Deadline without the header, and cap on it
+    
+    # Monitoring Settings
+    WORKFLOW_METRICS_PORT: Optional[int] = None  # /metrics of a standalone workflow worker
+    PROFILE_SLOW_REQUESTS: bool = False
+    PROFILE_BACKEND: str = "cprofile"  # cprofile, py-spy
+    PROFILE_SAMPLE_RATE: float = 0.01  # Share of requests profiled
+    PROFILE_SLOW_SECONDS: float = 2.0  # Profiles of faster requests are discarded
+    PROFILE_DIR: str = ".atlas/profiles"
+    PROFILE_MAX_FILES: int = 100
+    
+    @validator("INFERENCE_MODE")
+    def validate_inference_mode(cls, v: str) -> str:
+        if v not in ("local", "sidecar"):
+            raise ValueError(f"Unsupported inference mode: {v}")
+        return v
+    
+    @validator("VECTOR_STORE_BACKEND")
+    def validate_vector_store_backend(cls, v: str) -> str:
+        if v not in ("milvus", "local"):
+            raise ValueError(f"Unsupported vector store backend: {v}")
+        return v
+    
+    @validator("MEMORY_INDEX_TYPE")
+    def validate_memory_index_type(cls, v: str) -> str:
+        if v not in ("FLAT", "IVF_FLAT", "IVF_SQ8", "IVF_PQ", "HNSW"):
+            raise ValueError(f"Unsupported memory index type: {v}")
+        return v
+    
+    @validator("API_KEYS")
+    def validate_api_keys(cls, v: Dict[str, str]) -> Dict[str, str]:
+        for name, digest in v.items():
+            if len(digest) != 64 or any(c not in "0123456789abcdefABCDEF" for c in digest):
+                raise ValueError(f"API key digest for {name} is not a SHA-256 hex digest")
+        return v
+    
+    @validator("PROFILE_BACKEND")
+    def validate_profile_backend(cls, v: str) -> str:
+        if v not in ("cprofile", "py-spy"):
+            raise ValueError(f"Unsupported profiler backend: {v}")
+        return v
+    
+    @validator("EMBEDDING_BACKEND")
+    def validate_embedding_backend(cls, v: str) -> str:
+        if v not in ("hashing", "local"):
+            raise ValueError(f"Unsupported embedding backend: {v}")
+        return v
+    
+    @validator("SENTIMENT_BACKEND")
+    def validate_sentiment_backend(cls, v: str) -> str:
+        if v not in ("lexicon", "local"):
+            raise ValueError(f"Unsupported sentiment backend: {v}")
+        return v
+    
+    @validator("EMBEDDING_DIM")
+    def validate_embedding_dim(cls, v: int) -> int:
+        if v <= 0 or v > 32768:
+            raise ValueError(f"EMBEDDING_DIM must be between 1 and 32768, got {v}")
+        return v
+    
     class Config:
         env_prefix = "ATLAS_"
         case_sensitive = False
\ No newline at end of file
@@ -0,0 +1,19 @@
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+class DeadlineExceeded(Exception):
+    pass
+
+# Absolute unix time by which the current request must be answered. Set by
+# the API per request; tasks started from the request (the coalesced run,
+# scheduler calls) inherit it.
+request_deadline: ContextVar[Optional[float]] = ContextVar("atlas_request_deadline", default=None)
+
+def deadline_passed(deadline: Optional[float], now: Optional[float] = None) -> bool:
+    return deadline is not None and (time.time() if now is None else now) >= deadline
+
+def check_deadline(stage: str) -> None:
+    # Work past this point would be wasted on a client that stopped waiting
+    if deadline_passed(request_deadline.get()):
+        raise DeadlineExceeded(f"Request deadline passed before {stage}")
\ No newline at end of file
@@ -0,0 +1,190 @@
+import functools
+from typing import Any, Callable, Dict, List, Optional
+from loguru import logger
+
+from .config import AtlasConfig
+from .kv_cache import PrefixKVCache, as_model_cache
+from .prompt import PreparedPrompt
+from .scheduler import GenerationOutput, TokenFn
+
+# transformers and torch are imported where they are used, so processes that
+# never run the model (API workers in sidecar mode, /health) start quickly
+
+def load_model(config: AtlasConfig) -> Any:
+    from transformers import AutoModelForCausalLM
+    return AutoModelForCausalLM.from_pretrained(
+        config.DEFAULT_MODEL,
+        trust_remote_code=True
+    )
+
+def load_tokenizer(config: AtlasConfig) -> Any:
+    from transformers import AutoTokenizer
+    return AutoTokenizer.from_pretrained(
+        config.DEFAULT_MODEL,
+        trust_remote_code=True
+    )
+
+def _remap_token(on_token: TokenFn, rows: List[int], index: int, text: str) -> None:
+    on_token(rows[index], text)
+
+class ModelGenerator:
+    # Runs batched generation for the InferenceScheduler, either inside the
+    # API worker or in the inference sidecar that serves every worker
+    def __init__(self, config: AtlasConfig, llm: Any, tokenizer: Any):
+        self.config = config
+        self.llm = llm
+        self.tokenizer = tokenizer
+        self.prefix_cache: Optional[PrefixKVCache] = None
+        if config.PREFIX_CACHE_ENABLED:
+            self.prefix_cache = PrefixKVCache(max_bytes=config.PREFIX_CACHE_MAX_MB * 1024 * 1024)
+            logger.info(f"Prefix KV cache initialized with {config.PREFIX_CACHE_MAX_MB}MB")
+    
+    def generate_batch(
+        self,
+        prompts: List[Any],
+        max_new_tokens: int,
+        should_stop: Callable[[], bool],
+        on_token: Optional[TokenFn] = None
+    ) -> List[GenerationOutput]:
+        # Runs on the scheduler's executor thread. Prompts sharing a cached
+        # prefix are generated together so they can resume from its state.
+        groups: Dict[Optional[str], List[int]] = {}
+        for index, prompt in enumerate(prompts):
+            key = getattr(prompt, "prefix_key", None) if self.prefix_cache else None
+            groups.setdefault(key, []).append(index)
+        
+        outputs: List[Optional[GenerationOutput]] = [None] * len(prompts)
+        for key, rows in groups.items():
+            # Tokens are reported by index within the group; map them back
+            group_on_token = functools.partial(_remap_token, on_token, rows) if on_token else None
+            group = self._generate_group(
+                [prompts[index] for index in rows],
+                key,
+                max_new_tokens,
+                should_stop,
+                group_on_token
+            )
+            for index, output in zip(rows, group):
+                outputs[index] = output
+        return outputs
+    
+    def _generate_group(
+        self,
+        prompts: List[Any],
+        prefix_key: Optional[str],
+        max_new_tokens: int,
+        should_stop: Callable[[], bool],
+        on_token: Optional[TokenFn] = None
+    ) -> List[GenerationOutput]:
+        import torch
+        from transformers import StoppingCriteria, StoppingCriteriaList
+        from transformers.generation.streamers import BaseStreamer
+        
+        tokenizer = self.tokenizer
+        
+        class StopWhenAbandoned(StoppingCriteria):
+            def __call__(self, input_ids: Any, scores: Any, **kwargs: Any) -> bool:
+                return should_stop()
+        
+        class BatchTokenStreamer(BaseStreamer):
+            # Decodes each row incrementally and forwards only the new text
+            def __init__(self, batch_size: int):
+                self.tokens: List[List[int]] = [[] for _ in range(batch_size)]
+                self.sent = [0] * batch_size
+                self.prompt_seen = False
+            
+            def put(self, value: Any) -> None:
+                if not self.prompt_seen:
+                    # generate() first passes the prompt ids
+                    self.prompt_seen = True
+                    return
+                for index, token in enumerate(value.reshape(len(self.tokens), -1)[:, -1].tolist()):
+                    if token in (tokenizer.pad_token_id, tokenizer.eos_token_id):
+                        continue
+                    self.tokens[index].append(token)
+                    text = tokenizer.decode(self.tokens[index], skip_special_tokens=True)
+                    if len(text) > self.sent[index]:
+                        on_token(index, text[self.sent[index]:])
+                        self.sent[index] = len(text)
+            
+            def end(self) -> None:
+                pass
+        
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        with torch.inference_mode():
+            if prefix_key is not None:
+                inputs = self._encode_with_prefix(prompts, prefix_key)
+            else:
+                self.tokenizer.padding_side = "left"
+                inputs = self.tokenizer(
+                    [getattr(prompt, "text", prompt) for prompt in prompts],
+                    return_tensors="pt",
+                    padding=True
+                )
+            generated = self.llm.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens,
+                do_sample=self.config.MODEL_TEMPERATURE > 0,
+                temperature=self.config.MODEL_TEMPERATURE or None,
+                pad_token_id=self.tokenizer.pad_token_id,
+                stopping_criteria=StoppingCriteriaList([StopWhenAbandoned()]),
+                output_scores=True,
+                return_dict_in_generate=True,
+                streamer=BatchTokenStreamer(len(prompts)) if on_token else None
+            )
+            # Confidence = mean probability of the generated tokens
+            token_scores = self.llm.compute_transition_scores(
+                generated.sequences, generated.scores, normalize_logits=True
+            )
+        new_tokens = generated.sequences[:, inputs["input_ids"].shape[1]:]
+        outputs = []
+        for tokens, scores in zip(new_tokens, token_scores):
+            mask = tokens != self.tokenizer.pad_token_id
+            num_tokens = int(mask.sum())
+            confidence = float(scores[mask].exp().mean()) if num_tokens else 0.0
+            outputs.append(GenerationOutput(
+                text=self.tokenizer.decode(tokens, skip_special_tokens=True).strip(),
+                num_tokens=num_tokens,
+                confidence=confidence
+            ))
+        return outputs
+    
+    def _encode_with_prefix(self, prompts: List[PreparedPrompt], prefix_key: str) -> Dict[str, Any]:
+        # Rows are laid out as [prefix][padding][body]: the prefix stays at
+        # positions 0..n-1 so its cached state is valid for every row, and the
+        # masked padding keeps position ids contiguous into the body
+        import torch
+        
+        def compute_prefix() -> Any:
+            prefix_ids = self.tokenizer(prompts[0].prefix, return_tensors="pt")["input_ids"]
+            past_key_values = self.llm(input_ids=prefix_ids, use_cache=True).past_key_values
+            return past_key_values, prefix_ids[0].tolist()
+        
+        entry = self.prefix_cache.get_or_compute(prefix_key, compute_prefix)
+        bodies = self.tokenizer(
+            [prompt.body for prompt in prompts],
+            add_special_tokens=False
+        )["input_ids"]
+        width = max(len(body) for body in bodies)
+        input_ids = []
+        attention_mask = []
+        for body in bodies:
+            padding = width - len(body)
+            input_ids.append(entry.input_ids + [self.tokenizer.pad_token_id] * padding + body)
+            attention_mask.append([1] * entry.num_tokens + [0] * padding + [1] * len(body))
+        batch_size = len(prompts)
+        layers = tuple(
+            (keys.expand(batch_size, -1, -1, -1), values.expand(batch_size, -1, -1, -1))
+            for keys, values in entry.layers
+        )
+        return {
+            "input_ids": torch.tensor(input_ids),
+            "attention_mask": torch.tensor(attention_mask),
+            "past_key_values": as_model_cache(layers)
+        }
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "prefix_cache": self.prefix_cache.stats() if self.prefix_cache else {}
+        }
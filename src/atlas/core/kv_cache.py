@@ -0,0 +1,118 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Attention state for a prompt prefix in the legacy layout: one (keys, values)
+# pair per layer, each shaped [batch, heads, seq_len, head_dim]
+Layers = Tuple[Tuple[Any, Any], ...]
+
+def to_layers(past_key_values: Any) -> Layers:
+    # Accepts both the tuple format (transformers < 4.36) and Cache objects
+    if isinstance(past_key_values, (tuple, list)):
+        return tuple((layer[0], layer[1]) for layer in past_key_values)
+    if hasattr(past_key_values, "layers"):
+        return tuple((layer.keys, layer.values) for layer in past_key_values.layers)
+    if hasattr(past_key_values, "key_cache"):
+        return tuple(zip(past_key_values.key_cache, past_key_values.value_cache))
+    raise TypeError(f"Unsupported past_key_values type: {type(past_key_values).__name__}")
+
+def as_model_cache(layers: Layers) -> Any:
+    # Converts stored layers back into whatever generate() expects
+    try:
+        from transformers import DynamicCache
+    except ImportError:
+        return layers
+    if hasattr(DynamicCache, "from_legacy_cache"):
+        return DynamicCache.from_legacy_cache(layers)
+    return DynamicCache(layers)
+
+def layers_nbytes(layers: Layers) -> int:
+    return sum(int(keys.nbytes) + int(values.nbytes) for keys, values in layers)
+
+class PrefixEntry:
+    def __init__(self, layers: Layers, input_ids: list, nbytes: int):
+        self.layers = layers
+        self.input_ids = input_ids
+        self.nbytes = nbytes
+        self.hits = 0
+    
+    @property
+    def num_tokens(self) -> int:
+        return len(self.input_ids)
+
+class PrefixKVCache:
+    # Keeps the key/value state computed for shared prompt prefixes (the
+    # persona/domain preamble) so prefill only runs over the per-request body.
+    # Keys are the prompt builder's persona/domain/template hash. Entries are
+    # evicted least recently used once their tensors exceed max_bytes; an
+    # entry larger than the whole budget is never stored. Cached tensors are
+    # treated as read-only: callers expand them per batch and generate()
+    # concatenates new state instead of writing in place.
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, PrefixEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.tokens_reused = 0
+    
+    def get(self, key: str) -> Optional[PrefixEntry]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            entry.hits += 1
+            self.hits += 1
+            self.tokens_reused += entry.num_tokens
+            return entry
+    
+    def put(self, key: str, past_key_values: Any, input_ids: list) -> PrefixEntry:
+        layers = to_layers(past_key_values)
+        entry = PrefixEntry(layers, list(input_ids), layers_nbytes(layers))
+        if entry.nbytes > self.max_bytes:
+            return entry
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous.nbytes
+            self._entries[key] = entry
+            self.bytes += entry.nbytes
+            while self.bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self.bytes -= evicted.nbytes
+                self.evictions += 1
+        return entry
+    
+    def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Tuple[Any, list]]
+    ) -> PrefixEntry:
+        # compute() -> (past_key_values, input_ids) for the prefix
+        entry = self.get(key)
+        if entry is None:
+            past_key_values, input_ids = compute()
+            entry = self.put(key, past_key_values, input_ids)
+        return entry
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "evictions": self.evictions,
+            "prefill_tokens_reused": self.tokens_reused
+        }
@@ -0,0 +1,263 @@
+import asyncio
+import cProfile
+import functools
+import math
+import os
+import random
+import re
+import shutil
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Set, Tuple, TypeVar
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from loguru import logger
+
+T = TypeVar("T")
+
+# From embedding cache hits (~1ms) to long generations and workflow activities
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+STAGE_SECONDS = Histogram(
+    "atlas_stage_duration_seconds",
+    "Time spent in one stage of query processing, memory access or workflow activities",
+    ["component", "stage"],
+    buckets=LATENCY_BUCKETS
+)
+STAGE_IN_FLIGHT = Gauge(
+    "atlas_stage_in_flight",
+    "Calls currently inside a stage",
+    ["component", "stage"],
+    multiprocess_mode="livesum"
+)
+STAGE_ERRORS = Counter(
+    "atlas_stage_errors_total",
+    "Stage calls that raised",
+    ["component", "stage"]
+)
+SLOW_REQUEST_PROFILES = Counter(
+    "atlas_slow_request_profiles_total",
+    "Profiles kept for slow requests",
+    ["backend"]
+)
+
+class Stage:
+    # Label children are resolved once per (component, stage), so timing a
+    # call costs a gauge inc/dec, two perf_counter reads and one observe
+    __slots__ = ("seconds", "in_flight", "errors")
+    
+    def __init__(self, component: str, name: str):
+        self.seconds = STAGE_SECONDS.labels(component=component, stage=name)
+        self.in_flight = STAGE_IN_FLIGHT.labels(component=component, stage=name)
+        self.errors = STAGE_ERRORS.labels(component=component, stage=name)
+
+class StageTimer:
+    __slots__ = ("stage", "start")
+    
+    def __init__(self, stage: Stage):
+        self.stage = stage
+        self.start = 0.0
+    
+    def __enter__(self) -> "StageTimer":
+        self.stage.in_flight.inc()
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> bool:
+        self.stage.seconds.observe(time.perf_counter() - self.start)
+        self.stage.in_flight.dec()
+        # Cancellation (a client going away) is not an error
+        if exc_type is not None and issubclass(exc_type, Exception):
+            self.stage.errors.inc()
+        return False
+
+_stages: Dict[Tuple[str, str], Stage] = {}
+
+def stage(component: str, name: str) -> StageTimer:
+    # with stage("agent", "retrieve"): ... -- also around awaits
+    found = _stages.get((component, name))
+    if found is None:
+        found = _stages.setdefault((component, name), Stage(component, name))
+    return StageTimer(found)
+
+def instrumented(component: str, name: Optional[str] = None) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    # Times every call of an async function as one stage (default: its name)
+    def decorator(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        stage_name = name or fn.__name__
+        
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            with stage(component, stage_name):
+                return await fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def _metric_name(*parts: Any) -> str:
+    return re.sub(r"[^a-zA-Z0-9_]+", "_", "_".join(str(part) for part in parts)).strip("_")
+
+class StatsCollector:
+    # Publishes the components' stats() dicts as gauges at scrape time, so the
+    # counters they already keep need no second set of Prometheus metrics:
+    # "agent" -> {"semantic_cache": {"hits": 3}} becomes
+    # atlas_agent_semantic_cache_hits 3. Numbers and booleans only.
+    def __init__(self):
+        self._sources: Dict[str, Callable[[], Dict[str, Any]]] = {}
+    
+    def register(self, name: str, stats: Callable[[], Dict[str, Any]]) -> None:
+        self._sources[name] = stats
+    
+    def unregister(self, name: str) -> None:
+        self._sources.pop(name, None)
+    
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        seen: Set[str] = set()
+        for name, stats in list(self._sources.items()):
+            try:
+                values = stats()
+            except Exception as e:
+                logger.warning(f"Failed to collect {name} stats: {str(e)}")
+                continue
+            for metric, value in self._flatten(_metric_name("atlas", name), values):
+                if metric in seen:
+                    continue
+                seen.add(metric)
+                yield GaugeMetricFamily(metric, f"{name} stats()", value=value)
+    
+    def _flatten(self, prefix: str, values: Any) -> Iterator[Tuple[str, float]]:
+        if isinstance(values, dict):
+            for key, value in values.items():
+                yield from self._flatten(_metric_name(prefix, key), value)
+        elif isinstance(values, (bool, int, float)) and math.isfinite(values):
+            yield prefix, float(values)
+
+stats_collector = StatsCollector()
+REGISTRY.register(stats_collector)
+
+def render_metrics() -> Tuple[bytes, str]:
+    # Prometheus text exposition. With PROMETHEUS_MULTIPROC_DIR set (needed
+    # for API_WORKERS > 1) the histograms, gauges and counters of every worker
+    # are aggregated; the stats() gauges are those of the answering worker.
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(stats_collector)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+class SlowRequestProfiler:
+    # Profiles a sample of requests and keeps the profiles of slow ones in
+    # directory, newest max_files only.
+    # cprofile: the sampled request runs under cProfile and the stats are
+    #   written as <ms>-<label>.prof (pstats format) if it took longer than
+    #   slow_seconds. cProfile sees the whole event loop thread, so requests
+    #   interleaved with the sampled one show up too; one runs at a time.
+    # py-spy: if the sampled request is still running after slow_seconds,
+    #   `py-spy dump` records every thread's stack as <ms>-<label>.txt.
+    #   Needs the py-spy binary and permission to ptrace this process.
+    def __init__(
+        self,
+        directory: str,
+        slow_seconds: float = 2.0,
+        sample_rate: float = 0.01,
+        backend: str = "cprofile",
+        max_files: int = 100
+    ):
+        if backend not in ("cprofile", "py-spy"):
+            raise ValueError(f"Unsupported profiler backend: {backend}")
+        self.directory = directory
+        self.slow_seconds = slow_seconds
+        self.sample_rate = sample_rate
+        self.backend = backend
+        self.max_files = max_files
+        self._py_spy = shutil.which("py-spy") if backend == "py-spy" else None
+        if backend == "py-spy" and self._py_spy is None:
+            logger.warning("py-spy not found; slow requests will not be profiled")
+        self._active = False
+        self._dumps: Set[asyncio.Task] = set()
+        self.sampled = 0
+        self.kept = 0
+        self.failures = 0
+    
+    async def run(self, label: str, call: Callable[[], Awaitable[T]]) -> T:
+        if random.random() >= self.sample_rate:
+            return await call()
+        if self.backend == "py-spy":
+            return await self._run_py_spy(label, call)
+        return await self._run_cprofile(label, call)
+    
+    async def _run_cprofile(self, label: str, call: Callable[[], Awaitable[T]]) -> T:
+        if self._active:
+            return await call()
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler is already attached to this thread
+            return await call()
+        self._active = True
+        self.sampled += 1
+        start = time.perf_counter()
+        try:
+            return await call()
+        finally:
+            profile.disable()
+            self._active = False
+            if time.perf_counter() - start >= self.slow_seconds:
+                self._keep(label, "prof", profile.dump_stats)
+    
+    async def _run_py_spy(self, label: str, call: Callable[[], Awaitable[T]]) -> T:
+        if self._py_spy is None:
+            return await call()
+        self.sampled += 1
+        loop = asyncio.get_running_loop()
+        timer = loop.call_later(self.slow_seconds, self._start_dump, label)
+        try:
+            return await call()
+        finally:
+            timer.cancel()
+    
+    def _start_dump(self, label: str) -> None:
+        task = asyncio.ensure_future(self._dump(label))
+        self._dumps.add(task)
+        task.add_done_callback(self._dumps.discard)
+    
+    async def _dump(self, label: str) -> None:
+        try:
+            process = await asyncio.create_subprocess_exec(
+                self._py_spy, "dump", "--pid", str(os.getpid()),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            output, error = await process.communicate()
+            if process.returncode:
+                raise RuntimeError(error.decode(errors="replace").strip())
+            
+            def write(path: str) -> None:
+                with open(path, "wb") as f:
+                    f.write(output)
+            self._keep(label, "txt", write)
+        except Exception as e:
+            self.failures += 1
+            logger.warning(f"py-spy dump failed: {str(e)}")
+    
+    def _keep(self, label: str, extension: str, write: Callable[[str], None]) -> None:
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(self.directory, f"{int(time.time() * 1000)}-{_metric_name(label) or 'root'}.{extension}")
+            write(path)
+            self.kept += 1
+            SLOW_REQUEST_PROFILES.labels(backend=self.backend).inc()
+            logger.info(f"Kept slow request profile {path}")
+            profiles = sorted(os.listdir(self.directory))
+            for name in profiles[:max(0, len(profiles) - self.max_files)]:
+                os.remove(os.path.join(self.directory, name))
+        except OSError as e:
+            self.failures += 1
+            logger.warning(f"Failed to keep slow request profile: {str(e)}")
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sampled": self.sampled,
+            "kept": self.kept,
+            "failures": self.failures
+        }
\ No newline at end of file
@@ -0,0 +1,198 @@
+import hashlib
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from pydantic import BaseModel
+
+SYSTEM_PROMPT = (
+    "You are Atlas, an AI analyst that generates accurate, well-sourced insights. "
+    "Use the context below when it is relevant and say so when it is not sufficient."
+)
+
+class PreparedPrompt(BaseModel):
+    prefix: str  # System preamble shared by every request with the same persona/domain
+    prefix_key: Optional[str] = None  # persona/domain/template hash, keys the prefix KV cache
+    body: str  # Retrieved context and the user query
+    prompt_tokens: int = 0
+    prefix_tokens: int = 0
+    memory_tokens: int = 0
+    memories_used: int = 0
+    memories_dropped: int = 0
+    tokens_saved: int = 0  # Tokens of retrieved memories left out to stay within budget
+    sources: List[Dict[str, Any]] = []
+    
+    @property
+    def text(self) -> str:
+        return self.prefix + self.body
+
+class PromptBuilder:
+    # Assembles prompts within a token budget: memories are ranked by
+    # relevance x recency (MEMORY_DECAY_FACTOR ** age in days) and packed until
+    # the budget is used. Token counts come from the model tokenizer; persona
+    # prefixes and memory snippets are counted once and cached.
+    def __init__(
+        self,
+        tokenizer: Any,
+        token_budget: int,
+        decay_factor: float = 0.95,
+        cache_size: int = 4096
+    ):
+        self.tokenizer = tokenizer
+        self.token_budget = token_budget
+        self.decay_factor = decay_factor
+        self.cache_size = cache_size
+        self._prefixes: "OrderedDict[Tuple[Optional[str], Optional[str]], Tuple[str, int, str]]" = OrderedDict()
+        self._token_counts: "OrderedDict[str, int]" = OrderedDict()
+        self.prompts_built = 0
+        self.prompt_tokens_total = 0
+        self.tokens_saved_total = 0
+    
+    def build(
+        self,
+        query: str,
+        memories: List[Dict[str, Any]],
+        persona: Optional[str] = None,
+        domain: Optional[str] = None
+    ) -> PreparedPrompt:
+        prefix, prefix_tokens, prefix_key = self._prefix(persona, domain)
+        question = f"\nQuestion: {query}\nAnswer:"
+        question_tokens = self.count_tokens(question)
+        remaining = self.token_budget - prefix_tokens - question_tokens
+        
+        snippets = [self._format_memory(memory) for memory in memories]
+        snippet_tokens = self.count_tokens_many(snippets)
+        order = np.argsort(-self.score(memories), kind="stable") if memories else []
+        
+        header = "\nRelevant context:\n"
+        header_tokens = self.count_tokens(header)
+        used: List[int] = []
+        memory_tokens = 0
+        for index in order:
+            cost = snippet_tokens[index] + (0 if used else header_tokens)
+            if memory_tokens + cost > remaining:
+                continue
+            used.append(int(index))
+            memory_tokens += cost
+        
+        body = ""
+        if used:
+            body = header + "".join(snippets[index] for index in used)
+        body += question
+        
+        used_set = set(used)
+        dropped = [index for index in range(len(memories)) if index not in used_set]
+        prompt = PreparedPrompt(
+            prefix=prefix,
+            prefix_key=prefix_key,
+            body=body,
+            prompt_tokens=prefix_tokens + memory_tokens + question_tokens,
+            prefix_tokens=prefix_tokens,
+            memory_tokens=memory_tokens,
+            memories_used=len(used),
+            memories_dropped=len(dropped),
+            tokens_saved=sum(snippet_tokens[index] for index in dropped),
+            sources=[self._source(memories[index]) for index in used]
+        )
+        self.prompts_built += 1
+        self.prompt_tokens_total += prompt.prompt_tokens
+        self.tokens_saved_total += prompt.tokens_saved
+        return prompt
+    
+    def score(self, memories: List[Dict[str, Any]]) -> np.ndarray:
+        # L2 distance between unit vectors is 2 - 2*cos, so 1 - d/2 maps it back
+        distances = np.array(
+            [memory.get("similarity", 0.0) or 0.0 for memory in memories],
+            dtype=np.float64
+        )
+        relevance = np.clip(1.0 - distances / 2.0, 0.0, 1.0)
+        now = time.time()
+        ages = np.array([self._age_days(memory.get("timestamp"), now) for memory in memories])
+        return relevance * np.power(self.decay_factor, ages)
+    
+    def count_tokens(self, text: str) -> int:
+        return self.count_tokens_many([text])[0]
+    
+    def count_tokens_many(self, texts: List[str]) -> List[int]:
+        keys = [hashlib.sha1(text.encode()).hexdigest() for text in texts]
+        counts: Dict[str, int] = {}
+        missing = []
+        for key, text in zip(keys, texts):
+            if key in self._token_counts:
+                self._token_counts.move_to_end(key)
+                counts[key] = self._token_counts[key]
+            else:
+                missing.append((key, text))
+        if missing:
+            encoded = self.tokenizer(
+                [text for _, text in missing],
+                add_special_tokens=False
+            )["input_ids"]
+            for (key, _), ids in zip(missing, encoded):
+                counts[key] = len(ids)
+                self._remember(self._token_counts, key, len(ids))
+        return [counts[key] for key in keys]
+    
+    def _prefix(self, persona: Optional[str], domain: Optional[str]) -> Tuple[str, int, str]:
+        key = (persona, domain)
+        cached = self._prefixes.get(key)
+        if cached is None:
+            lines = [SYSTEM_PROMPT]
+            if persona:
+                lines.append(f"Persona: respond as a {persona.replace('_', ' ')}.")
+            if domain:
+                lines.append(f"Domain: {domain}.")
+            text = "\n".join(lines) + "\n"
+            template_hash = hashlib.sha1(text.encode()).hexdigest()[:16]
+            cached = (text, self.count_tokens(text), f"{persona or ''}/{domain or ''}/{template_hash}")
+            self._remember(self._prefixes, key, cached)
+        else:
+            self._prefixes.move_to_end(key)
+        return cached
+    
+    def _remember(self, cache: OrderedDict, key: Any, value: Any) -> None:
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self.cache_size:
+            cache.popitem(last=False)
+    
+    @staticmethod
+    def _format_memory(memory: Dict[str, Any]) -> str:
+        text = f"- {memory.get('text', '')}"
+        response = (memory.get("metadata") or {}).get("response")
+        if response:
+            text += f"\n  Answer given: {response}"
+        return text + "\n"
+    
+    @staticmethod
+    def _age_days(timestamp: Any, now: float) -> float:
+        if isinstance(timestamp, str):
+            try:
+                timestamp = datetime.fromisoformat(timestamp)
+            except ValueError:
+                return 0.0
+        if isinstance(timestamp, datetime):
+            timestamp = timestamp.timestamp()
+        if not isinstance(timestamp, (int, float)):
+            return 0.0
+        return max(0.0, (now - timestamp) / 86400)
+    
+    @staticmethod
+    def _source(memory: Dict[str, Any]) -> Dict[str, Any]:
+        timestamp = memory.get("timestamp")
+        return {
+            "text": memory.get("text"),
+            "timestamp": timestamp.isoformat() if isinstance(timestamp, datetime) else timestamp,
+            "similarity": memory.get("similarity")
+        }
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "prompts_built": self.prompts_built,
+            "prompt_tokens_total": self.prompt_tokens_total,
+            "tokens_saved_total": self.tokens_saved_total,
+            "avg_prompt_tokens": (
+                self.prompt_tokens_total / self.prompts_built if self.prompts_built else 0.0
+            )
+        }
@@ -0,0 +1,228 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Union
+from pydantic import BaseModel
+from loguru import logger
+
+from .deadline import DeadlineExceeded, deadline_passed, request_deadline
+
+class GenerationOutput(BaseModel):
+    text: str
+    num_tokens: int = 0
+    confidence: float = 0.0
+    queue_wait_ms: float = 0.0
+    generation_ms: float = 0.0
+
+class GenerationRequest:
+    def __init__(
+        self,
+        prompt: Any,
+        max_new_tokens: int,
+        future: asyncio.Future,
+        tokens: Optional[asyncio.Queue] = None
+    ):
+        self.prompt = prompt
+        self.max_new_tokens = max_new_tokens
+        self.future = future
+        self.tokens = tokens
+        self.enqueued_at = time.monotonic()
+        self.deadline = request_deadline.get()
+    
+    @property
+    def cancelled(self) -> bool:
+        return self.future.done()
+
+# generate_batch(prompts, max_new_tokens, should_stop, on_token) -> one output
+# per prompt. Prompts are passed through untouched (a string, or a structured
+# prompt the backend understands). should_stop() turns True once every caller
+# in the batch has gone away, so a backend can end generation early.
+# on_token(index, text) forwards a decoded text delta for prompt `index`; it
+# is None when nobody is streaming.
+TokenFn = Callable[[int, str], None]
+BatchFn = Callable[
+    [List[Any], int, Callable[[], bool], Optional[TokenFn]],
+    List[GenerationOutput]
+]
+
+class InferenceScheduler:
+    # Queues prompts from every in-flight request and runs them as dynamic
+    # batches on a dedicated executor thread, so concurrent queries share a
+    # forward pass and the event loop never blocks on the model. A batch is
+    # dispatched once max_batch_size prompts are waiting or the oldest has
+    # waited max_wait seconds.
+    def __init__(
+        self,
+        generate_batch: BatchFn,
+        max_batch_size: int = 8,
+        max_wait: float = 0.01,
+        max_new_tokens: int = 512
+    ):
+        self.generate_batch = generate_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_new_tokens = max_new_tokens
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="atlas-inference")
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.requests = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.expired = 0
+        self.batches = 0
+        self.tokens_generated = 0
+        self.generation_seconds = 0.0
+        self.queue_wait_seconds = 0.0
+    
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+        logger.info("Inference scheduler started")
+    
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        while not self._queue.empty():
+            request = self._queue.get_nowait()
+            if not request.cancelled:
+                request.future.cancel()
+        self._executor.shutdown(wait=False)
+        logger.info("Inference scheduler stopped")
+    
+    async def generate(self, prompt: Any, max_new_tokens: Optional[int] = None) -> GenerationOutput:
+        await self.start()
+        future = asyncio.get_running_loop().create_future()
+        request = GenerationRequest(prompt, max_new_tokens or self.max_new_tokens, future)
+        self.requests += 1
+        await self._queue.put(request)
+        try:
+            return await future
+        except asyncio.CancelledError:
+            # Caller went away (e.g. the HTTP client disconnected); the batch
+            # loop skips the request or discards its result
+            self.cancelled += 1
+            raise
+    
+    async def stream(
+        self,
+        prompt: Any,
+        max_new_tokens: Optional[int] = None
+    ) -> AsyncIterator[Union[str, GenerationOutput]]:
+        # Yields text deltas as they are generated, then the final output
+        await self.start()
+        future = asyncio.get_running_loop().create_future()
+        tokens: asyncio.Queue = asyncio.Queue()
+        request = GenerationRequest(prompt, max_new_tokens or self.max_new_tokens, future, tokens)
+        self.requests += 1
+        await self._queue.put(request)
+        try:
+            while True:
+                next_token = asyncio.ensure_future(tokens.get())
+                await asyncio.wait({next_token, future}, return_when=asyncio.FIRST_COMPLETED)
+                if next_token.done():
+                    yield next_token.result()
+                    continue
+                next_token.cancel()
+                while not tokens.empty():
+                    yield tokens.get_nowait()
+                yield future.result()
+                return
+        finally:
+            if not future.done():
+                future.cancel()
+                self.cancelled += 1
+    
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # Requests whose deadline passed while queued are dropped here,
+            # before any tokens are spent on them
+            now = time.time()
+            for request in batch:
+                if not request.cancelled and deadline_passed(request.deadline, now):
+                    request.future.set_exception(DeadlineExceeded("Request deadline passed in the generation queue"))
+                    self.expired += 1
+            batch = [request for request in batch if not request.cancelled]
+            if batch:
+                await self._run_batch(batch)
+    
+    async def _run_batch(self, batch: List[GenerationRequest]) -> None:
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        waits = [started - request.enqueued_at for request in batch]
+        max_new_tokens = max(request.max_new_tokens for request in batch)
+        
+        def should_stop() -> bool:
+            return all(request.cancelled for request in batch)
+        
+        def on_token(index: int, text: str) -> None:
+            tokens = batch[index].tokens
+            if tokens is not None:
+                loop.call_soon_threadsafe(tokens.put_nowait, text)
+        
+        streaming = any(request.tokens is not None for request in batch)
+        try:
+            outputs = await loop.run_in_executor(
+                self._executor,
+                self.generate_batch,
+                [request.prompt for request in batch],
+                max_new_tokens,
+                should_stop,
+                on_token if streaming else None
+            )
+        except Exception as e:
+            logger.error(f"Generation batch of {len(batch)} failed: {str(e)}")
+            for request in batch:
+                if not request.cancelled:
+                    request.future.set_exception(e)
+            return
+        elapsed = time.monotonic() - started
+        self.batches += 1
+        self.generation_seconds += elapsed
+        for request, output, wait in zip(batch, outputs, waits):
+            self.tokens_generated += output.num_tokens
+            if request.cancelled:
+                continue
+            output.queue_wait_ms = wait * 1000
+            output.generation_ms = elapsed * 1000
+            request.future.set_result(output)
+            self.completed += 1
+            self.queue_wait_seconds += wait
+    
+    def stats(self) -> Dict[str, Any]:
+        completed = self.completed
+        return {
+            "requests": self.requests,
+            "completed": completed,
+            "cancelled": self.cancelled,
+            "expired": self.expired,
+            "batches": self.batches,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "avg_batch_size": completed / self.batches if self.batches else 0.0,
+            "tokens_generated": self.tokens_generated,
+            "tokens_per_second": (
+                self.tokens_generated / self.generation_seconds
+                if self.generation_seconds else 0.0
+            ),
+            "avg_queue_wait_ms": (
+                self.queue_wait_seconds / completed * 1000 if completed else 0.0
+            )
+        }
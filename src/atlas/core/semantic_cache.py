@@ -0,0 +1,162 @@
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import numpy as np
+from pydantic import BaseModel
+from loguru import logger
+
+PartitionKey = Tuple[Optional[str], Optional[str], Optional[str]]  # (user_id, persona, domain)
+
+# metadata["source"] of the agent's own question/answer memories
+INTERACTION_SOURCE = "interaction"
+
+class CacheEntry:
+    def __init__(self, partition: PartitionKey, embedding: np.ndarray, response: BaseModel, ttl: float):
+        self.partition = partition
+        self.embedding = embedding
+        self.response = response
+        self.expires_at = time.monotonic() + ttl
+
+class SemanticCache:
+    # Returns a stored response for a new query whose embedding is within
+    # `threshold` cosine similarity of an earlier query from the same user
+    # with the same persona and domain; answers are built from the user's own
+    # memories, so they are never served to another user. Entries expire
+    # after ttl seconds, the least recently used are evicted beyond
+    # max_entries, and storing a new memory for a user's domain drops that
+    # user's cached answers in the domain (every user's, for a memory with
+    # no user). The agent's own interaction records do not: every answered
+    # query writes one, which would otherwise clear the domain before a
+    # repeated question could be served.
+    def __init__(
+        self,
+        embed: Callable[[str], Awaitable[np.ndarray]],
+        threshold: float = 0.95,
+        ttl_seconds: float = 3600.0,
+        max_entries: int = 1024
+    ):
+        self.embed = embed
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._partitions: Dict[PartitionKey, Dict[str, CacheEntry]] = {}
+        self._matrices: Dict[PartitionKey, Tuple[list, np.ndarray]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    async def lookup(
+        self,
+        query: str,
+        persona: Optional[str],
+        domain: Optional[str],
+        user_id: Optional[str] = None
+    ) -> Optional[Tuple[BaseModel, float]]:
+        partition = (user_id, persona, domain)
+        entries = self._partitions.get(partition)
+        if not entries:
+            self.misses += 1
+            return None
+        query_embedding = self._normalize(await self.embed(query))
+        entry_ids, matrix = self._matrix(partition)
+        similarities = matrix @ query_embedding
+        now = time.monotonic()
+        for index in np.argsort(-similarities):
+            if similarities[index] < self.threshold:
+                break
+            entry_id = entry_ids[index]
+            entry = self._entries.get(entry_id)
+            if entry is None:
+                continue
+            if entry.expires_at <= now:
+                self._remove(entry_id)
+                continue
+            self._entries.move_to_end(entry_id)
+            self.hits += 1
+            return entry.response, float(similarities[index])
+        self.misses += 1
+        return None
+    
+    async def store(
+        self,
+        query: str,
+        persona: Optional[str],
+        domain: Optional[str],
+        response: BaseModel,
+        user_id: Optional[str] = None
+    ) -> None:
+        partition = (user_id, persona, domain)
+        entry_id = uuid.uuid4().hex
+        embedding = self._normalize(await self.embed(query))
+        entry = CacheEntry(partition, embedding, response, self.ttl_seconds)
+        self._entries[entry_id] = entry
+        self._partitions.setdefault(partition, {})[entry_id] = entry
+        self._matrices.pop(partition, None)
+        while len(self._entries) > self.max_entries:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+    
+    def invalidate_domain(self, domain: Optional[str], user_id: Optional[str] = None) -> int:
+        # user_id None drops the domain for every user
+        removed = 0
+        for partition in [
+            p for p in self._partitions
+            if p[2] == domain and (user_id is None or p[0] == user_id)
+        ]:
+            for entry_id in list(self._partitions[partition]):
+                self._remove(entry_id)
+                removed += 1
+        if removed:
+            self.invalidations += 1
+            logger.info(f"Invalidated {removed} cached responses for domain {domain}")
+        return removed
+    
+    def on_memory_stored(self, collection_name: str, metadata: Dict[str, Any]) -> None:
+        if metadata.get("source") == INTERACTION_SOURCE:
+            return
+        context = metadata.get("context") or {}
+        self.invalidate_domain(
+            context.get("domain", metadata.get("domain")),
+            context.get("user_id", metadata.get("user_id"))
+        )
+    
+    def _remove(self, entry_id: str) -> None:
+        entry = self._entries.pop(entry_id, None)
+        if entry is None:
+            return
+        partition = self._partitions.get(entry.partition, {})
+        partition.pop(entry_id, None)
+        if not partition:
+            self._partitions.pop(entry.partition, None)
+        self._matrices.pop(entry.partition, None)
+    
+    def _matrix(self, partition: PartitionKey) -> Tuple[list, np.ndarray]:
+        # Stacked embeddings per partition, rebuilt only after the partition changes
+        cached = self._matrices.get(partition)
+        if cached is None:
+            entries = self._partitions[partition]
+            entry_ids = list(entries)
+            matrix = np.stack([entries[entry_id].embedding for entry_id in entry_ids])
+            cached = (entry_ids, matrix)
+            self._matrices[partition] = cached
+        return cached
+    
+    @staticmethod
+    def _normalize(vector: np.ndarray) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
@@ -0,0 +1,267 @@
+import hashlib
+import itertools
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+import numpy as np
+from loguru import logger
+
+from .config import AtlasConfig
+
+# Scores are in [-1, 1]; the band between the thresholds is neutral
+POSITIVE_THRESHOLD = 0.05
+NEGATIVE_THRESHOLD = -0.05
+
+# Weights in [-4, 4], tuned for public service and civic feedback
+DEFAULT_LEXICON: Dict[str, float] = {
+    "good": 1.9, "great": 3.1, "excellent": 3.2, "amazing": 2.8, "love": 3.2,
+    "like": 1.5, "nice": 1.8, "helpful": 2.2, "friendly": 2.2, "clean": 1.7,
+    "safe": 1.9, "fast": 1.4, "quick": 1.3, "easy": 1.9, "reliable": 2.0,
+    "improved": 2.0, "better": 1.9, "best": 3.2, "thanks": 1.9, "thank": 1.5,
+    "happy": 2.7, "satisfied": 1.8, "efficient": 1.8, "responsive": 1.8, "fixed": 1.2,
+    "convenient": 1.8, "pleasant": 2.3, "beautiful": 2.9, "well": 1.1, "appreciate": 2.1,
+    "bad": -2.5, "poor": -2.1, "terrible": -3.1, "awful": -3.1, "horrible": -3.1,
+    "hate": -2.7, "slow": -1.4, "late": -1.2, "delayed": -1.5, "delay": -1.3,
+    "dirty": -1.9, "unsafe": -2.3, "dangerous": -2.5, "broken": -2.1, "rude": -2.0,
+    "crowded": -1.3, "noisy": -1.3, "worse": -2.1, "worst": -3.1, "problem": -1.7,
+    "complaint": -1.6, "unacceptable": -2.7, "useless": -2.4, "expensive": -1.2, "confusing": -1.7,
+    "ignored": -1.8, "angry": -2.3, "frustrated": -2.2, "frustrating": -2.2, "disappointed": -2.2,
+    "cancelled": -1.4, "closed": -0.6, "missing": -1.2, "litter": -1.5, "potholes": -1.7
+}
+NEGATORS = frozenset({
+    "not", "no", "never", "none", "nobody", "nothing", "neither", "nor", "without", "hardly",
+    "isn't", "aren't", "wasn't", "weren't", "don't", "doesn't", "didn't", "can't", "cannot",
+    "won't", "wouldn't", "shouldn't", "couldn't", "haven't", "hasn't"
+})
+NEGATION_SCALE = -0.74  # A negated word counts against its polarity, weaker
+NEGATION_WINDOW = 3  # "not very good": the negator reaches up to three words ahead
+NORMALIZATION_ALPHA = 15.0
+
+class SentimentResult(NamedTuple):
+    label: str  # positive, negative, neutral
+    score: float
+
+def label_scores(scores: np.ndarray) -> List[SentimentResult]:
+    labels = np.where(
+        scores >= POSITIVE_THRESHOLD,
+        "positive",
+        np.where(scores <= NEGATIVE_THRESHOLD, "negative", "neutral")
+    )
+    return [SentimentResult(str(label), float(score)) for label, score in zip(labels, scores)]
+
+class SentimentClassifier:
+    # Scores a batch of texts into a float32 array in [-1, 1]. Called from a
+    # worker thread or process, never on the event loop.
+    name: str = "base"
+    
+    def score_batch(self, texts: List[str]) -> np.ndarray:
+        raise NotImplementedError
+
+class LexiconClassifier(SentimentClassifier):
+    # Word weights summed per text, with negation, squashed into [-1, 1].
+    # Needs no model download, so it doubles as the test backend. Only the
+    # tokenization and the vocabulary lookup are per word in Python; the
+    # negation windows and the per-text sums run over the whole batch.
+    name = "lexicon"
+    
+    def __init__(self, lexicon: Optional[Dict[str, float]] = None):
+        lexicon = DEFAULT_LEXICON if lexicon is None else lexicon
+        # Id 0 is every word the lexicon does not know
+        words = sorted(set(lexicon) | NEGATORS)
+        self._ids = {word: index + 1 for index, word in enumerate(words)}
+        self._weights = np.zeros(len(words) + 1, dtype=np.float32)
+        self._negators = np.zeros(len(words) + 1, dtype=bool)
+        for word, index in self._ids.items():
+            self._weights[index] = lexicon.get(word, 0.0)
+            self._negators[index] = word in NEGATORS
+        self.name = f"lexicon-{hashlib.sha256(repr(sorted(lexicon.items())).encode()).hexdigest()[:12]}"
+        self._pattern = re.compile(r"[a-z]+(?:'[a-z]+)?")
+    
+    def score_batch(self, texts: List[str]) -> np.ndarray:
+        tokens = [self._pattern.findall(text.lower()) for text in texts]
+        lengths = np.fromiter((len(words) for words in tokens), dtype=np.int64, count=len(texts))
+        get = self._ids.get
+        ids = np.fromiter(
+            (get(word, 0) for word in itertools.chain.from_iterable(tokens)),
+            dtype=np.int64,
+            count=int(lengths.sum())
+        )
+        owner = np.repeat(np.arange(len(texts)), lengths)
+        weights = self._weights[ids]
+        negator = self._negators[ids]
+        negated = np.zeros(len(ids), dtype=bool)
+        for shift in range(1, NEGATION_WINDOW + 1):
+            # A negator shift words back, in the same text
+            negated[shift:] |= negator[:-shift] & (owner[shift:] == owner[:-shift])
+        weights = np.where(negated, weights * NEGATION_SCALE, weights)
+        totals = np.bincount(owner, weights=weights, minlength=len(texts))
+        return (totals / np.sqrt(totals * totals + NORMALIZATION_ALPHA)).astype(np.float32)
+
+class TransformerSentimentClassifier(SentimentClassifier):
+    # A small HuggingFace sequence classifier on CPU; the score is
+    # P(positive) - P(negative)
+    def __init__(self, model_name: str, max_length: int = 256):
+        import torch
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+        
+        self._torch = torch
+        self.name = model_name
+        self.max_length = max_length
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+        labels = {index: label.lower() for index, label in self.model.config.id2label.items()}
+        self._positive = [index for index, label in labels.items() if label.startswith("pos")]
+        self._negative = [index for index, label in labels.items() if label.startswith("neg")]
+        if not self._positive or not self._negative:
+            raise ValueError(f"Sentiment model {model_name} has no positive/negative labels: {sorted(labels.values())}")
+    
+    def score_batch(self, texts: List[str]) -> np.ndarray:
+        torch = self._torch
+        with torch.inference_mode():
+            encoded = self.tokenizer(
+                texts,
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="pt"
+            )
+            probabilities = torch.softmax(self.model(**encoded).logits, dim=-1)
+            scores = probabilities[:, self._positive].sum(dim=1) - probabilities[:, self._negative].sum(dim=1)
+        return scores.cpu().numpy().astype(np.float32)
+
+class SentimentEngine:
+    # Batch sentiment over lists or iterators of texts. analyze_iter pulls
+    # batch_size texts at a time and yields results in input order, so an
+    # insight job over a large export holds one batch in memory. Results are
+    # cached by a hash of classifier and text; repeated texts (and texts
+    # repeated within a batch) are scored once. Thread-safe.
+    def __init__(
+        self,
+        classifier: SentimentClassifier,
+        batch_size: int = 256,
+        cache_size: int = 100000
+    ):
+        self.classifier = classifier
+        self.batch_size = max(batch_size, 1)
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[bytes, SentimentResult]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.batches = 0
+    
+    @classmethod
+    def from_config(cls, config: AtlasConfig) -> "SentimentEngine":
+        return cls.build(
+            config.SENTIMENT_BACKEND,
+            config.SENTIMENT_MODEL,
+            config.SENTIMENT_BATCH_SIZE,
+            config.SENTIMENT_CACHE_SIZE
+        )
+    
+    @classmethod
+    def build(cls, backend: str, model: str, batch_size: int, cache_size: int) -> "SentimentEngine":
+        if backend == "local":
+            classifier: SentimentClassifier = TransformerSentimentClassifier(model)
+        else:
+            classifier = LexiconClassifier()
+        logger.info(f"Using {classifier.name} sentiment")
+        return cls(classifier, batch_size=batch_size, cache_size=cache_size)
+    
+    def _key(self, text: str) -> bytes:
+        return hashlib.sha256(f"{self.classifier.name}:{text}".encode()).digest()
+    
+    def analyze_iter(self, texts: Iterable[str]) -> Iterator[SentimentResult]:
+        iterator = iter(texts)
+        while True:
+            batch = list(itertools.islice(iterator, self.batch_size))
+            if not batch:
+                return
+            yield from self._analyze_batch(batch)
+    
+    def analyze(self, texts: Iterable[str]) -> List[SentimentResult]:
+        return list(self.analyze_iter(texts))
+    
+    def _analyze_batch(self, texts: List[str]) -> List[SentimentResult]:
+        keys = [self._key(text) for text in texts]
+        found: Dict[bytes, SentimentResult] = {}
+        with self._lock:
+            for key in keys:
+                result = self._cache.get(key)
+                if result is not None:
+                    self._cache.move_to_end(key)
+                    found[key] = result
+        misses = {key: text for key, text in zip(keys, texts) if key not in found}
+        if misses:
+            results = label_scores(self.classifier.score_batch(list(misses.values())))
+            found.update(zip(misses, results))
+            with self._lock:
+                self.batches += 1
+                for key, result in zip(misses, results):
+                    self._remember(key, result)
+        with self._lock:
+            self.misses += len(misses)
+            self.hits += len(texts) - len(misses)
+        return [found[key] for key in keys]
+    
+    def _remember(self, key: bytes, result: SentimentResult) -> None:
+        if not self.cache_size:
+            return
+        self._cache[key] = result
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+    
+    @staticmethod
+    def summarize(results: Iterable[SentimentResult]) -> Dict[str, Any]:
+        counts = {"positive": 0, "negative": 0, "neutral": 0}
+        total = 0.0
+        for result in results:
+            counts[result.label] += 1
+            total += result.score
+        count = sum(counts.values())
+        return {
+            "count": count,
+            "counts": counts,
+            "mean_score": total / count if count else 0.0
+        }
+    
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "cache_hits": self.hits,
+            "cache_misses": self.misses,
+            "cache_hit_rate": self.hits / lookups if lookups else 0.0,
+            "cache_entries": len(self._cache),
+            "batches": self.batches
+        }
+
+# One engine per process, built on first use, so each tool worker keeps its
+# classifier and result cache across calls
+_engines: Dict[Tuple[str, str, int, int], SentimentEngine] = {}
+_engines_lock = threading.Lock()
+
+def process_engine(backend: str, model: str, batch_size: int, cache_size: int) -> SentimentEngine:
+    settings = (backend, model, batch_size, cache_size)
+    with _engines_lock:
+        if settings not in _engines:
+            _engines[settings] = SentimentEngine.build(*settings)
+        return _engines[settings]
+
+def analyze_sentiment(
+    backend: str,
+    model: str,
+    batch_size: int,
+    cache_size: int,
+    texts: List[str]
+) -> Dict[str, Any]:
+    # The agent's sentiment_analysis tool. A plain function over the engine
+    # settings, so it runs in a tool worker process; scoring is CPU-bound
+    # and would hold the GIL against request handling in a thread.
+    engine = process_engine(backend, model, batch_size, cache_size)
+    results = engine.analyze(texts)
+    return {
+        "results": [result._asdict() for result in results],
+        "summary": engine.summarize(results)
+    }
\ No newline at end of file
@@ -0,0 +1,116 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, Optional, Union
+from loguru import logger
+
+from .scheduler import GenerationOutput
+
+class InferenceClient:
+    # Stands in for InferenceScheduler when INFERENCE_MODE=sidecar: prompts are
+    # sent to the inference sidecar (atlas.services.inference_server), which
+    # loads the model once and batches requests from every API worker.
+    # Responses are newline-delimited JSON: {"text": ...} deltas when
+    # streaming, then {"output": ...} or {"error": ...}. Closing the
+    # connection (caller cancelled) cancels the generation in the sidecar.
+    def __init__(
+        self,
+        base_url: str,
+        max_new_tokens: int = 512,
+        timeout: float = 300.0,
+        transport: Any = None
+    ):
+        self.base_url = base_url
+        self.max_new_tokens = max_new_tokens
+        self.timeout = timeout
+        self.transport = transport
+        self._client: Any = None
+        self.requests = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.errors = 0
+    
+    async def start(self) -> None:
+        if self._client is not None:
+            return
+        import httpx
+        self._client = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=httpx.Timeout(self.timeout, connect=5.0),
+            transport=self.transport
+        )
+    
+    async def stop(self) -> None:
+        if self._client is None:
+            return
+        await self._client.aclose()
+        self._client = None
+    
+    async def ready(self) -> bool:
+        await self.start()
+        try:
+            response = await self._client.get("/ready")
+            return response.status_code == 200
+        except Exception as e:
+            logger.warning(f"Inference sidecar not reachable: {str(e)}")
+            return False
+    
+    async def generate(self, prompt: Any, max_new_tokens: Optional[int] = None) -> GenerationOutput:
+        output = None
+        async for item in self._request(prompt, max_new_tokens, stream=False):
+            output = item
+        return output
+    
+    async def stream(
+        self,
+        prompt: Any,
+        max_new_tokens: Optional[int] = None
+    ) -> AsyncIterator[Union[str, GenerationOutput]]:
+        async for item in self._request(prompt, max_new_tokens, stream=True):
+            yield item
+    
+    async def _request(
+        self,
+        prompt: Any,
+        max_new_tokens: Optional[int],
+        stream: bool
+    ) -> AsyncIterator[Union[str, GenerationOutput]]:
+        await self.start()
+        if not isinstance(prompt, str):
+            # Only what generation needs; sources and counts stay in the worker
+            prompt = prompt.dict(include={"prefix", "prefix_key", "body"})
+        payload = {
+            "prompt": prompt,
+            "max_new_tokens": max_new_tokens or self.max_new_tokens,
+            "stream": stream
+        }
+        self.requests += 1
+        try:
+            async with self._client.stream("POST", "/generate", json=payload) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    if not line:
+                        continue
+                    message = json.loads(line)
+                    if "error" in message:
+                        raise RuntimeError(f"Inference sidecar error: {message['error']}")
+                    if "output" in message:
+                        self.completed += 1
+                        yield GenerationOutput(**message["output"])
+                        return
+                    yield message["text"]
+            raise RuntimeError("Inference sidecar closed the stream without a result")
+        except (asyncio.CancelledError, GeneratorExit):
+            self.cancelled += 1
+            raise
+        except Exception:
+            self.errors += 1
+            raise
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": "sidecar",
+            "requests": self.requests,
+            "completed": self.completed,
+            "cancelled": self.cancelled,
+            "errors": self.errors
+        }
\ No newline at end of file
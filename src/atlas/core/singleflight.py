@@ -0,0 +1,81 @@
+import asyncio
+import hashlib
+import json
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple, TypeVar
+from prometheus_client import Counter
+
+T = TypeVar("T")
+
+COALESCED_REQUESTS = Counter(
+    "atlas_coalesced_requests_total",
+    "Requests answered by joining an identical request already in flight",
+    ["layer"]
+)
+
+def query_key(
+    text: str,
+    persona: Optional[str] = None,
+    domain: Optional[str] = None,
+    metadata: Optional[Dict[str, Any]] = None,
+    user_id: Optional[str] = None
+) -> str:
+    # Case and whitespace differences do not change the answer
+    normalized = " ".join(text.split()).casefold()
+    payload = json.dumps(
+        [normalized, persona, domain, user_id, metadata or {}],
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+class InFlightCall:
+    def __init__(self, task: asyncio.Future):
+        self.task = task
+        self.waiters = 0
+
+class SingleFlight:
+    # Concurrent callers with the same key share one execution: the first
+    # starts it as a task and the rest await the same result. A caller that is
+    # cancelled only stops waiting; the execution is cancelled once nobody is
+    # waiting for it, and a later caller then starts a fresh one.
+    def __init__(self, layer: str):
+        self.layer = layer
+        self._calls: Dict[Hashable, InFlightCall] = {}
+        self.executions = 0
+        self.coalesced = 0
+        self.abandoned = 0
+    
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+        # Returns (result, coalesced); coalesced is True when another caller
+        # started the execution
+        call = self._calls.get(key)
+        coalesced = call is not None
+        if call is None:
+            call = InFlightCall(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+            self.executions += 1
+        else:
+            self.coalesced += 1
+            COALESCED_REQUESTS.labels(layer=self.layer).inc()
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task), coalesced
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.task.done():
+                self._forget(key, call)
+                call.task.cancel()
+                self.abandoned += 1
+    
+    def _forget(self, key: Hashable, call: InFlightCall) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "abandoned": self.abandoned,
+            "in_flight": len(self._calls)
+        }
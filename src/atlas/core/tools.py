@@ -0,0 +1,233 @@
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from pydantic import BaseModel
+from loguru import logger
+
+from .metrics import stage
+from .singleflight import SingleFlight
+
+TOOL_KINDS = ("cpu", "io")
+
+class ToolTimeout(Exception):
+    pass
+
+class ToolCall(BaseModel):
+    name: str
+    args: Dict[str, Any] = {}
+
+class ToolResult(BaseModel):
+    name: str
+    output: Any = None
+    error: Optional[str] = None
+    cached: bool = False
+    latency_ms: float = 0.0
+    queue_ms: float = 0.0  # Wait for a free pool worker (cpu tools)
+    pool_busy: int = 0  # CPU tool calls in the pool, this one included, at submit
+    pool_size: int = 0
+
+class ToolSpec:
+    __slots__ = ("name", "fn", "kind", "timeout", "memoize", "calls", "errors", "timeouts", "cache_hits")
+    
+    def __init__(self, name: str, fn: Callable[..., Any], kind: str, timeout: float, memoize: bool):
+        self.name = name
+        self.fn = fn
+        self.kind = kind
+        self.timeout = timeout
+        self.memoize = memoize
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.cache_hits = 0
+
+def _timed_call(fn: Callable[..., Any], kwargs: Dict[str, Any]) -> Tuple[float, Any]:
+    # Runs in the pool worker; the start time gives the caller its queue wait
+    started = time.time()
+    return started, fn(**kwargs)
+
+def _key_default(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return [str(value.dtype), value.shape, hashlib.sha256(np.ascontiguousarray(value).tobytes()).hexdigest()]
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, BaseModel):
+        return value.dict()
+    raise TypeError(f"{type(value).__name__} is not hashable for memoization")
+
+def call_key(name: str, kwargs: Dict[str, Any]) -> Optional[str]:
+    # None when an argument has no stable content hash; the call then
+    # always runs
+    try:
+        payload = json.dumps([name, kwargs], sort_keys=True, default=_key_default)
+    except (TypeError, ValueError):
+        return None
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class ToolRuntime:
+    # Dispatches the agent's tools. A tool is registered as "io", a coroutine
+    # function awaited on the event loop, or "cpu", a picklable plain
+    # function run in a process pool so it neither blocks the loop nor holds
+    # the GIL against request handling. Results are memoized by a hash of the
+    # tool name and arguments, identical calls in flight share one run, and
+    # each call is bounded by its tool's timeout. A cpu call that times out
+    # is cancelled if it has not started; a running one finishes in its
+    # worker and the result is discarded.
+    def __init__(self, max_workers: int = 0, timeout: float = 30.0, cache_size: int = 1024):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.cache_size = cache_size
+        self._tools: Dict[str, ToolSpec] = {}
+        self._cache: "OrderedDict[str, Any]" = OrderedDict()
+        self._inflight = SingleFlight(layer="tools")
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pool_lock = threading.Lock()
+        self._pool_busy = 0
+    
+    def register(
+        self,
+        name: str,
+        fn: Callable[..., Any],
+        kind: str = "io",
+        timeout: Optional[float] = None,
+        memoize: bool = True
+    ) -> None:
+        if kind not in TOOL_KINDS:
+            raise ValueError(f"Unsupported tool kind: {kind}")
+        self._tools[name] = ToolSpec(name, fn, kind, timeout or self.timeout, memoize)
+    
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+    
+    def __len__(self) -> int:
+        return len(self._tools)
+    
+    async def call(self, name: str, **kwargs: Any) -> ToolResult:
+        spec = self._tools.get(name)
+        if spec is None:
+            raise KeyError(f"Unknown tool: {name}")
+        start = time.perf_counter()
+        spec.calls += 1
+        key = call_key(name, kwargs) if spec.memoize and self.cache_size else None
+        if key is not None and key in self._cache:
+            self._cache.move_to_end(key)
+            spec.cache_hits += 1
+            return ToolResult(
+                name=name,
+                output=self._cache[key],
+                cached=True,
+                latency_ms=(time.perf_counter() - start) * 1000,
+                pool_size=self.max_workers
+            )
+        try:
+            with stage("tools", name):
+                if key is None:
+                    output, queue_ms, busy = await self._invoke(spec, kwargs, None)
+                else:
+                    (output, queue_ms, busy), _ = await self._inflight.run(
+                        key,
+                        lambda: self._invoke(spec, kwargs, key)
+                    )
+        except asyncio.TimeoutError:
+            spec.timeouts += 1
+            raise ToolTimeout(f"Tool {name} timed out after {spec.timeout}s")
+        except Exception:
+            spec.errors += 1
+            raise
+        return ToolResult(
+            name=name,
+            output=output,
+            latency_ms=(time.perf_counter() - start) * 1000,
+            queue_ms=queue_ms,
+            pool_busy=busy,
+            pool_size=self.max_workers
+        )
+    
+    async def run(self, calls: List[ToolCall]) -> List[ToolResult]:
+        # Independent calls run concurrently; a failing call becomes a result
+        # with an error instead of failing the others
+        async def one(call: ToolCall) -> ToolResult:
+            start = time.perf_counter()
+            try:
+                return await self.call(call.name, **call.args)
+            except Exception as e:
+                logger.warning(f"Tool {call.name} failed: {str(e)}")
+                return ToolResult(
+                    name=call.name,
+                    error=str(e) or type(e).__name__,
+                    latency_ms=(time.perf_counter() - start) * 1000,
+                    pool_size=self.max_workers
+                )
+        return list(await asyncio.gather(*[one(call) for call in calls]))
+    
+    async def _invoke(self, spec: ToolSpec, kwargs: Dict[str, Any], key: Optional[str]) -> Tuple[Any, float, int]:
+        if spec.kind == "io":
+            output = await asyncio.wait_for(spec.fn(**kwargs), spec.timeout)
+            queue_ms, busy = 0.0, 0
+        else:
+            submitted = time.time()
+            future = self._get_pool().submit(_timed_call, spec.fn, kwargs)
+            with self._pool_lock:
+                self._pool_busy += 1
+                busy = self._pool_busy
+            future.add_done_callback(self._pool_done)
+            try:
+                started, output = await asyncio.wait_for(asyncio.wrap_future(future), spec.timeout)
+            except asyncio.TimeoutError:
+                future.cancel()
+                raise
+            queue_ms = max(started - submitted, 0.0) * 1000
+        if key is not None:
+            self._cache[key] = output
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return output, queue_ms, busy
+    
+    def _pool_done(self, _: Any) -> None:
+        # Called from the pool's management thread
+        with self._pool_lock:
+            self._pool_busy -= 1
+    
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # Started on the first cpu call. Spawned, not forked: the parent has
+        # model, gRPC and executor threads a fork would copy mid-state.
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info(f"Started tool process pool with {self.max_workers} workers")
+        return self._pool
+    
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pool": {
+                "size": self.max_workers,
+                "busy": self._pool_busy,
+                "started": self._pool is not None
+            },
+            "cache_entries": len(self._cache),
+            "coalescing": self._inflight.stats(),
+            "tools": {
+                name: {
+                    "cpu": spec.kind == "cpu",
+                    "calls": spec.calls,
+                    "errors": spec.errors,
+                    "timeouts": spec.timeouts,
+                    "cache_hits": spec.cache_hits
+                }
+                for name, spec in self._tools.items()
+            }
+        }
\ No newline at end of file
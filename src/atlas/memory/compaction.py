@@ -0,0 +1,230 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from loguru import logger
+
+from .store import DEFAULT_PARTITION, VectorStore
+
+RunFn = Callable[..., Awaitable[Any]]
+
+def cold_collection(name: str) -> str:
+    return f"{name}_cold"
+
+def deduplicate(rows: List[Dict[str, Any]], max_distance: float) -> List[Dict[str, Any]]:
+    # Greedy clustering, newest first: each representative absorbs every
+    # remaining row of the same partition within max_distance (squared L2 on
+    # normalized vectors). Representatives keep their own text and embedding
+    # and record how many memories they stand for and the oldest timestamp
+    # among them.
+    by_partition: Dict[Optional[str], List[Dict[str, Any]]] = {}
+    for row in rows:
+        by_partition.setdefault(row.get("partition"), []).append(row)
+    if len(by_partition) > 1:
+        return [
+            representative
+            for group in by_partition.values()
+            for representative in deduplicate(group, max_distance)
+        ]
+    if not rows:
+        return []
+    rows = sorted(rows, key=lambda row: -row["timestamp"])
+    vectors = np.asarray([row["embedding"] for row in rows], dtype=np.float32)
+    norms = np.einsum("ij,ij->i", vectors, vectors)
+    distances = norms[:, None] + norms[None, :] - 2 * vectors @ vectors.T
+    assigned = np.zeros(len(rows), dtype=bool)
+    representatives = []
+    for i in range(len(rows)):
+        if assigned[i]:
+            continue
+        members = np.flatnonzero(~assigned & (distances[i] <= max_distance))
+        assigned[members] = True
+        metadata = dict(rows[i]["metadata"] or {})
+        metadata["merged_count"] = int(sum((rows[j]["metadata"] or {}).get("merged_count", 1) for j in members))
+        metadata["first_timestamp"] = int(min(
+            (rows[j]["metadata"] or {}).get("first_timestamp", rows[j]["timestamp"]) for j in members
+        ))
+        representatives.append({**rows[i], "metadata": metadata})
+    return representatives
+
+def merge_into(row: Dict[str, Any], entry: Dict[str, Any]) -> Dict[str, Any]:
+    # The representative row standing in for itself and an existing entry
+    found = entry["metadata"] or {}
+    metadata = dict(row["metadata"])
+    metadata["merged_count"] = metadata["merged_count"] + int(found.get("merged_count", 1))
+    metadata["first_timestamp"] = min(
+        metadata["first_timestamp"],
+        int(found.get("first_timestamp", entry["timestamp"]))
+    )
+    return {**row, "metadata": metadata}
+
+class MemoryCompactor:
+    # Background maintenance for tiered memory. Every interval it moves hot
+    # tier memories older than hot_age_seconds into the cold tier, folding
+    # near-duplicates (within the batch and against the cold tier) into one
+    # vector, then expires memories older than max_age_seconds from both
+    # tiers. Every store call touches at most batch_size rows and a pass stops
+    # after max_batches, so a large backlog is worked off over several passes
+    # instead of in one long, unbounded call.
+    def __init__(
+        self,
+        store: VectorStore,
+        run: RunFn,
+        collection_name: str,
+        hot_age_seconds: float,
+        max_age_seconds: float,
+        dedup_distance: float = 0.05,
+        batch_size: int = 512,
+        max_batches: int = 16,
+        interval: float = 300.0,
+        search_params: Optional[Dict[str, Any]] = None
+    ):
+        self.store = store
+        self.run = run
+        self.collection_name = collection_name
+        self.hot_age_seconds = hot_age_seconds
+        self.max_age_seconds = max_age_seconds
+        self.dedup_distance = dedup_distance
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.interval = interval
+        self.search_params = search_params or {"metric_type": "L2", "params": {"nprobe": 10}}
+        self._task: Optional[asyncio.Task] = None
+        # Created on first use: the agent (and this compactor) is built in an
+        # executor thread, where Python 3.9 has no event loop to bind it to
+        self._lock: Optional[asyncio.Lock] = None
+        self.passes = 0
+        self.demoted = 0
+        self.merged = 0
+        self.expired = 0
+        self.failures = 0
+        self.last_pass_seconds = 0.0
+    
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._task = asyncio.create_task(self._run())
+        logger.info("Memory compactor started")
+    
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        logger.info("Memory compactor stopped")
+    
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.compact()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Unfinished rows are picked up again on the next pass
+                self.failures += 1
+                logger.error(f"Memory compaction failed: {str(e)}")
+    
+    @asynccontextmanager
+    async def paused(self) -> AsyncIterator[None]:
+        # Holds off passes, e.g. while the collections are being reindexed
+        async with self._get_lock():
+            yield
+    
+    def _get_lock(self) -> asyncio.Lock:
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+    
+    async def compact(self, now: Optional[float] = None) -> Dict[str, int]:
+        now = time.time() if now is None else now
+        async with self._get_lock():
+            start = time.perf_counter()
+            demoted, merged = await self.demote(int(now - self.hot_age_seconds))
+            expired = await self.expire(int(now - self.max_age_seconds))
+            self.passes += 1
+            self.last_pass_seconds = time.perf_counter() - start
+            if demoted or expired:
+                logger.info(f"Compacted memory: {demoted} demoted ({merged} merged), {expired} expired")
+            return {"demoted": demoted, "merged": merged, "expired": expired}
+    
+    async def demote(self, cutoff_timestamp: int) -> Tuple[int, int]:
+        hot, cold = self.collection_name, cold_collection(self.collection_name)
+        demoted = merged = 0
+        for _ in range(self.max_batches):
+            rows = await self.run(self.store.fetch_older_than, hot, cutoff_timestamp, self.batch_size)
+            if not rows:
+                break
+            representatives = deduplicate(rows, self.dedup_distance)
+            existing = await self.run(
+                self.store.search,
+                cold,
+                [np.asarray(row["embedding"], dtype=np.float32).tolist() for row in representatives],
+                1,
+                {**self.search_params, "consistency_level": "Strong"},
+                [row.get("partition") or DEFAULT_PARTITION for row in representatives]
+            )
+            # A representative close to a cold entry replaces it, carrying the
+            # entry's count and first timestamp. One that is the cold entry
+            # (same text and timestamp) was copied by a pass that crashed
+            # before deleting the hot rows, and is dropped.
+            fresh: List[Dict[str, Any]] = []
+            replaced: List[Dict[str, Any]] = []
+            for row, hits in zip(representatives, existing):
+                match = hits[0] if hits and hits[0]["distance"] <= self.dedup_distance else None
+                if match is None or any(entry["id"] == match["id"] for entry in replaced):
+                    fresh.append(row)
+                elif (match["text"], match["timestamp"]) != (row["text"], row["timestamp"]):
+                    fresh.append(merge_into(row, match))
+                    replaced.append({**match, "partition": row.get("partition")})
+            if fresh:
+                await self.run(
+                    self.store.insert,
+                    cold,
+                    [row["text"] for row in fresh],
+                    [np.asarray(row["embedding"], dtype=np.float32).tolist() for row in fresh],
+                    [row["timestamp"] for row in fresh],
+                    [row["metadata"] for row in fresh],
+                    [row.get("partition") for row in fresh]
+                )
+            await self.delete(cold, replaced)
+            await self.delete(hot, rows)
+            demoted += len(rows)
+            merged += len(rows) - len(fresh) + len(replaced)
+        self.demoted += demoted
+        self.merged += merged
+        return demoted, merged
+    
+    async def expire(self, cutoff_timestamp: int) -> int:
+        expired = 0
+        for name in (self.collection_name, cold_collection(self.collection_name)):
+            for _ in range(self.max_batches):
+                rows = await self.run(self.store.fetch_older_than, name, cutoff_timestamp, self.batch_size)
+                if not rows:
+                    break
+                await self.delete(name, rows)
+                expired += len(rows)
+        self.expired += expired
+        return expired
+    
+    async def delete(self, name: str, rows: List[Dict[str, Any]]) -> None:
+        by_partition: Dict[Optional[str], List[int]] = {}
+        for row in rows:
+            by_partition.setdefault(row.get("partition"), []).append(row["id"])
+        for partition, ids in by_partition.items():
+            await self.run(self.store.delete_ids, name, ids, partition)
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "passes": self.passes,
+            "demoted": self.demoted,
+            "merged": self.merged,
+            "expired": self.expired,
+            "failures": self.failures,
+            "last_pass_seconds": self.last_pass_seconds
+        }
\ No newline at end of file
@@ -0,0 +1,302 @@
+import asyncio
+import hashlib
+import re
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+import numpy as np
+from loguru import logger
+
+from ..core.config import AtlasConfig
+
+class Embedder:
+    # Turns a batch of texts into a (len(texts), dim) float32 matrix. Called from
+    # a worker thread, never on the event loop.
+    name: str = "base"
+    dim: int
+    
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        raise NotImplementedError
+
+class HashingEmbedder(Embedder):
+    # Deterministic feature-hashing embedder (unigrams + bigrams, signed
+    # buckets, L2-normalized). Needs no model download, so it doubles as the
+    # test backend, and texts that share words still land close together.
+    name = "hashing"
+    
+    def __init__(self, dim: int):
+        self.dim = dim
+    
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = re.findall(r"\w+", text.lower())
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            if not features:
+                continue
+            hashes = np.array(
+                [int.from_bytes(hashlib.blake2b(f.encode(), digest_size=8).digest(), "little") for f in features],
+                dtype=np.uint64
+            )
+            indices = (hashes % np.uint64(self.dim)).astype(np.int64)
+            signs = np.where(hashes >> np.uint64(63), 1.0, -1.0).astype(np.float32)
+            np.add.at(vectors[row], indices, signs)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+class TransformerEmbedder(Embedder):
+    # Mean-pooled sentence embeddings from a small HuggingFace encoder on CPU
+    def __init__(self, model_name: str, dim: int, max_length: int = 256):
+        import torch
+        from transformers import AutoModel, AutoTokenizer
+        
+        self._torch = torch
+        self.name = model_name
+        self.dim = dim
+        self.max_length = max_length
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.model = AutoModel.from_pretrained(model_name).eval()
+        hidden_size = self.model.config.hidden_size
+        if hidden_size != dim:
+            raise ValueError(
+                f"Embedding model {model_name} produces {hidden_size}-dim vectors "
+                f"but EMBEDDING_DIM is {dim}"
+            )
+    
+    def embed_batch(self, texts: List[str]) -> np.ndarray:
+        torch = self._torch
+        with torch.inference_mode():
+            encoded = self.tokenizer(
+                texts,
+                padding=True,
+                truncation=True,
+                max_length=self.max_length,
+                return_tensors="pt"
+            )
+            hidden = self.model(**encoded).last_hidden_state
+            mask = encoded["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(dim=1) / mask.sum(dim=1).clamp(min=1e-9)
+            pooled = torch.nn.functional.normalize(pooled, dim=1)
+        return pooled.cpu().numpy().astype(np.float32)
+
+class EmbeddingCache:
+    # Bounded LRU keyed by content hash, optionally backed by a SQLite file so
+    # embeddings survive restarts and are shared between workers on one host.
+    # get only looks in memory and is safe on the event loop; load and
+    # put_many touch the file and belong on the embedding thread.
+    LOAD_CHUNK_SIZE = 500  # Under SQLite's default limit of 999 bound parameters
+    
+    def __init__(self, max_entries: int = 10000, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)"
+            )
+            self._db.commit()
+    
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+            return vector
+    
+    def load(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        # One query per LOAD_CHUNK_SIZE keys; what is found is kept in memory
+        if self._db is None or not keys:
+            return {}
+        found: Dict[str, np.ndarray] = {}
+        for start in range(0, len(keys), self.LOAD_CHUNK_SIZE):
+            chunk = keys[start:start + self.LOAD_CHUNK_SIZE]
+            rows = self._db.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({', '.join('?' * len(chunk))})",
+                chunk
+            ).fetchall()
+            found.update((key, np.frombuffer(vector, dtype=np.float32)) for key, vector in rows)
+        with self._lock:
+            for key, vector in found.items():
+                self._remember(key, vector)
+        return found
+    
+    def put(self, key: str, vector: np.ndarray) -> None:
+        self.put_many({key: vector})
+    
+    def put_many(self, vectors: Dict[str, np.ndarray]) -> None:
+        # Memory first, then one transaction for the whole batch
+        if not vectors:
+            return
+        with self._lock:
+            for key, vector in vectors.items():
+                self._remember(key, vector)
+        if self._db is not None:
+            with self._db:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                    [(key, vector.astype(np.float32).tobytes()) for key, vector in vectors.items()]
+                )
+    
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        self._entries[key] = vector
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+class MicroBatcher:
+    # Collects texts submitted by concurrent callers for up to max_wait seconds
+    # (or until max_batch_size is reached) and runs them as one forward pass.
+    def __init__(
+        self,
+        fn: Callable[[List[str]], np.ndarray],
+        max_batch_size: int = 32,
+        max_wait: float = 0.005
+    ):
+        self.fn = fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="atlas-embed")
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self.batch_sizes: Dict[int, int] = {}
+    
+    async def submit(self, text: str) -> np.ndarray:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._dispatch()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._dispatch)
+        return await future
+    
+    def _dispatch(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _run(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        loop = asyncio.get_running_loop()
+        texts = [text for text, _ in batch]
+        self._record_batch_size(len(texts))
+        try:
+            vectors = await loop.run_in_executor(self._executor, self.fn, texts)
+        except Exception as e:
+            logger.error(f"Embedding batch of {len(texts)} failed: {str(e)}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), vector in zip(batch, vectors):
+            if not future.done():
+                future.set_result(vector)
+    
+    def _record_batch_size(self, size: int) -> None:
+        # Power-of-two buckets: 1, 2, 4, 8, ...
+        bucket = 1 << (size - 1).bit_length()
+        self.batch_sizes[bucket] = self.batch_sizes.get(bucket, 0) + 1
+    
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+class EmbeddingEngine:
+    def __init__(
+        self,
+        embedder: Embedder,
+        cache: Optional[EmbeddingCache] = None,
+        max_batch_size: int = 32,
+        max_wait: float = 0.005
+    ):
+        self.embedder = embedder
+        self.dim = embedder.dim
+        self.cache = cache if cache is not None else EmbeddingCache()
+        self.batcher = MicroBatcher(self._embed_batch, max_batch_size, max_wait)
+        self.hits = 0  # Served from memory on the event loop
+        self.disk_hits = 0  # Served from the SQLite file on the embedding thread
+        self.misses = 0
+    
+    @classmethod
+    def from_config(cls, config: AtlasConfig) -> "EmbeddingEngine":
+        if config.EMBEDDING_BACKEND == "local":
+            embedder: Embedder = TransformerEmbedder(config.EMBEDDING_MODEL, config.EMBEDDING_DIM)
+        else:
+            embedder = HashingEmbedder(config.EMBEDDING_DIM)
+        logger.info(f"Using {embedder.name} embeddings ({embedder.dim} dims)")
+        return cls(
+            embedder,
+            cache=EmbeddingCache(config.EMBEDDING_CACHE_SIZE, config.EMBEDDING_CACHE_PATH),
+            max_batch_size=config.EMBEDDING_BATCH_SIZE,
+            max_wait=config.EMBEDDING_BATCH_WAIT_MS / 1000
+        )
+    
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.embedder.name}:{self.dim}:{text}".encode()).hexdigest()
+    
+    async def embed(self, text: str) -> np.ndarray:
+        vector = self.cache.get(self._key(text))
+        if vector is not None:
+            self.hits += 1
+            return vector
+        return await self.batcher.submit(text)
+    
+    def _embed_batch(self, texts: List[str]) -> np.ndarray:
+        # Runs on the batcher's thread: the disk cache is read for the whole
+        # batch, only what it lacks is embedded, and the new vectors are
+        # written back in one transaction
+        keys = [self._key(text) for text in texts]
+        stored = self.cache.load(keys)
+        missing = [i for i, key in enumerate(keys) if key not in stored]
+        self.disk_hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        vectors = np.empty((len(texts), self.dim), dtype=np.float32)
+        for i, key in enumerate(keys):
+            if key in stored:
+                vectors[i] = stored[key]
+        if missing:
+            vectors[missing] = self.embedder.embed_batch([texts[i] for i in missing])
+            self.cache.put_many({keys[i]: vectors[i] for i in missing})
+        return vectors
+    
+    async def embed_many(self, texts: List[str]) -> np.ndarray:
+        # Duplicates within one call are embedded once
+        unique = list(dict.fromkeys(texts))
+        vectors = await asyncio.gather(*[self.embed(text) for text in unique])
+        by_text = dict(zip(unique, vectors))
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.stack([by_text[text] for text in texts])
+    
+    def stats(self) -> Dict[str, Any]:
+        hits = self.hits + self.disk_hits
+        lookups = hits + self.misses
+        return {
+            "cache_hits": hits,
+            "cache_disk_hits": self.disk_hits,
+            "cache_misses": self.misses,
+            "cache_hit_rate": hits / lookups if lookups else 0.0,
+            "cache_entries": len(self.cache),
+            "batch_sizes": dict(sorted(self.batcher.batch_sizes.items()))
+        }
+    
+    def close(self) -> None:
+        self.batcher.shutdown()
+        self.cache.close()
@@ -0,0 +1,252 @@
+import asyncio
+import json
+import os
+import re
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from pydantic import BaseModel
+from loguru import logger
+
+class MemoryRecord(BaseModel):
+    text: str
+    metadata: Dict[str, Any] = {}
+    timestamp: int
+    collection_name: str
+    partition: Optional[str] = None
+
+FlushFn = Callable[[str, List[MemoryRecord]], Awaitable[None]]
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class IngestionQueue:
+    # Write-behind buffer for memory inserts. Records are acknowledged once they
+    # are buffered (and appended to the spill file), then flushed to the store
+    # as one columnar insert per collection when max_batch_size records are
+    # waiting or flush_interval seconds have passed. A full buffer makes put()
+    # wait, which pushes back on callers instead of growing without bound.
+    # Every process spills to its own <spill_path stem>.<pid><suffix>, since
+    # API workers share the configured path; on start a queue replays its own
+    # file and claims (renames) those of processes that are gone. Spill I/O
+    # runs on one worker thread, in the order the loop submitted it.
+    def __init__(
+        self,
+        flush_fn: FlushFn,
+        max_batch_size: int = 64,
+        flush_interval: float = 1.0,
+        max_queue_size: int = 1024,
+        spill_path: Optional[str] = None
+    ):
+        self.flush_fn = flush_fn
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self.max_queue_size = max_queue_size
+        self.spill_path = spill_path
+        self.spill_file: Optional[str] = None
+        if spill_path:
+            stem, suffix = os.path.splitext(spill_path)
+            self.spill_file = f"{stem}.{os.getpid()}{suffix}"
+        self._spill_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="atlas-spill")
+        self._buffer: List[MemoryRecord] = []
+        self._not_full: Optional[asyncio.Condition] = None
+        self._batch_ready: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._started: Optional[asyncio.Future] = None
+        self.records_flushed = 0
+        self.batches_flushed = 0
+        self.flush_failures = 0
+    
+    async def start(self) -> None:
+        # Concurrent first callers (the first puts under load) share one
+        # start, registered before anything is awaited; the primitives are
+        # made once, so waiters are never left on replaced ones
+        if self._started is None:
+            if self._not_full is None:
+                self._not_full = asyncio.Condition()
+                self._batch_ready = asyncio.Event()
+                self._flush_lock = asyncio.Lock()
+            self._started = asyncio.ensure_future(self._start())
+        await asyncio.shield(self._started)
+    
+    async def _start(self) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            recovered = await loop.run_in_executor(self._spill_executor, self._recover_spill)
+        except Exception:
+            # The next put tries again
+            self._started = None
+            raise
+        if recovered:
+            self._buffer[:0] = recovered
+            logger.info(f"Recovered {len(recovered)} unflushed memories from spill files")
+        self._task = asyncio.create_task(self._run())
+        logger.info("Memory ingestion queue started")
+    
+    async def put(self, record: MemoryRecord) -> None:
+        await self.start()
+        async with self._not_full:
+            while len(self._buffer) >= self.max_queue_size:
+                await self._not_full.wait()
+            self._buffer.append(record)
+            # Submitted with the buffer change, so the file sees the same order
+            spilled = self._spill(self._append_spill, record)
+            if len(self._buffer) >= self.max_batch_size:
+                self._batch_ready.set()
+        await spilled
+    
+    async def flush(self) -> None:
+        if self._flush_lock is None:
+            return
+        async with self._flush_lock:
+            while self._buffer:
+                batch = self._buffer[:self.max_batch_size]
+                await self._flush_batch(batch)
+                async with self._not_full:
+                    del self._buffer[:len(batch)]
+                    spilled = self._spill(self._rewrite_spill, list(self._buffer))
+                    self._not_full.notify_all()
+                await spilled
+    
+    async def stop(self) -> None:
+        if self._started is None:
+            return
+        try:
+            await asyncio.shield(self._started)
+        except Exception:
+            # Recovery failed, so nothing was started
+            return
+        self._started = None
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush memories on shutdown, kept in spill file: {str(e)}")
+        logger.info("Memory ingestion queue stopped")
+    
+    async def _run(self) -> None:
+        while True:
+            # asyncio.wait, not wait_for: wait_for returns normally when it is
+            # cancelled just as the event is set, and stop() would wait forever
+            ready = asyncio.ensure_future(self._batch_ready.wait())
+            try:
+                await asyncio.wait({ready}, timeout=self.flush_interval)
+            finally:
+                ready.cancel()
+            self._batch_ready.clear()
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Records stay buffered and are retried on the next tick
+                logger.error(f"Failed to flush memories: {str(e)}")
+    
+    async def _flush_batch(self, batch: List[MemoryRecord]) -> None:
+        by_collection: Dict[str, List[MemoryRecord]] = {}
+        for record in batch:
+            by_collection.setdefault(record.collection_name, []).append(record)
+        try:
+            for collection_name, records in by_collection.items():
+                await self.flush_fn(collection_name, records)
+                self.batches_flushed += 1
+        except Exception:
+            self.flush_failures += 1
+            raise
+        self.records_flushed += len(batch)
+    
+    def _spill(self, fn: Callable[..., None], *args: Any) -> "asyncio.Future[None]":
+        if not self.spill_file:
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(None)
+            return future
+        return asyncio.get_running_loop().run_in_executor(self._spill_executor, fn, *args)
+    
+    def _append_spill(self, record: MemoryRecord) -> None:
+        with open(self.spill_file, "a") as f:
+            f.write(record.json() + "\n")
+    
+    def _rewrite_spill(self, records: List[MemoryRecord]) -> None:
+        tmp_path = f"{self.spill_file}.tmp"
+        with open(tmp_path, "w") as f:
+            for record in records:
+                f.write(record.json() + "\n")
+        os.replace(tmp_path, self.spill_file)
+    
+    def _recover_spill(self) -> List[MemoryRecord]:
+        # This process's own file (a restart that got the same pid), then the
+        # files of dead processes and the pre-per-process shared file. A file
+        # is claimed by renaming it, which only one process can do, and is
+        # removed once its records are in our own spill file.
+        if not self.spill_file:
+            return []
+        directory = os.path.dirname(self.spill_path) or "."
+        os.makedirs(directory, exist_ok=True)
+        stem, suffix = os.path.splitext(os.path.basename(self.spill_path))
+        pattern = re.compile(rf"{re.escape(stem)}\.(\d+)(\.claimed-[0-9a-f]+)?{re.escape(suffix)}$")
+        records = self._read_spill(self.spill_file) if os.path.exists(self.spill_file) else []
+        claimed = []
+        for name in sorted(os.listdir(directory)):
+            match = pattern.match(name)
+            if name == os.path.basename(self.spill_path):
+                owner = None
+            elif match is not None and int(match.group(1)) != os.getpid():
+                owner = int(match.group(1))
+            else:
+                continue
+            if owner is not None and _pid_alive(owner):
+                continue
+            path = os.path.join(directory, name)
+            claim = os.path.join(directory, f"{stem}.{os.getpid()}.claimed-{uuid.uuid4().hex[:12]}{suffix}")
+            try:
+                os.rename(path, claim)
+            except FileNotFoundError:
+                # Another worker claimed it first
+                continue
+            records.extend(self._read_spill(claim))
+            claimed.append(claim)
+        # Leftover claims of ours, from a start that crashed part way
+        for name in sorted(os.listdir(directory)):
+            match = pattern.match(name)
+            path = os.path.join(directory, name)
+            if match is not None and match.group(2) and int(match.group(1)) == os.getpid() and path not in claimed:
+                records.extend(self._read_spill(path))
+                claimed.append(path)
+        if claimed:
+            self._rewrite_spill(records)
+            for path in claimed:
+                os.remove(path)
+        return records
+    
+    def _read_spill(self, path: str) -> List[MemoryRecord]:
+        records = []
+        with open(path) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(MemoryRecord(**json.loads(line)))
+                except Exception as e:
+                    logger.warning(f"Skipping unreadable spill record: {str(e)}")
+        return records
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": len(self._buffer),
+            "records_flushed": self.records_flushed,
+            "batches_flushed": self.batches_flushed,
+            "flush_failures": self.flush_failures
+        }
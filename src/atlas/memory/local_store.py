@@ -0,0 +1,750 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing, contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+import numpy as np
+from loguru import logger
+
+from .store import DEFAULT_PARTITION, VectorStore
+
+class LocalCollection:
+    # One collection on disk:
+    #   collection.json  dim / metric / nlist / index_type
+    #   vectors.f32      memory-mapped float32 matrix, one row per record
+    #   lists.i32        memory-mapped IVF list id per row (-1 before training)
+    #   centroids.npy    IVF centroids, written once the collection is trained
+    #   codes.u8         IVF_SQ8 only: memory-mapped 8-bit codes per row
+    #   sq8.npy          IVF_SQ8 only: per-dimension offset and scale
+    #   records.jsonl    append-only log of inserts, timestamp and id deletes
+    # Row ids are insertion order, so the log alone rebuilds texts, metadata
+    # and tombstones when the collection is reopened.
+    # Index types: FLAT (always brute force), IVF_FLAT, and IVF_SQ8, which
+    # scans the probed lists over the 8-bit codes and re-ranks the best
+    # RERANK_FACTOR * k candidates with the float vectors.
+    INDEX_TYPES = ("FLAT", "IVF_FLAT", "IVF_SQ8")
+    INITIAL_CAPACITY = 1024
+    TRAIN_POINTS_PER_LIST = 39
+    MAX_TRAIN_POINTS = 100000
+    KMEANS_ITERATIONS = 10
+    CHUNK_ROWS = 65536
+    RERANK_FACTOR = 8
+    
+    def __init__(self, path: str, dim: int, nlist: int = 1024, index_type: str = "IVF_FLAT"):
+        if index_type not in self.INDEX_TYPES:
+            raise ValueError(f"Index type {index_type} is not supported by the local backend")
+        self.path = path
+        self.dim = dim
+        self.nlist = nlist
+        self.index_type = index_type
+        self.count = 0
+        self._capacity = 0
+        self._lock = threading.RLock()
+        self._texts: List[str] = []
+        self._metadatas: List[Dict[str, Any]] = []
+        self._norms = np.zeros(0, dtype=np.float32)
+        self._timestamps = np.zeros(0, dtype=np.int64)
+        self._alive = np.zeros(0, dtype=bool)
+        self._vectors: Optional[np.memmap] = None
+        self._assignments: Optional[np.memmap] = None
+        self._codes: Optional[np.memmap] = None
+        self._centroids: Optional[np.ndarray] = None
+        self._sq: Optional[np.ndarray] = None
+        self._lists: List[np.ndarray] = []
+        self._list_tails: List[List[int]] = []
+        self._log = None
+    
+    @classmethod
+    def create(cls, path: str, dim: int, nlist: int = 1024, index_type: str = "IVF_FLAT") -> "LocalCollection":
+        os.makedirs(path, exist_ok=True)
+        collection = cls(path, dim, nlist, index_type)
+        collection._save_meta()
+        collection._open()
+        return collection
+    
+    @classmethod
+    def open(cls, path: str) -> "LocalCollection":
+        with open(os.path.join(path, "collection.json")) as f:
+            meta = json.load(f)
+        collection = cls(path, meta["dim"], meta.get("nlist", 1024), meta.get("index_type", "IVF_FLAT"))
+        collection._open(rebuild=meta.get("building", False))
+        return collection
+    
+    def _save_meta(self, building: bool = False) -> None:
+        meta = {"dim": self.dim, "metric": "L2", "nlist": self.nlist, "index_type": self.index_type}
+        if building:
+            meta["building"] = True
+        tmp_path = os.path.join(self.path, "collection.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, os.path.join(self.path, "collection.json"))
+    
+    def _open(self, rebuild: bool = False) -> None:
+        self._replay_log()
+        if rebuild:
+            # A reindex was interrupted: its files may be half written, so
+            # drop the index and train a fresh one
+            for name in ("centroids.npy", "sq8.npy", "codes.u8"):
+                if os.path.exists(os.path.join(self.path, name)):
+                    os.remove(os.path.join(self.path, name))
+        self._map_files(max(self.INITIAL_CAPACITY, self.count))
+        if self.count:
+            for start in range(0, self.count, self.CHUNK_ROWS):
+                stop = min(start + self.CHUNK_ROWS, self.count)
+                chunk = np.asarray(self._vectors[start:stop])
+                self._norms[start:stop] = np.einsum("ij,ij->i", chunk, chunk)
+        centroids_path = os.path.join(self.path, "centroids.npy")
+        if os.path.exists(centroids_path):
+            self._centroids = np.load(centroids_path)
+            self._rebuild_lists()
+        sq_path = os.path.join(self.path, "sq8.npy")
+        if self.index_type == "IVF_SQ8" and os.path.exists(sq_path):
+            self._sq = np.load(sq_path)
+        self._log = open(os.path.join(self.path, "records.jsonl"), "a")
+        if rebuild:
+            self._assignments[:] = -1
+            if self._should_train():
+                self.train()
+            self._save_meta()
+    
+    def _replay_log(self) -> None:
+        log_path = os.path.join(self.path, "records.jsonl")
+        if not os.path.exists(log_path):
+            return
+        timestamps: List[int] = []
+        deletes: List[Any] = []
+        deleted_ids: List[int] = []
+        with open(log_path) as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                entry = json.loads(line)
+                if entry["op"] == "insert":
+                    self._texts.append(entry["text"])
+                    self._metadatas.append(entry["metadata"])
+                    timestamps.append(entry["timestamp"])
+                elif entry["op"] == "delete_before":
+                    deletes.append((len(timestamps), entry["timestamp"]))
+                elif entry["op"] == "delete_ids":
+                    deleted_ids.extend(entry["ids"])
+        self.count = len(timestamps)
+        self._timestamps = np.array(timestamps, dtype=np.int64)
+        self._alive = np.ones(self.count, dtype=bool)
+        self._norms = np.zeros(self.count, dtype=np.float32)
+        for rows, cutoff in deletes:
+            self._alive[:rows] &= self._timestamps[:rows] >= cutoff
+        self._alive[np.asarray(deleted_ids, dtype=np.int64)] = False
+    
+    def _map_files(self, capacity: int) -> None:
+        vectors_path = os.path.join(self.path, "vectors.f32")
+        lists_path = os.path.join(self.path, "lists.i32")
+        codes_path = os.path.join(self.path, "codes.u8")
+        files = [(vectors_path, self.dim * 4, 0), (lists_path, 4, -1)]
+        if self.index_type == "IVF_SQ8":
+            files.append((codes_path, self.dim, 0))
+        for file_path, row_bytes, fill in files:
+            if not os.path.exists(file_path):
+                open(file_path, "wb").close()
+            size = os.path.getsize(file_path)
+            if size < capacity * row_bytes:
+                with open(file_path, "r+b") as f:
+                    f.truncate(capacity * row_bytes)
+                if fill:
+                    extra = np.memmap(file_path, dtype=np.int32, mode="r+", offset=size, shape=((capacity * row_bytes - size) // 4,))
+                    extra[:] = fill
+                    extra.flush()
+                    del extra
+        self._vectors = np.memmap(vectors_path, dtype=np.float32, mode="r+", shape=(capacity, self.dim))
+        self._assignments = np.memmap(lists_path, dtype=np.int32, mode="r+", shape=(capacity,))
+        if self.index_type == "IVF_SQ8":
+            self._codes = np.memmap(codes_path, dtype=np.uint8, mode="r+", shape=(capacity, self.dim))
+        for name in ("_norms", "_timestamps", "_alive"):
+            array = getattr(self, name)
+            grown = np.zeros(capacity, dtype=array.dtype)
+            grown[:len(array)] = array[:capacity]
+            setattr(self, name, grown)
+        self._capacity = capacity
+    
+    def _ensure_capacity(self, rows: int) -> None:
+        if rows <= self._capacity:
+            return
+        self._unmap_files()
+        self._map_files(max(rows, self._capacity * 2))
+    
+    def _unmap_files(self) -> None:
+        for name in ("_vectors", "_assignments", "_codes"):
+            array = getattr(self, name)
+            if array is not None:
+                array.flush()
+            setattr(self, name, None)
+    
+    def insert(
+        self,
+        texts: List[str],
+        embeddings: List[List[float]],
+        timestamps: List[int],
+        metadatas: List[Dict[str, Any]]
+    ) -> None:
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(len(texts), -1)
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dim embeddings, got {vectors.shape[1]}")
+        with self._lock:
+            start, stop = self.count, self.count + len(texts)
+            self._ensure_capacity(stop)
+            self._vectors[start:stop] = vectors
+            self._norms[start:stop] = np.einsum("ij,ij->i", vectors, vectors)
+            self._timestamps[start:stop] = timestamps
+            self._alive[start:stop] = True
+            if self._centroids is not None:
+                labels = self._nearest_centroids(vectors)
+                self._assignments[start:stop] = labels
+                for row, label in zip(range(start, stop), labels):
+                    self._list_tails[label].append(row)
+            if self._sq is not None:
+                self._codes[start:stop] = self._encode(vectors, self._sq)
+            # The log is written last: a row only exists once its entry is logged
+            self._log.write("".join(
+                json.dumps({"op": "insert", "text": text, "timestamp": int(ts), "metadata": metadata}) + "\n"
+                for text, ts, metadata in zip(texts, timestamps, metadatas)
+            ))
+            self._log.flush()
+            self._texts.extend(texts)
+            self._metadatas.extend(metadatas)
+            self.count = stop
+            if self._should_train():
+                self.train()
+    
+    def _should_train(self) -> bool:
+        return (
+            self.index_type != "FLAT"
+            and self._centroids is None
+            and self.count >= self.nlist * self.TRAIN_POINTS_PER_LIST
+        )
+    
+    def delete_older_than(self, cutoff_timestamp: int) -> int:
+        with self._lock:
+            expired = self._alive[:self.count] & (self._timestamps[:self.count] < cutoff_timestamp)
+            deleted = int(expired.sum())
+            if deleted:
+                self._alive[:self.count] &= ~expired
+                self._log.write(json.dumps({"op": "delete_before", "timestamp": int(cutoff_timestamp)}) + "\n")
+                self._log.flush()
+            return deleted
+    
+    def fetch_older_than(self, cutoff_timestamp: int, limit: int) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = np.flatnonzero(
+                self._alive[:self.count] & (self._timestamps[:self.count] < cutoff_timestamp)
+            )[:limit]
+            vectors = np.asarray(self._vectors[rows])
+            return [
+                {
+                    "id": int(row),
+                    "text": self._texts[row],
+                    "timestamp": int(self._timestamps[row]),
+                    "metadata": self._metadatas[row],
+                    "embedding": vector
+                }
+                for row, vector in zip(rows, vectors)
+            ]
+    
+    def delete_ids(self, ids: List[int]) -> int:
+        with self._lock:
+            rows = np.asarray([i for i in ids if 0 <= i < self.count], dtype=np.int64)
+            rows = rows[self._alive[rows]]
+            if len(rows):
+                self._alive[rows] = False
+                self._log.write(json.dumps({"op": "delete_ids", "ids": rows.tolist()}) + "\n")
+                self._log.flush()
+            return len(rows)
+    
+    def train(self) -> None:
+        with self._lock:
+            self._install(self._build(self.index_type, self.nlist))
+    
+    def reindex(self, index_type: str, nlist: int) -> None:
+        # Online: the new index is built from a snapshot without the lock, so
+        # inserts and searches carry on against the old one; rows inserted in
+        # the meantime are assigned when the new index is swapped in
+        if index_type not in self.INDEX_TYPES:
+            raise ValueError(f"Index type {index_type} is not supported by the local backend")
+        index = self._build(index_type, nlist)
+        with self._lock:
+            self._install(index)
+        logger.info(f"Reindexed {self.path} as {index_type} (nlist={nlist}) over {index['count']} vectors")
+    
+    def _build(self, index_type: str, nlist: int) -> Dict[str, Any]:
+        # k-means over a sample of live rows, then every row's list and, for
+        # IVF_SQ8, its codes, written to codes.u8.next. Only reads rows that
+        # exist at the start, through memmaps that stay valid if inserts grow
+        # the files meanwhile.
+        with self._lock:
+            count = self.count
+            vectors = self._vectors
+            rows = np.flatnonzero(self._alive[:count])
+        index: Dict[str, Any] = {
+            "index_type": index_type,
+            "nlist": nlist,
+            "count": count,
+            "centroids": None,
+            "assignments": None,
+            "sq": None,
+            "codes_path": None
+        }
+        if index_type == "FLAT" or not len(rows):
+            return index
+        nlist = min(nlist, max(1, len(rows) // self.TRAIN_POINTS_PER_LIST))
+        rng = np.random.default_rng(0)
+        sample_rows = np.sort(rng.choice(rows, size=min(len(rows), self.MAX_TRAIN_POINTS), replace=False))
+        sample = np.asarray(vectors[sample_rows])
+        centroids = sample[rng.choice(len(sample), size=nlist, replace=False)].copy()
+        for _ in range(self.KMEANS_ITERATIONS):
+            labels = self._nearest(sample, centroids)
+            order = np.argsort(labels, kind="stable")
+            counts = np.bincount(labels, minlength=nlist)
+            filled = np.flatnonzero(counts)
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[filled]
+            centroids[filled] = np.add.reduceat(sample[order], starts, axis=0) / counts[filled, None]
+            empty = counts == 0
+            if empty.any():
+                centroids[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+        centroids = centroids.astype(np.float32)
+        assignments = np.empty(count, dtype=np.int32)
+        codes = None
+        if index_type == "IVF_SQ8":
+            low, high = sample.min(axis=0), sample.max(axis=0)
+            scale = (high - low) / 255
+            index["sq"] = np.stack([low, np.where(scale > 0, scale, 1.0)]).astype(np.float32)
+            index["codes_path"] = os.path.join(self.path, "codes.u8.next")
+            codes = np.memmap(index["codes_path"], dtype=np.uint8, mode="w+", shape=(max(count, 1), self.dim))
+        for start in range(0, count, self.CHUNK_ROWS):
+            stop = min(start + self.CHUNK_ROWS, count)
+            chunk = np.asarray(vectors[start:stop])
+            assignments[start:stop] = self._nearest(chunk, centroids)
+            if codes is not None:
+                codes[start:stop] = self._encode(chunk, index["sq"])
+        if codes is not None:
+            codes.flush()
+            del codes
+        index["centroids"] = centroids
+        index["assignments"] = assignments
+        return index
+    
+    def _install(self, index: Dict[str, Any]) -> None:
+        # Under the lock. collection.json is marked "building" while the files
+        # change, so a crash part way through retrains on open instead of
+        # searching a mix of the old and new index.
+        self.index_type, self.nlist = index["index_type"], index["nlist"]
+        self._save_meta(building=True)
+        centroids, sq = index["centroids"], index["sq"]
+        self._unmap_files()
+        codes_path = os.path.join(self.path, "codes.u8")
+        if index["codes_path"] is not None:
+            os.replace(index["codes_path"], codes_path)
+        elif os.path.exists(codes_path):
+            os.remove(codes_path)
+        self._map_files(self._capacity)
+        self._assignments[:] = -1
+        if centroids is not None:
+            built = index["count"]
+            self._assignments[:built] = index["assignments"]
+            for start in range(built, self.count, self.CHUNK_ROWS):
+                stop = min(start + self.CHUNK_ROWS, self.count)
+                chunk = np.asarray(self._vectors[start:stop])
+                self._assignments[start:stop] = self._nearest(chunk, centroids)
+                if sq is not None:
+                    self._codes[start:stop] = self._encode(chunk, sq)
+        self._assignments.flush()
+        if self._codes is not None:
+            self._codes.flush()
+        for name, array in (("centroids.npy", centroids), ("sq8.npy", sq)):
+            file_path = os.path.join(self.path, name)
+            if array is not None:
+                np.save(file_path, array)
+            elif os.path.exists(file_path):
+                os.remove(file_path)
+        self._centroids, self._sq = centroids, sq
+        if centroids is not None:
+            self._rebuild_lists()
+            logger.info(f"Trained {self.index_type} index with {len(centroids)} lists over {self.count} vectors")
+        else:
+            self._lists, self._list_tails = [], []
+        self._save_meta()
+    
+    @staticmethod
+    def _encode(vectors: np.ndarray, sq: np.ndarray) -> np.ndarray:
+        return np.clip(np.rint((vectors - sq[0]) / sq[1]), 0, 255).astype(np.uint8)
+    
+    def _rebuild_lists(self) -> None:
+        nlist = len(self._centroids)
+        labels = np.asarray(self._assignments[:self.count])
+        order = np.argsort(labels, kind="stable")
+        bounds = np.searchsorted(labels[order], np.arange(nlist + 1))
+        self._lists = [order[bounds[i]:bounds[i + 1]] for i in range(nlist)]
+        self._list_tails = [[] for _ in range(nlist)]
+    
+    def _list_rows(self, label: int) -> np.ndarray:
+        if self._list_tails[label]:
+            self._lists[label] = np.concatenate([
+                self._lists[label],
+                np.asarray(self._list_tails[label], dtype=self._lists[label].dtype)
+            ])
+            self._list_tails[label] = []
+        return self._lists[label]
+    
+    @staticmethod
+    def _nearest(vectors: np.ndarray, centroids: np.ndarray, chunk_rows: int = 8192) -> np.ndarray:
+        norms = np.einsum("ij,ij->i", centroids, centroids)
+        labels = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), chunk_rows):
+            chunk = vectors[start:start + chunk_rows]
+            labels[start:start + chunk_rows] = np.argmin(norms[None, :] - 2 * chunk @ centroids.T, axis=1)
+        return labels
+    
+    def _nearest_centroids(self, vectors: np.ndarray) -> np.ndarray:
+        return self._nearest(vectors, self._centroids).astype(np.int32)
+    
+    def search(self, vectors: List[List[float]], k: int, nprobe: int = 10) -> List[List[Dict[str, Any]]]:
+        queries = np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1)
+        with self._lock:
+            if self._centroids is None:
+                rows = np.arange(self.count)
+                candidates = [rows] * len(queries)
+            else:
+                centroid_norms = np.einsum("ij,ij->i", self._centroids, self._centroids)
+                centroid_distances = centroid_norms[None, :] - 2 * queries @ self._centroids.T
+                nprobe = min(nprobe, len(self._centroids))
+                probes = np.argpartition(centroid_distances, nprobe - 1, axis=1)[:, :nprobe]
+                candidates = [
+                    np.concatenate([self._list_rows(label) for label in labels])
+                    for labels in probes
+                ]
+            results = []
+            for query, rows in zip(queries, candidates):
+                rows = rows[self._alive[rows]]
+                results.append(self._top_k(query, rows, k))
+            return results
+    
+    def _top_k(self, query: np.ndarray, rows: np.ndarray, k: int) -> List[Dict[str, Any]]:
+        if len(rows) == 0:
+            return []
+        if self._codes is not None and self._sq is not None and len(rows) > k * self.RERANK_FACTOR:
+            rows = self._shortlist(query, rows, k * self.RERANK_FACTOR)
+        # Probed lists come back in list order; sorted, distinct rows that
+        # cover the whole collection are exactly 0..count-1
+        rows = np.sort(rows)
+        if len(rows) == self.count:
+            # Contiguous scan, no gather copy
+            candidates = self._vectors[:self.count]
+        else:
+            candidates = self._vectors[rows]
+        distances = self._norms[rows] - 2 * (candidates @ query) + float(query @ query)
+        k = min(k, len(rows))
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top])]
+        return [
+            {
+                "id": int(rows[i]),
+                "text": self._texts[rows[i]],
+                "timestamp": int(self._timestamps[rows[i]]),
+                "metadata": self._metadatas[rows[i]],
+                "distance": float(max(distances[i], 0.0))
+            }
+            for i in top
+        ]
+    
+    def _shortlist(self, query: np.ndarray, rows: np.ndarray, size: int) -> np.ndarray:
+        # Approximate distances over the codes; x ~= offset + scale * code
+        rows = np.sort(rows)
+        # Same contiguous shortcut as _top_k, valid because rows are sorted
+        codes = self._codes[:self.count] if len(rows) == self.count else self._codes[rows]
+        offset, scale = self._sq
+        approximate = self._norms[rows] - 2 * (codes @ (query * scale) + float(query @ offset))
+        return rows[np.argpartition(approximate, size - 1)[:size]]
+    
+    def index_bytes(self) -> Dict[str, int]:
+        # What a search keeps resident besides the vectors it touches
+        with self._lock:
+            lists = sum(rows.nbytes for rows in self._lists)
+            return {
+                "centroids": 0 if self._centroids is None else int(self._centroids.nbytes),
+                "lists": int(lists),
+                "codes": self.count * self.dim if self._codes is not None else 0,
+                "vectors": self.count * self.dim * 4
+            }
+    
+    def live_count(self) -> int:
+        return int(self._alive[:self.count].sum())
+    
+    def close(self) -> None:
+        with self._lock:
+            if self._vectors is not None:
+                self._unmap_files()
+            if self._log is not None:
+                self._log.close()
+                self._log = None
+
+class LocalVectorStore(VectorStore):
+    # In-process backend: NumPy brute force for small collections and an IVF
+    # index (k-means lists, nprobe lists scanned per query, optionally over
+    # 8-bit codes) once a collection has enough vectors to train one. Intended for tests, dev boxes and small
+    # single-node deployments that should not need a Milvus server.
+    # Each partition is its own LocalCollection under <name>/partitions/,
+    # opened on first use, so a tenant's searches only load and scan that
+    # tenant's vectors. Unpartitioned records live in the collection root.
+    # Open partitions (a log file and memmaps each) are checked out while in
+    # use and closed once unused: least recently used first beyond
+    # max_open_partitions, after idle_timeout seconds, and straight away if
+    # only a sweep (unscoped search, compaction, reindex) opened them.
+    def __init__(
+        self,
+        path: str,
+        nlist: int = 1024,
+        index_type: str = "IVF_FLAT",
+        max_open_partitions: int = 256,
+        idle_timeout: float = 600.0
+    ):
+        if index_type not in LocalCollection.INDEX_TYPES:
+            raise ValueError(f"Index type {index_type} is not supported by the local backend")
+        self.path = path
+        self.nlist = nlist
+        self.index_type = index_type
+        self.max_open_partitions = max_open_partitions
+        self.idle_timeout = idle_timeout
+        self._collections: Dict[str, LocalCollection] = {}
+        # Least recently used first
+        self._partitions: "OrderedDict[Tuple[str, str], LocalCollection]" = OrderedDict()
+        self._refcounts: Dict[Tuple[str, str], int] = {}
+        self._last_used: Dict[Tuple[str, str], float] = {}
+        self._swept: Set[Tuple[str, str]] = set()
+        self._lock = threading.Lock()
+        self.partition_evictions = 0
+        os.makedirs(path, exist_ok=True)
+    
+    def _collection(self, name: str) -> LocalCollection:
+        with self._lock:
+            collection = self._collections.get(name)
+            if collection is None:
+                collection_path = os.path.join(self.path, name)
+                if not os.path.exists(os.path.join(collection_path, "collection.json")):
+                    raise ValueError(f"Collection {name} does not exist")
+                collection = LocalCollection.open(collection_path)
+                self._collections[name] = collection
+            return collection
+    
+    def _partition_path(self, name: str, partition: str) -> str:
+        digest = hashlib.sha1(partition.encode()).hexdigest()[:16]
+        return os.path.join(self.path, name, "partitions", digest)
+    
+    @contextmanager
+    def _partition(
+        self,
+        name: str,
+        partition: Optional[str],
+        create: bool = False,
+        sweep: bool = False
+    ) -> Iterator[Optional[LocalCollection]]:
+        if partition is None or partition == DEFAULT_PARTITION:
+            yield self._collection(name)
+            return
+        root = self._collection(name)
+        key = (name, partition)
+        with self._lock:
+            collection = self._partitions.get(key)
+            if collection is None:
+                path = self._partition_path(name, partition)
+                if os.path.exists(os.path.join(path, "collection.json")):
+                    collection = LocalCollection.open(path)
+                elif create:
+                    collection = LocalCollection.create(path, root.dim, self.nlist, self.index_type)
+                    with open(os.path.join(path, "partition"), "w") as f:
+                        f.write(partition)
+                if collection is not None:
+                    self._partitions[key] = collection
+                    self._refcounts[key] = 0
+                    if sweep:
+                        self._swept.add(key)
+            if collection is not None:
+                if not sweep:
+                    self._swept.discard(key)
+                self._partitions.move_to_end(key)
+                self._refcounts[key] += 1
+        if collection is None:
+            yield None
+            return
+        try:
+            yield collection
+        finally:
+            with self._lock:
+                self._refcounts[key] -= 1
+                self._last_used[key] = time.monotonic()
+            self.evict_partitions()
+    
+    def evict_partitions(self, now: Optional[float] = None) -> int:
+        now = time.monotonic() if now is None else now
+        evicted = 0
+        with self._lock:
+            excess = len(self._partitions) - self.max_open_partitions
+            for key in [key for key in self._partitions if self._refcounts[key] == 0]:
+                if excess > 0 or key in self._swept or now - self._last_used[key] >= self.idle_timeout:
+                    self._close_partition(key)
+                    excess -= 1
+                    evicted += 1
+        return evicted
+    
+    def _close_partition(self, key: Tuple[str, str]) -> None:
+        collection = self._partitions.pop(key)
+        self._refcounts.pop(key, None)
+        self._last_used.pop(key, None)
+        self._swept.discard(key)
+        collection.close()
+        self.partition_evictions += 1
+    
+    def _sweep(self, name: str) -> Iterator[Tuple[Optional[str], LocalCollection]]:
+        # Every partition in turn, for unscoped searches and maintenance
+        yield None, self._collection(name)
+        directory = os.path.join(self.path, name, "partitions")
+        if not os.path.isdir(directory):
+            return
+        for entry in sorted(os.listdir(directory)):
+            marker = os.path.join(directory, entry, "partition")
+            if not os.path.exists(marker):
+                continue
+            with open(marker) as f:
+                partition = f.read()
+            with self._partition(name, partition, sweep=True) as collection:
+                if collection is not None:
+                    yield partition, collection
+    
+    def ensure_collection(self, name: str, dim: int) -> None:
+        collection_path = os.path.join(self.path, name)
+        if not os.path.exists(os.path.join(collection_path, "collection.json")):
+            with self._lock:
+                self._collections[name] = LocalCollection.create(collection_path, dim, self.nlist, self.index_type)
+            logger.info(f"Created local collection {name}")
+            return
+        collection = self._collection(name)
+        if collection.dim != dim:
+            raise ValueError(
+                f"Collection {name} stores {collection.dim}-dim embeddings but "
+                f"EMBEDDING_DIM is {dim}"
+            )
+    
+    def insert(
+        self,
+        name: str,
+        texts: List[str],
+        embeddings: List[List[float]],
+        timestamps: List[int],
+        metadatas: List[Dict[str, Any]],
+        partitions: Optional[List[Optional[str]]] = None
+    ) -> None:
+        if partitions is None:
+            self._collection(name).insert(texts, embeddings, timestamps, metadatas)
+            return
+        groups: Dict[Optional[str], List[int]] = {}
+        for index, partition in enumerate(partitions):
+            groups.setdefault(partition, []).append(index)
+        for partition, rows in groups.items():
+            with self._partition(name, partition, create=True) as collection:
+                collection.insert(
+                    [texts[i] for i in rows],
+                    [embeddings[i] for i in rows],
+                    [timestamps[i] for i in rows],
+                    [metadatas[i] for i in rows]
+                )
+    
+    def search(
+        self,
+        name: str,
+        vectors: List[List[float]],
+        k: int,
+        search_params: Dict[str, Any],
+        partitions: Optional[List[Optional[str]]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        nprobe = search_params.get("params", {}).get("nprobe", 10)
+        partitions = partitions or [None] * len(vectors)
+        groups: Dict[Optional[str], List[int]] = {}
+        for index, partition in enumerate(partitions):
+            groups.setdefault(partition, []).append(index)
+        results: List[List[Dict[str, Any]]] = [[] for _ in vectors]
+        for partition, rows in groups.items():
+            queries = [vectors[i] for i in rows]
+            if partition is not None:
+                with self._partition(name, partition) as collection:
+                    hits = collection.search(queries, k, nprobe=nprobe) if collection else [[] for _ in rows]
+            else:
+                # Unscoped: best k across every partition
+                per_partition = [
+                    collection.search(queries, k, nprobe=nprobe)
+                    for _, collection in self._sweep(name)
+                ]
+                hits = [
+                    sorted((hit for found in per_query for hit in found), key=lambda hit: hit["distance"])[:k]
+                    for per_query in zip(*per_partition)
+                ]
+            for index, found in zip(rows, hits):
+                results[index] = found
+        return results
+    
+    def delete_older_than(self, name: str, cutoff_timestamp: int) -> None:
+        deleted = sum(
+            collection.delete_older_than(cutoff_timestamp)
+            for _, collection in self._sweep(name)
+        )
+        logger.info(f"Deleted {deleted} memories from local collection {name}")
+    
+    def fetch_older_than(self, name: str, cutoff_timestamp: int, limit: int) -> List[Dict[str, Any]]:
+        rows: List[Dict[str, Any]] = []
+        with closing(self._sweep(name)) as partitions:
+            for partition, collection in partitions:
+                if len(rows) >= limit:
+                    break
+                found = collection.fetch_older_than(cutoff_timestamp, limit - len(rows))
+                rows.extend({**row, "partition": partition} for row in found)
+        return rows
+    
+    def delete_ids(self, name: str, ids: List[int], partition: Optional[str] = None) -> None:
+        with self._partition(name, partition) as collection:
+            if collection is not None:
+                collection.delete_ids(ids)
+    
+    def reindex(self, name: str, index_type: str, index_params: Dict[str, Any]) -> None:
+        # Partition by partition; partitions created afterwards use the new
+        # index too
+        nlist = index_params.get("nlist", self.nlist)
+        if index_type not in LocalCollection.INDEX_TYPES:
+            raise ValueError(f"Index type {index_type} is not supported by the local backend")
+        for _, collection in self._sweep(name):
+            collection.reindex(index_type, nlist)
+        self.index_type, self.nlist = index_type, nlist
+    
+    def close(self) -> None:
+        with self._lock:
+            for collection in [*self._collections.values(), *self._partitions.values()]:
+                collection.close()
+            self._collections.clear()
+            self._partitions.clear()
+            self._refcounts.clear()
+            self._last_used.clear()
+            self._swept.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        # Loaded partitions are listed as "<collection>[<partition>]"
+        with self._lock:
+            entries = [
+                *self._collections.items(),
+                *((f"{name}[{partition}]", collection) for (name, partition), collection in self._partitions.items())
+            ]
+            return {
+                name: {
+                    "rows": collection.count,
+                    "live": collection.live_count(),
+                    "trained": collection._centroids is not None
+                }
+                for name, collection in entries
+            }
\ No newline at end of file
@@ -0,0 +1,88 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Tuple, TypeVar
+from pymilvus import connections
+from loguru import logger
+
+from ..core.metrics import stage
+
+T = TypeVar("T")
+
+class ConnectionPool:
+    # Shares one pymilvus connection per (host, port) endpoint across every
+    # AtlasMemory in the process. A pymilvus alias wraps a single gRPC channel,
+    # which already multiplexes concurrent calls, so the pool only has to make
+    # sure we connect once and disconnect when the last user goes away.
+    def __init__(self):
+        self._aliases: Dict[Tuple[str, int], str] = {}
+        self._refcounts: Dict[Tuple[str, int], int] = {}
+        self._lock = threading.Lock()
+    
+    def acquire(self, host: str, port: int) -> str:
+        key = (host, int(port))
+        with self._lock:
+            alias = self._aliases.get(key)
+            if alias is None:
+                alias = f"atlas_{host}_{port}"
+                connections.connect(alias=alias, host=host, port=port)
+                self._aliases[key] = alias
+                self._refcounts[key] = 0
+                logger.info(f"Opened Milvus connection {alias}")
+            self._refcounts[key] += 1
+            return alias
+    
+    def release(self, host: str, port: int) -> None:
+        key = (host, int(port))
+        with self._lock:
+            if key not in self._refcounts:
+                return
+            self._refcounts[key] -= 1
+            if self._refcounts[key] > 0:
+                return
+            alias = self._aliases.pop(key)
+            self._refcounts.pop(key)
+        try:
+            connections.disconnect(alias)
+            logger.info(f"Closed Milvus connection {alias}")
+        except Exception as e:
+            logger.warning(f"Failed to close Milvus connection {alias}: {str(e)}")
+
+connection_pool = ConnectionPool()
+
+class MemoryExecutor:
+    # Runs blocking vector store calls on a bounded thread pool so the event
+    # loop keeps serving other requests while one waits on Milvus.
+    def __init__(self, max_concurrency: int = 8):
+        self.max_concurrency = max_concurrency
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_concurrency,
+            thread_name_prefix="atlas-memory"
+        )
+        self._in_flight = 0
+        self.completed = 0
+    
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        loop = asyncio.get_running_loop()
+        self._in_flight += 1
+        try:
+            # Includes the wait for a free thread
+            with stage("vector_store", getattr(fn, "__name__", "call")):
+                return await loop.run_in_executor(
+                    self._pool,
+                    functools.partial(fn, *args, **kwargs)
+                )
+        finally:
+            self._in_flight -= 1
+            self.completed += 1
+    
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+    
+    def stats(self) -> Dict[str, int]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self._in_flight,
+            "completed": self.completed
+        }
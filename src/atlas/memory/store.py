@@ -0,0 +1,74 @@
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+
+DEFAULT_PARTITION = "_default"
+
+def partition_key(user_id: Optional[str] = None, domain: Optional[str] = None) -> Optional[str]:
+    # One partition per (user, domain); None when there is no tenant to scope to
+    if user_id is None and domain is None:
+        return None
+    return f"{user_id or '_'}/{domain or '_'}"
+
+class VectorStore(ABC):
+    # Storage backend behind AtlasMemory. Every method is blocking and is
+    # called from AtlasMemory's executor, never directly on the event loop.
+    # search() returns one list of hits per query vector; each hit is a dict
+    # with "id", "text", "timestamp", "metadata" and "distance" keys.
+    # Records may carry a partition (see partition_key); a search scoped to a
+    # partition only sees that partition's records, and a None partition on
+    # search means the whole collection. search_params may carry a
+    # "consistency_level" for backends that read with bounded staleness.
+    @abstractmethod
+    def ensure_collection(self, name: str, dim: int) -> None:
+        ...
+    
+    @abstractmethod
+    def insert(
+        self,
+        name: str,
+        texts: List[str],
+        embeddings: List[List[float]],
+        timestamps: List[int],
+        metadatas: List[Dict[str, Any]],
+        partitions: Optional[List[Optional[str]]] = None
+    ) -> None:
+        ...
+    
+    @abstractmethod
+    def search(
+        self,
+        name: str,
+        vectors: List[List[float]],
+        k: int,
+        search_params: Dict[str, Any],
+        partitions: Optional[List[Optional[str]]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        ...
+    
+    @abstractmethod
+    def delete_older_than(self, name: str, cutoff_timestamp: int) -> None:
+        ...
+    
+    @abstractmethod
+    def fetch_older_than(self, name: str, cutoff_timestamp: int, limit: int) -> List[Dict[str, Any]]:
+        # Up to limit records older than the cutoff, as search hits plus
+        # "embedding" and "partition" keys and without "distance"; used for
+        # bounded batches
+        ...
+    
+    @abstractmethod
+    def delete_ids(self, name: str, ids: List[int], partition: Optional[str] = None) -> None:
+        # Ids as returned by search/fetch_older_than for that partition
+        ...
+    
+    @abstractmethod
+    def reindex(self, name: str, index_type: str, index_params: Dict[str, Any]) -> None:
+        # Rebuilds the vector index of a collection with new settings while
+        # it stays searchable and writable
+        ...
+    
+    def close(self) -> None:
+        pass
+    
+    def stats(self) -> Dict[str, Any]:
+        return {}
\ No newline at end of file
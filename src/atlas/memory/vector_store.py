@@ -1,158 +1,741 @@
-from typing import List, Dict, Any, Optional
+import asyncio
+import json
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Dict, Any, Optional, Callable, Iterator, Set, Tuple
 from datetime import datetime, timedelta
 from pymilvus import (
     Collection,
-    connections,
     FieldSchema,
     CollectionSchema,
     DataType,
     utility
 )
 from ..core.config import AtlasConfig
+from ..core.metrics import instrumented, stage
+import numpy as np
+from .pool import connection_pool, MemoryExecutor
+from .compaction import MemoryCompactor, cold_collection
+from .ingestion import IngestionQueue, MemoryRecord
+from .embeddings import EmbeddingEngine
+from .store import DEFAULT_PARTITION, VectorStore, partition_key
 from loguru import logger
 
-class AtlasMemory:
+class CollectionManager:
+    # Keeps Collection handles loaded across calls instead of paying a full
+    # load()/release() per request. Idle collections (no active users for
+    # idle_timeout seconds) are released lazily on the next acquire.
+    def __init__(
+        self,
+        idle_timeout: float = 600.0,
+        collection_factory: Callable[[str], Any] = Collection
+    ):
+        self.idle_timeout = idle_timeout
+        self._collection_factory = collection_factory
+        self._collections: Dict[str, Any] = {}
+        self._refcounts: Dict[str, int] = {}
+        self._checkouts: Dict[str, Set[int]] = {}
+        self._last_used: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._returned = threading.Condition(self._lock)
+        self._next_ticket = 0
+        self.loads = 0
+        self.evictions = 0
+    
+    @contextmanager
+    def acquire(self, name: str) -> Iterator[Any]:
+        collection, ticket = self._checkout(name)
+        try:
+            yield collection
+        finally:
+            self._checkin(name, ticket)
+    
+    def _checkout(self, name: str) -> Tuple[Any, int]:
+        self.evict_idle()
+        with self._lock:
+            collection = self._collections.get(name)
+            if collection is None:
+                collection = self._collection_factory(name)
+                collection.load()
+                self._collections[name] = collection
+                self._refcounts[name] = 0
+                self.loads += 1
+                logger.info(f"Loaded collection {name}")
+            self._refcounts[name] += 1
+            self._last_used[name] = time.monotonic()
+            self._next_ticket += 1
+            self._checkouts.setdefault(name, set()).add(self._next_ticket)
+            return collection, self._next_ticket
+    
+    def _checkin(self, name: str, ticket: int) -> None:
+        with self._lock:
+            if name in self._refcounts:
+                self._refcounts[name] -= 1
+                self._last_used[name] = time.monotonic()
+            checkouts = self._checkouts.get(name)
+            if checkouts is not None:
+                checkouts.discard(ticket)
+                if not checkouts:
+                    del self._checkouts[name]
+            self._returned.notify_all()
+    
+    def drain(self, name: str, timeout: float) -> bool:
+        # Wait for the handles checked out so far to come back; checkouts
+        # made after the call don't hold it up. False on timeout.
+        deadline = time.monotonic() + timeout
+        with self._lock:
+            pending = set(self._checkouts.get(name, ()))
+            while pending & self._checkouts.get(name, set()):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._returned.wait(remaining)
+        return True
+    
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            idle = [
+                name for name, refs in self._refcounts.items()
+                if refs == 0 and now - self._last_used[name] >= self.idle_timeout
+            ]
+            for name in idle:
+                self._release(name)
+        return len(idle)
+    
+    def invalidate(self, name: str) -> None:
+        # Drop a cached handle, e.g. after the collection was dropped or re-created
+        with self._lock:
+            if name in self._collections:
+                self._release(name)
+    
+    def release_all(self) -> None:
+        with self._lock:
+            for name in list(self._collections):
+                self._release(name)
+    
+    def _release(self, name: str) -> None:
+        collection = self._collections.pop(name)
+        self._refcounts.pop(name, None)
+        self._last_used.pop(name, None)
+        try:
+            collection.release()
+        except Exception as e:
+            logger.warning(f"Failed to release collection {name}: {str(e)}")
+        self.evictions += 1
+        logger.info(f"Released collection {name}")
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "resident": len(self._collections),
+                "in_use": sum(1 for refs in self._refcounts.values() if refs > 0)
+            }
+
+class MilvusVectorStore(VectorStore):
+    # Collections use a "partition" VARCHAR partition key (see partition_key).
+    # Scoped searches filter on it, which Milvus turns into partition pruning,
+    # so a tenant's search cost follows that tenant's data rather than the
+    # whole collection. Collections created before partitioning have no such
+    # field; unscoped calls keep working on them, but scoped searches are
+    # refused, since they would see every tenant's memories. reindex() is the
+    # migration: it copies them into a partitioned generation, placing each
+    # row by the user and domain in its stored agent context.
+    # reindex() builds a new generation "<name>__v<n>" with the new index and
+    # serves the name through an alias from then on.
+    COPY_BATCH_SIZE = 1000
+    DRAIN_TIMEOUT_SECONDS = 30.0
+    
     def __init__(self, config: AtlasConfig):
         self.config = config
+        self.alias = 'default'
+        self._partitioned: Dict[str, bool] = {}
+        self.collections = CollectionManager(
+            idle_timeout=config.MEMORY_COLLECTION_IDLE_SECONDS,
+            collection_factory=lambda name: Collection(name, using=self.alias)
+        )
         self._initialize_connection()
-        self._ensure_collection_exists()
     
     def _initialize_connection(self) -> None:
         try:
-            connections.connect(
-                host=self.config.VECTOR_DB_URL,
-                port=self.config.VECTOR_DB_PORT
+            self.alias = connection_pool.acquire(
+                self.config.VECTOR_DB_URL,
+                self.config.VECTOR_DB_PORT
             )
             logger.info("Connected to Milvus successfully")
         except Exception as e:
             logger.error(f"Failed to connect to Milvus: {str(e)}")
             raise
     
-    def _ensure_collection_exists(self) -> None:
-        try:
-            if not utility.has_collection(self.config.MEMORY_COLLECTION_NAME):
-                self._create_collection()
-            logger.info(f"Collection {self.config.MEMORY_COLLECTION_NAME} is ready")
-        except Exception as e:
-            logger.error(f"Failed to ensure collection exists: {str(e)}")
-            raise
+    def ensure_collection(self, name: str, dim: int) -> None:
+        if not utility.has_collection(name, using=self.alias):
+            self._create_collection(name, dim)
+        else:
+            self._validate_collection_schema(name, dim)
     
-    def _create_collection(self) -> None:
+    def _create_collection(
+        self,
+        name: str,
+        dim: int,
+        index_type: Optional[str] = None,
+        index_params: Optional[Dict[str, Any]] = None
+    ) -> Any:
         fields = [
             FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=True),
             FieldSchema(name="text", dtype=DataType.VARCHAR, max_length=65535),
-            FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=1536),  # Matches Mixtral embedding dim
+            FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=dim),
             FieldSchema(name="timestamp", dtype=DataType.INT64),
-            FieldSchema(name="metadata", dtype=DataType.JSON)
+            FieldSchema(name="metadata", dtype=DataType.JSON),
+            FieldSchema(name="partition", dtype=DataType.VARCHAR, max_length=512, is_partition_key=True)
         ]
         schema = CollectionSchema(fields=fields, description="Atlas memory storage")
         collection = Collection(
-            name=self.config.MEMORY_COLLECTION_NAME,
+            name=name,
             schema=schema,
-            using='default'
+            using=self.alias,
+            num_partitions=self.config.MEMORY_NUM_PARTITIONS
         )
         
         # Create index for vector similarity search
-        index_params = {
-            "metric_type": "L2",
-            "index_type": "IVF_FLAT",
-            "params": {"nlist": 1024}
-        }
+        index_type = index_type or self.config.MEMORY_INDEX_TYPE
         collection.create_index(
             field_name="embedding",
-            index_params=index_params
+            index_params={
+                "metric_type": "L2",
+                "index_type": index_type,
+                "params": self.config.MEMORY_INDEX_PARAMS if index_params is None else index_params
+            }
         )
-        logger.info("Created new collection with index")
+        # Scalar index for filters on user/domain prefixes of the partition
+        collection.create_index(field_name="partition", index_name="partition_index")
+        self._partitioned[name] = True
+        logger.info(f"Created collection {name} with {index_type} index")
+        return collection
+    
+    def _validate_collection_schema(self, name: str, dim: int) -> None:
+        collection = Collection(name, using=self.alias)
+        for field in collection.schema.fields:
+            if field.name == "embedding" and field.params.get("dim") != dim:
+                raise ValueError(
+                    f"Collection {name} stores {field.params.get('dim')}-dim "
+                    f"embeddings but EMBEDDING_DIM is {dim}"
+                )
+        self._partitioned[name] = any(field.name == "partition" for field in collection.schema.fields)
+        if not self._partitioned[name]:
+            logger.warning(f"Collection {name} has no partition key; reindex it before tenant-scoped searches")
+    
+    def insert(
+        self,
+        name: str,
+        texts: List[str],
+        embeddings: List[List[float]],
+        timestamps: List[int],
+        metadatas: List[Dict[str, Any]],
+        partitions: Optional[List[Optional[str]]] = None
+    ) -> None:
+        columns = [texts, embeddings, timestamps, metadatas]
+        if self._partitioned.get(name):
+            columns.append([partition or DEFAULT_PARTITION for partition in partitions or [None] * len(texts)])
+        with self.collections.acquire(name) as collection:
+            collection.insert(columns)
+    
+    def search(
+        self,
+        name: str,
+        vectors: List[List[float]],
+        k: int,
+        search_params: Dict[str, Any],
+        partitions: Optional[List[Optional[str]]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        # One search per distinct partition among the queries
+        groups: Dict[Optional[str], List[int]] = {}
+        for index, partition in enumerate(partitions or [None] * len(vectors)):
+            groups.setdefault(partition, []).append(index)
+        if not self._partitioned.get(name) and set(groups) - {None}:
+            raise ValueError(
+                f"Collection {name} has no partition key, so a tenant-scoped search "
+                f"would see every tenant's memories; reindex it to migrate"
+            )
+        # A "consistency_level" in search_params goes to Milvus as such
+        params = dict(search_params)
+        consistency = {"consistency_level": params.pop("consistency_level")} if "consistency_level" in params else {}
+        output: List[List[Dict[str, Any]]] = [[] for _ in vectors]
+        with self.collections.acquire(name) as collection:
+            for partition, rows in groups.items():
+                results = collection.search(
+                    data=[vectors[i] for i in rows],
+                    anns_field="embedding",
+                    param=params,
+                    limit=k,
+                    expr=f"partition == {json.dumps(partition)}" if partition is not None else None,
+                    output_fields=["text", "timestamp", "metadata"],
+                    **consistency
+                )
+                for index, hits in zip(rows, results):
+                    output[index] = [
+                        {
+                            "id": hit.id,
+                            "text": hit.entity.get("text"),
+                            "timestamp": hit.entity.get("timestamp"),
+                            "metadata": hit.entity.get("metadata"),
+                            "distance": hit.distance
+                        }
+                        for hit in hits
+                    ]
+        return output
+    
+    def delete_older_than(self, name: str, cutoff_timestamp: int) -> None:
+        expr = f'timestamp < {cutoff_timestamp}'
+        with self.collections.acquire(name) as collection:
+            collection.delete(expr)
+    
+    def fetch_older_than(self, name: str, cutoff_timestamp: int, limit: int) -> List[Dict[str, Any]]:
+        fields = ["id", "text", "embedding", "timestamp", "metadata"]
+        if self._partitioned.get(name):
+            fields.append("partition")
+        with self.collections.acquire(name) as collection:
+            # Strong: compaction fetches again right after deleting a batch,
+            # and must not see the rows it just moved
+            rows = collection.query(
+                expr=f"timestamp < {cutoff_timestamp}",
+                output_fields=fields,
+                limit=limit,
+                consistency_level="Strong"
+            )
+        return [
+            {
+                "id": row["id"],
+                "text": row["text"],
+                "timestamp": row["timestamp"],
+                "metadata": row["metadata"],
+                "embedding": row["embedding"],
+                "partition": row.get("partition")
+            }
+            for row in rows
+        ]
+    
+    def delete_ids(self, name: str, ids: List[int], partition: Optional[str] = None) -> None:
+        # Primary keys are unique across partitions
+        if not ids:
+            return
+        with self.collections.acquire(name) as collection:
+            collection.delete(f"id in {[int(i) for i in ids]}")
+    
+    def _resolve(self, name: str) -> str:
+        # The generation an alias points at, or the name itself
+        for candidate in utility.list_collections(using=self.alias):
+            if candidate.startswith(f"{name}__v") and name in utility.list_aliases(candidate, using=self.alias):
+                return candidate
+        return name
+    
+    @staticmethod
+    def _row_partition(row: Dict[str, Any]) -> str:
+        # Rows from before partitioning get the partition the agent would
+        # give them today (see AtlasAgent._partition)
+        if row.get("partition"):
+            return row["partition"]
+        context = (row.get("metadata") or {}).get("context") or {}
+        return partition_key(context.get("user_id"), context.get("domain")) or DEFAULT_PARTITION
+    
+    def reindex(self, name: str, index_type: str, index_params: Dict[str, Any]) -> None:
+        # Blue/green: copy every row into a new generation built with the new
+        # index, then switch the alias over. Reads and writes keep using the
+        # old generation during the copy; auto ids grow over time, so rows
+        # written meanwhile are caught up by id before and after the switch.
+        # Rows deleted from the old generation during the copy may survive,
+        # so callers hold off compaction while this runs.
+        source_name = self._resolve(name)
+        source = Collection(source_name, using=self.alias)
+        dim = next(field.params["dim"] for field in source.schema.fields if field.name == "embedding")
+        fields = [field.name for field in source.schema.fields if field.name != "id"]
+        target_name = f"{name}__v{int(time.time())}"
+        target = self._create_collection(target_name, dim, index_type, index_params)
+        target.load()
+        
+        def copy(after: int) -> Tuple[int, int]:
+            iterator = source.query_iterator(
+                batch_size=self.COPY_BATCH_SIZE,
+                expr=f"id > {after}",
+                output_fields=["id", *fields]
+            )
+            copied = 0
+            try:
+                while True:
+                    rows = iterator.next()
+                    if not rows:
+                        return after, copied
+                    columns = [
+                        [row.get(field) for row in rows]
+                        for field in ("text", "embedding", "timestamp", "metadata")
+                    ]
+                    columns.append([self._row_partition(row) for row in rows])
+                    target.insert(columns)
+                    after = max(after, max(row["id"] for row in rows))
+                    copied += len(rows)
+            finally:
+                iterator.close()
+        
+        switched = False
+        try:
+            last_id, total = copy(-1)
+            while True:
+                last_id, copied = copy(last_id)
+                total += copied
+                if not copied:
+                    break
+            if source_name == name:
+                # First reindex: the name is a collection, not an alias yet;
+                # it is unavailable between these two calls
+                legacy_name = f"{name}__v0"
+                utility.rename_collection(name, legacy_name, using=self.alias)
+                utility.create_alias(legacy_name, name, using=self.alias)
+                source_name = legacy_name
+                # By concrete name, or copy() and release() would follow the alias
+                source = Collection(source_name, using=self.alias)
+            utility.alter_alias(target_name, name, using=self.alias)
+            switched = True
+            self._partitioned[name] = True
+            # The cached handle for name follows the alias, so it stays; calls
+            # that started before the switch may still be on the old generation
+            if not self.collections.drain(name, self.DRAIN_TIMEOUT_SECONDS):
+                logger.warning(f"Calls on {source_name} still running after {self.DRAIN_TIMEOUT_SECONDS}s")
+            # Writes that reached the old generation just before the switch
+            total += copy(last_id)[1]
+            target.flush()
+        except Exception as e:
+            logger.error(f"Failed to reindex collection {name}: {str(e)}")
+            if not switched:
+                utility.drop_collection(target_name, using=self.alias)
+            raise
+        source.release()
+        utility.drop_collection(source_name, using=self.alias)
+        logger.info(f"Reindexed {name} as {index_type}: {total} rows moved to {target_name}")
+    
+    def close(self) -> None:
+        self.collections.release_all()
+        connection_pool.release(self.config.VECTOR_DB_URL, self.config.VECTOR_DB_PORT)
+    
+    def stats(self) -> Dict[str, Any]:
+        return self.collections.stats()
+
+class AtlasMemory:
+    def __init__(self, config: AtlasConfig):
+        self.config = config
+        self.executor = MemoryExecutor(max_concurrency=config.MEMORY_IO_CONCURRENCY)
+        self.embeddings = EmbeddingEngine.from_config(config)
+        self.ingestion = IngestionQueue(
+            flush_fn=self._insert_records,
+            max_batch_size=config.MEMORY_INGEST_BATCH_SIZE,
+            flush_interval=config.MEMORY_INGEST_FLUSH_SECONDS,
+            max_queue_size=config.MEMORY_INGEST_QUEUE_SIZE,
+            spill_path=config.MEMORY_INGEST_SPILL_PATH
+        ) if config.MEMORY_WRITE_BEHIND else None
+        self.store = self._initialize_store()
+        self.search_params = {"metric_type": "L2", "params": dict(config.MEMORY_SEARCH_PARAMS)}
+        self.compactor = MemoryCompactor(
+            store=self.store,
+            run=self.executor.run,
+            collection_name=config.MEMORY_COLLECTION_NAME,
+            hot_age_seconds=config.MEMORY_HOT_TIER_DAYS * 86400,
+            max_age_seconds=config.MAX_MEMORY_AGE_DAYS * 86400,
+            dedup_distance=config.MEMORY_DEDUP_DISTANCE,
+            batch_size=config.MEMORY_COMPACTION_BATCH_SIZE,
+            max_batches=config.MEMORY_COMPACTION_MAX_BATCHES,
+            interval=config.MEMORY_COMPACTION_INTERVAL_SECONDS,
+            search_params=self.search_params
+        ) if config.MEMORY_TIERED else None
+        self._store_listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+        self._ensure_collection_exists()
+    
+    def _initialize_store(self) -> VectorStore:
+        if self.config.VECTOR_STORE_BACKEND == "local":
+            from .local_store import LocalVectorStore
+            store: VectorStore = LocalVectorStore(
+                self.config.LOCAL_STORE_PATH,
+                nlist=self.config.MEMORY_INDEX_PARAMS.get("nlist", 1024),
+                index_type=self.config.MEMORY_INDEX_TYPE,
+                max_open_partitions=self.config.LOCAL_STORE_MAX_OPEN_PARTITIONS,
+                idle_timeout=self.config.MEMORY_COLLECTION_IDLE_SECONDS
+            )
+            logger.info(f"Using local vector store at {self.config.LOCAL_STORE_PATH}")
+            return store
+        return MilvusVectorStore(self.config)
     
+    def _ensure_collection_exists(self) -> None:
+        try:
+            self.store.ensure_collection(
+                self.config.MEMORY_COLLECTION_NAME,
+                self.config.EMBEDDING_DIM
+            )
+            if self.compactor is not None:
+                self.store.ensure_collection(
+                    cold_collection(self.config.MEMORY_COLLECTION_NAME),
+                    self.config.EMBEDDING_DIM
+                )
+            logger.info(f"Collection {self.config.MEMORY_COLLECTION_NAME} is ready")
+        except Exception as e:
+            logger.error(f"Failed to ensure collection exists: {str(e)}")
+            raise
+    
+    def add_store_listener(self, listener: Callable[[str, Dict[str, Any]], None]) -> None:
+        # Called with (collection_name, metadata) whenever a memory is stored
+        self._store_listeners.append(listener)
+    
+    @instrumented("memory")
     async def store_memory(
         self,
         text: str,
         metadata: Dict[str, Any],
-        collection_name: Optional[str] = None
+        collection_name: Optional[str] = None,
+        partition: Optional[str] = None
     ) -> None:
         try:
-            collection_name = collection_name or self.config.MEMORY_COLLECTION_NAME
-            collection = Collection(collection_name)
-            collection.load()
+            record = MemoryRecord(
+                text=text,
+                metadata=metadata,
+                timestamp=int(datetime.now().timestamp()),
+                collection_name=collection_name or self.config.MEMORY_COLLECTION_NAME,
+                partition=partition
+            )
+            for listener in self._store_listeners:
+                listener(record.collection_name, metadata)
             
-            # Generate embedding for the text
-            embedding = self._generate_embedding(text)
+            # Write-behind: the insert happens later, batched with other records
+            if self.ingestion is not None:
+                await self.ingestion.put(record)
+                return
             
-            # Prepare data for insertion
-            data = [
-                [text],
-                [embedding],
-                [int(datetime.now().timestamp())],
-                [metadata]
-            ]
-            
-            collection.insert(data)
-            logger.info(f"Stored new memory in collection {collection_name}")
+            await self._insert_records(record.collection_name, [record])
         except Exception as e:
             logger.error(f"Failed to store memory: {str(e)}")
             raise
-        finally:
-            collection.release()
     
+    @instrumented("memory")
+    async def store_memories(
+        self,
+        items: List[Tuple[str, Dict[str, Any]]],
+        collection_name: Optional[str] = None,
+        partitions: Optional[List[Optional[str]]] = None
+    ) -> None:
+        # Bulk path: (text, metadata) pairs go to the store as one insert,
+        # bypassing the write-behind queue since they are already batched
+        try:
+            collection_name = collection_name or self.config.MEMORY_COLLECTION_NAME
+            timestamp = int(datetime.now().timestamp())
+            records = [
+                MemoryRecord(
+                    text=text,
+                    metadata=metadata,
+                    timestamp=timestamp,
+                    collection_name=collection_name,
+                    partition=partition
+                )
+                for (text, metadata), partition in zip(items, partitions or [None] * len(items))
+            ]
+            for record in records:
+                for listener in self._store_listeners:
+                    listener(record.collection_name, record.metadata)
+            if records:
+                await self._insert_records(collection_name, records)
+        except Exception as e:
+            logger.error(f"Failed to store memories: {str(e)}")
+            raise
+    
+    @instrumented("memory")
     async def retrieve_relevant(
         self,
         query: str,
         k: int = 5,
-        collection_name: Optional[str] = None
+        collection_name: Optional[str] = None,
+        partition: Optional[str] = None
     ) -> List[Dict[str, Any]]:
+        # With a partition, only that tenant's memories are searched
         try:
             collection_name = collection_name or self.config.MEMORY_COLLECTION_NAME
-            collection = Collection(collection_name)
-            collection.load()
             
             # Generate query embedding
-            query_embedding = self._generate_embedding(query)
+            with stage("memory", "embed"):
+                query_embedding = await self._generate_embedding(query)
             
-            # Search for similar vectors
-            search_params = {"metric_type": "L2", "params": {"nprobe": 10}}
-            results = collection.search(
-                data=[query_embedding],
-                anns_field="embedding",
-                param=search_params,
-                limit=k,
-                output_fields=["text", "timestamp", "metadata"]
-            )
+            # Search both tiers and re-rank with recency decay
+            results = await self._search_tiers(collection_name, [query_embedding], k, [partition])
             
             # Process results
-            memories = []
-            for hits in results:
-                for hit in hits:
-                    memory = {
-                        "text": hit.entity.get("text"),
-                        "timestamp": datetime.fromtimestamp(hit.entity.get("timestamp")),
-                        "metadata": hit.entity.get("metadata"),
-                        "similarity": hit.distance
-                    }
-                    memories.append(memory)
+            memories = [self._to_memory(hit) for hits in results for hit in hits]
             
             logger.info(f"Retrieved {len(memories)} relevant memories")
             return memories
         except Exception as e:
             logger.error(f"Failed to retrieve memories: {str(e)}")
             raise
-        finally:
-            collection.release()
     
-    def _generate_embedding(self, text: str) -> List[float]:
-        # TODO: Implement actual embedding generation using the LLM
-        # For now, return a dummy embedding
-        return [0.0] * 1536  # Placeholder 1536-dimensional vector
+    @instrumented("memory")
+    async def retrieve_relevant_many(
+        self,
+        queries: List[str],
+        k: int = 5,
+        collection_name: Optional[str] = None,
+        partitions: Optional[List[Optional[str]]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        # One embedding batch and one multi-vector search for every query
+        try:
+            collection_name = collection_name or self.config.MEMORY_COLLECTION_NAME
+            if not queries:
+                return []
+            with stage("memory", "embed"):
+                embeddings = await self.embeddings.embed_many(queries)
+            results = await self._search_tiers(collection_name, embeddings.tolist(), k, partitions)
+            memories = [[self._to_memory(hit) for hit in hits] for hits in results]
+            logger.info(f"Retrieved memories for {len(queries)} queries")
+            return memories
+        except Exception as e:
+            logger.error(f"Failed to retrieve memories: {str(e)}")
+            raise
+    
+    def _tiers(self, collection_name: str) -> List[str]:
+        if self.compactor is not None and collection_name == self.compactor.collection_name:
+            return [collection_name, cold_collection(collection_name)]
+        return [collection_name]
+    
+    async def _search_tiers(
+        self,
+        collection_name: str,
+        vectors: List[List[float]],
+        k: int,
+        partitions: Optional[List[Optional[str]]] = None
+    ) -> List[List[Dict[str, Any]]]:
+        # Over-fetch from every tier so the decay re-rank can promote a less
+        # similar but much more recent memory into the top k
+        fetch = k * self.config.MEMORY_RETRIEVAL_OVERFETCH
+        results = await asyncio.gather(*[
+            self.executor.run(self.store.search, name, vectors, fetch, self.search_params, partitions)
+            for name in self._tiers(collection_name)
+        ])
+        return [
+            self._rerank([hit for hits in per_tier for hit in hits], k)
+            for per_tier in zip(*results)
+        ]
+    
+    def _rerank(self, hits: List[Dict[str, Any]], k: int, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        # score = cosine similarity (from squared L2 on normalized embeddings)
+        # * MEMORY_DECAY_FACTOR ** age in days
+        if not hits:
+            return []
+        now = time.time() if now is None else now
+        distances = np.fromiter((hit["distance"] for hit in hits), dtype=np.float64, count=len(hits))
+        timestamps = np.fromiter((hit["timestamp"] for hit in hits), dtype=np.float64, count=len(hits))
+        ages = np.maximum(now - timestamps, 0.0) / 86400
+        scores = np.clip(1.0 - distances / 2, 0.0, 1.0) * np.power(self.config.MEMORY_DECAY_FACTOR, ages)
+        top = np.argsort(-scores, kind="stable")[:k]
+        return [{**hits[i], "score": float(scores[i])} for i in top]
+    
+    @staticmethod
+    def _to_memory(hit: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "text": hit["text"],
+            "timestamp": datetime.fromtimestamp(hit["timestamp"]),
+            "metadata": hit["metadata"],
+            "similarity": hit["distance"],
+            "score": hit.get("score", 0.0)
+        }
+    
+    async def _insert_records(self, collection_name: str, records: List[MemoryRecord]) -> None:
+        # Generate embeddings for the texts in one batch
+        with stage("memory", "embed"):
+            embeddings = await self.embeddings.embed_many([record.text for record in records])
+        
+        # Columnar data for a single insert
+        await self.executor.run(
+            self.store.insert,
+            collection_name,
+            [record.text for record in records],
+            embeddings.tolist(),
+            [record.timestamp for record in records],
+            [record.metadata for record in records],
+            [record.partition for record in records]
+        )
+        logger.info(f"Stored {len(records)} memories in collection {collection_name}")
+    
+    async def flush(self) -> None:
+        if self.ingestion is not None:
+            await self.ingestion.flush()
     
+    async def _generate_embedding(self, text: str) -> List[float]:
+        embedding = await self.embeddings.embed(text)
+        return embedding.tolist()
+    
+    @instrumented("memory")
     async def cleanup_old_memories(self, max_age_days: Optional[int] = None) -> None:
         try:
             max_age = max_age_days or self.config.MAX_MEMORY_AGE_DAYS
             cutoff_timestamp = int((datetime.now() - timedelta(days=max_age)).timestamp())
             
-            collection = Collection(self.config.MEMORY_COLLECTION_NAME)
-            expr = f'timestamp < {cutoff_timestamp}'
-            collection.delete(expr)
+            if self.compactor is not None:
+                # Bounded batches across both tiers
+                await self.compactor.expire(cutoff_timestamp)
+            else:
+                await self.executor.run(
+                    self.store.delete_older_than,
+                    self.config.MEMORY_COLLECTION_NAME,
+                    cutoff_timestamp
+                )
             
             logger.info(f"Cleaned up memories older than {max_age} days")
         except Exception as e:
             logger.error(f"Failed to cleanup old memories: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+    
+    @instrumented("memory")
+    async def reindex(
+        self,
+        index_type: str,
+        index_params: Dict[str, Any],
+        search_params: Optional[Dict[str, Any]] = None
+    ) -> None:
+        # Rebuilds every tier with a new index while memories stay readable
+        # and writable; searches switch to search_params once it is done
+        try:
+            collection_name = self.config.MEMORY_COLLECTION_NAME
+            if self.compactor is not None:
+                async with self.compactor.paused():
+                    for name in self._tiers(collection_name):
+                        await self.executor.run(self.store.reindex, name, index_type, index_params)
+            else:
+                await self.executor.run(self.store.reindex, collection_name, index_type, index_params)
+            if search_params is not None:
+                self.search_params = {"metric_type": "L2", "params": dict(search_params)}
+                if self.compactor is not None:
+                    self.compactor.search_params = self.search_params
+            logger.info(f"Reindexed memory as {index_type} with {index_params}")
+        except Exception as e:
+            logger.error(f"Failed to reindex memory: {str(e)}")
+            raise
+    
+    async def start_compactor(self) -> None:
+        if self.compactor is not None:
+            await self.compactor.start()
+    
+    async def aclose(self) -> None:
+        if self.compactor is not None:
+            await self.compactor.stop()
+        if self.ingestion is not None:
+            await self.ingestion.stop()
+        self.close()
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "executor": self.executor.stats(),
+            "store": self.store.stats(),
+            "embeddings": self.embeddings.stats(),
+            "ingestion": self.ingestion.stats() if self.ingestion else {},
+            "compactor": self.compactor.stats() if self.compactor else {}
+        }
+    
+    def close(self) -> None:
+        self.executor.shutdown()
+        self.store.close()
+        self.embeddings.close()
+        logger.info("Memory system closed")
\ No newline at end of file
@@ -0,0 +1,205 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from fastapi import HTTPException
+from prometheus_client import Counter
+
+from ..core.config import AtlasConfig
+
+SHED_REQUESTS = Counter(
+    "atlas_admission_shed_requests_total",
+    "Queries refused or dropped by admission control",
+    ["reason"]
+)
+
+def parse_deadline(value: Optional[str], default_timeout: Optional[float] = None, now: Optional[float] = None) -> Optional[float]:
+    # The header carries an absolute unix time in seconds, so it means the
+    # same thing to every hop that forwards it. default_timeout applies when
+    # the header is missing and also caps a later one.
+    now = time.time() if now is None else now
+    default = None if default_timeout is None else now + default_timeout
+    if not value:
+        return default
+    try:
+        deadline = float(value)
+    except ValueError:
+        deadline = math.nan
+    if not math.isfinite(deadline):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid request deadline: {value}"
+        )
+    return deadline if default is None else min(deadline, default)
+
+class Ticket:
+    __slots__ = ("priority", "seq", "deadline", "future", "queued")
+    
+    def __init__(self, priority: int, seq: int, deadline: Optional[float], future: asyncio.Future):
+        self.priority = priority
+        self.seq = seq
+        self.deadline = deadline
+        self.future = future
+        self.queued = True
+
+class AdmissionController:
+    # Bounds the queries running in the agent to max_concurrent and queues
+    # up to max_queue more, highest priority first and FIFO within a
+    # priority. Everything beyond that is shed immediately with a
+    # Retry-After derived from the measured service time, instead of joining
+    # a backlog whose latency grows without bound:
+    #   503 the queue is full (a lower priority queued query is evicted to
+    #       make room, if there is one), or the expected wait already runs
+    #       past the query's deadline
+    #   504 the deadline passed before the query got a slot
+    # Only touched from the event loop and per API worker process.
+    def __init__(
+        self,
+        max_concurrent: int = 16,
+        max_queue: int = 64,
+        priorities: Optional[Dict[str, int]] = None,
+        initial_service_time: float = 1.0,
+        smoothing: float = 0.1
+    ):
+        self.max_concurrent = max(max_concurrent, 1)
+        self.max_queue = max_queue
+        self.priorities = priorities or {}
+        self.smoothing = smoothing
+        self.service_time = initial_service_time
+        self._heap: List[Tuple[int, int, Ticket]] = []
+        self._seq = itertools.count()
+        self.active = 0
+        self.queued = 0
+        self.admitted = 0
+        self.completed = 0
+        self.rejected: Dict[str, int] = {"queue_full": 0, "evicted": 0, "deadline_unreachable": 0, "expired": 0}
+    
+    @classmethod
+    def from_config(cls, config: AtlasConfig) -> "AdmissionController":
+        return cls(
+            max_concurrent=config.ADMISSION_MAX_CONCURRENT,
+            max_queue=config.ADMISSION_QUEUE_SIZE,
+            priorities=config.ADMISSION_PRIORITIES
+        )
+    
+    def priority(self, persona: Optional[str] = None, domain: Optional[str] = None) -> int:
+        # {"persona:analyst": 10, "domain:batch": -5}; the highest match wins
+        matches = [
+            self.priorities[key]
+            for key in (f"persona:{persona}", f"domain:{domain}")
+            if key in self.priorities
+        ]
+        return max(matches) if matches else self.priorities.get("default", 0)
+    
+    def retry_after(self, queued: Optional[int] = None) -> int:
+        # Time for the queries ahead to drain through the slots
+        ahead = (self.queued if queued is None else queued) + 1
+        return max(1, math.ceil(ahead * self.service_time / self.max_concurrent))
+    
+    def _shed(self, reason: str, status_code: int, detail: str) -> HTTPException:
+        self.rejected[reason] += 1
+        SHED_REQUESTS.labels(reason=reason).inc()
+        return HTTPException(
+            status_code=status_code,
+            detail=detail,
+            headers={"Retry-After": str(self.retry_after())}
+        )
+    
+    def check(self, priority: int = 0, deadline: Optional[float] = None) -> None:
+        # The rejections that need no waiting; acquire makes the same ones
+        now = time.time()
+        if deadline is not None and now >= deadline:
+            raise self._shed("expired", 504, "Request deadline passed before admission")
+        if self.active < self.max_concurrent and not self.queued:
+            return
+        if deadline is not None and now + (self.queued + 1) * self.service_time / self.max_concurrent + self.service_time > deadline:
+            raise self._shed("deadline_unreachable", 503, "Server overloaded, request deadline cannot be met")
+        if self.queued >= self.max_queue:
+            victim = self._lowest_queued()
+            if victim is None or victim.priority >= priority:
+                raise self._shed("queue_full", 503, "Server overloaded")
+    
+    async def acquire(self, priority: int = 0, deadline: Optional[float] = None) -> None:
+        self.check(priority, deadline)
+        if self.active < self.max_concurrent and not self.queued:
+            self.active += 1
+            self.admitted += 1
+            return
+        if self.queued >= self.max_queue:
+            victim = self._lowest_queued()
+            self._dequeue(victim)
+            victim.future.set_exception(self._shed("evicted", 503, "Server overloaded"))
+        
+        loop = asyncio.get_running_loop()
+        ticket = Ticket(priority, next(self._seq), deadline, loop.create_future())
+        heapq.heappush(self._heap, (-priority, ticket.seq, ticket))
+        self.queued += 1
+        timer = loop.call_at(loop.time() + deadline - time.time(), self._expire, ticket) if deadline is not None else None
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            if ticket.future.done() and not ticket.future.cancelled() and ticket.future.exception() is None:
+                # Granted a slot in the same loop iteration the caller went away
+                self.release()
+            self._dequeue(ticket)
+            raise
+        finally:
+            if timer is not None:
+                timer.cancel()
+    
+    def release(self, service_time: Optional[float] = None) -> None:
+        if service_time is not None:
+            self.completed += 1
+            self.service_time += self.smoothing * (service_time - self.service_time)
+        # The slot passes straight to the next queued query, if any
+        now = time.time()
+        while self._heap:
+            _, _, ticket = heapq.heappop(self._heap)
+            if not ticket.queued:
+                continue
+            self._dequeue(ticket)
+            if ticket.deadline is not None and now >= ticket.deadline:
+                ticket.future.set_exception(self._shed("expired", 504, "Request deadline passed in the admission queue"))
+                continue
+            ticket.future.set_result(None)
+            self.admitted += 1
+            return
+        self.active -= 1
+    
+    @asynccontextmanager
+    async def admit(self, priority: int = 0, deadline: Optional[float] = None) -> AsyncIterator[None]:
+        await self.acquire(priority, deadline)
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.release(time.monotonic() - start)
+    
+    def _dequeue(self, ticket: Ticket) -> None:
+        # Heap entries of tickets that left the queue are skipped when popped
+        if ticket.queued:
+            ticket.queued = False
+            self.queued -= 1
+    
+    def _expire(self, ticket: Ticket) -> None:
+        if ticket.queued:
+            self._dequeue(ticket)
+            ticket.future.set_exception(self._shed("expired", 504, "Request deadline passed in the admission queue"))
+    
+    def _lowest_queued(self) -> Optional[Ticket]:
+        # Lowest priority, newest first; the queue is bounded, so a scan is cheap
+        candidates = [ticket for _, _, ticket in self._heap if ticket.queued]
+        return min(candidates, key=lambda ticket: (ticket.priority, -ticket.seq)) if candidates else None
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "completed": self.completed,
+            "service_time_seconds": self.service_time,
+            "rejected": dict(self.rejected)
+        }
\ No newline at end of file
@@ -0,0 +1,160 @@
+import hashlib
+import hmac
+import math
+import sys
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from fastapi import HTTPException
+from prometheus_client import Counter
+
+from ..core.config import AtlasConfig
+
+REJECTED_REQUESTS = Counter(
+    "atlas_api_rejected_requests_total",
+    "Requests refused by API key authentication or quotas",
+    ["client", "reason"]
+)
+
+def hash_api_key(key: str) -> str:
+    # Keys are long random tokens, not passwords, so a single SHA-256 is as
+    # strong as a slow KDF here and keeps verification in microseconds
+    return hashlib.sha256(key.encode()).hexdigest()
+
+class TokenBucket:
+    __slots__ = ("rate", "burst", "tokens", "updated")
+    
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+    
+    def take(self, now: float) -> float:
+        # 0 when a token was taken, otherwise seconds until the next one
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+class ClientQuota:
+    def __init__(self, name: str, rate: float, burst: float, max_concurrent: int):
+        self.name = name
+        self.bucket = TokenBucket(rate, max(burst, 1)) if rate > 0 else None
+        self.max_concurrent = max_concurrent
+        self.active = 0
+        self.admitted = 0
+        self.rate_limited = 0
+        self.concurrency_limited = 0
+
+class ApiKeyAuth:
+    # Maps a presented API key to a named client and enforces that client's
+    # token bucket and concurrent request limit. Built once at startup from
+    # the config; a request costs one hash, one constant-time compare per
+    # configured key and some arithmetic. Quota state is only touched from
+    # the event loop, so it needs no lock, and is per API worker process.
+    # With no keys configured every request is let through, as before.
+    def __init__(
+        self,
+        keys: Dict[str, str],
+        rate: float = 0.0,
+        burst: float = 1.0,
+        max_concurrent: int = 0,
+        overrides: Optional[Dict[str, Dict[str, float]]] = None
+    ):
+        overrides = overrides or {}
+        self.clients: Dict[str, ClientQuota] = {}
+        self._digests: List[Tuple[bytes, ClientQuota]] = []
+        for name, digest in keys.items():
+            quota = overrides.get(name, {})
+            client = ClientQuota(
+                name,
+                rate=quota.get("rate", rate),
+                burst=quota.get("burst", burst),
+                max_concurrent=int(quota.get("concurrency", max_concurrent))
+            )
+            self.clients[name] = client
+            self._digests.append((digest.lower().encode(), client))
+        self.unauthorized = 0
+    
+    @classmethod
+    def from_config(cls, config: AtlasConfig) -> "ApiKeyAuth":
+        keys = dict(config.API_KEYS)
+        if config.API_KEY:
+            keys.setdefault("default", hash_api_key(config.API_KEY))
+        return cls(
+            keys,
+            rate=config.API_RATE_LIMIT_PER_SECOND,
+            burst=config.API_RATE_LIMIT_BURST,
+            max_concurrent=config.API_MAX_CONCURRENT_REQUESTS,
+            overrides=config.API_KEY_QUOTAS
+        )
+    
+    @property
+    def enabled(self) -> bool:
+        return bool(self._digests)
+    
+    def authenticate(self, api_key: Optional[str]) -> Optional[ClientQuota]:
+        if not self.enabled:
+            return None
+        match = None
+        if api_key:
+            digest = hash_api_key(api_key).encode()
+            # Every key is compared, so timing does not tell which one matched
+            for candidate, client in self._digests:
+                if hmac.compare_digest(candidate, digest):
+                    match = client
+        if match is None:
+            self.unauthorized += 1
+            REJECTED_REQUESTS.labels(client="", reason="invalid_key").inc()
+            raise HTTPException(
+                status_code=403,
+                detail="Invalid API key"
+            )
+        return match
+    
+    def acquire(self, client: ClientQuota) -> None:
+        # Rejects instead of queueing, so a heavy client backs off rather
+        # than filling the inference scheduler's queue
+        if client.max_concurrent and client.active >= client.max_concurrent:
+            client.concurrency_limited += 1
+            REJECTED_REQUESTS.labels(client=client.name, reason="concurrency").inc()
+            raise HTTPException(
+                status_code=429,
+                detail=f"More than {client.max_concurrent} concurrent requests",
+                headers={"Retry-After": "1"}
+            )
+        if client.bucket is not None:
+            wait = client.bucket.take(time.monotonic())
+            if wait:
+                client.rate_limited += 1
+                REJECTED_REQUESTS.labels(client=client.name, reason="rate").inc()
+                raise HTTPException(
+                    status_code=429,
+                    detail="Rate limit exceeded",
+                    headers={"Retry-After": str(math.ceil(wait))}
+                )
+        client.active += 1
+        client.admitted += 1
+    
+    def release(self, client: ClientQuota) -> None:
+        client.active -= 1
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "unauthorized": self.unauthorized,
+            "clients": {
+                name: {
+                    "active": client.active,
+                    "admitted": client.admitted,
+                    "rate_limited": client.rate_limited,
+                    "concurrency_limited": client.concurrency_limited
+                }
+                for name, client in self.clients.items()
+            }
+        }
+
+if __name__ == "__main__":
+    # Prints the digest to put in ATLAS_API_KEYS for a new client key
+    print(hash_api_key(sys.argv[1]))
\ No newline at end of file
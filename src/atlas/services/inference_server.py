@@ -0,0 +1,125 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, Optional, Union
+from urllib.parse import urlparse
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from datetime import datetime
+
+from ..core.config import AtlasConfig
+from ..core.generation import ModelGenerator, load_model, load_tokenizer
+from ..core.prompt import PreparedPrompt
+from ..core.scheduler import InferenceScheduler, GenerationOutput
+from loguru import logger
+
+# Inference sidecar: one process holds the model weights and an
+# InferenceScheduler, and every API worker (INFERENCE_MODE=sidecar) sends its
+# prompts here instead of loading its own copy. Batches also form across
+# workers, not just within one.
+app = FastAPI(
+    title="Atlas AI Inference Sidecar",
+    description="Shared model process for Atlas API workers",
+    version="1.0.0"
+)
+app.state.scheduler = None
+app.state.generator = None
+app.state.startup_error = None
+
+class GenerateRequest(BaseModel):
+    prompt: Union[PreparedPrompt, str]
+    max_new_tokens: Optional[int] = None
+    stream: bool = False
+
+def load_scheduler(config: AtlasConfig) -> InferenceScheduler:
+    llm = load_model(config)
+    logger.info(f"Loaded LLM model: {config.DEFAULT_MODEL}")
+    app.state.generator = ModelGenerator(config, llm, load_tokenizer(config))
+    return InferenceScheduler(
+        app.state.generator.generate_batch,
+        max_batch_size=config.INFERENCE_MAX_BATCH_SIZE,
+        max_wait=config.INFERENCE_MAX_WAIT_MS / 1000,
+        max_new_tokens=config.MAX_NEW_TOKENS
+    )
+
+async def load(config: AtlasConfig) -> None:
+    # Runs after the server is listening so /health answers while weights load
+    try:
+        loop = asyncio.get_running_loop()
+        app.state.scheduler = await loop.run_in_executor(None, load_scheduler, config)
+        logger.info("Inference sidecar ready")
+    except Exception as e:
+        app.state.startup_error = str(e)
+        logger.error(f"Failed to initialize inference sidecar: {str(e)}")
+
+@app.on_event("startup")
+async def startup_event():
+    app.state.config = AtlasConfig()
+    app.state.loading = asyncio.create_task(load(app.state.config))
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if app.state.scheduler is not None:
+        await app.state.scheduler.stop()
+    logger.info("Inference sidecar shut down successfully")
+
+@app.post("/generate")
+async def generate(request: GenerateRequest):
+    scheduler = app.state.scheduler
+    if scheduler is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Model is still loading",
+            headers={"Retry-After": "5"}
+        )
+    
+    async def lines() -> AsyncIterator[str]:
+        # Starlette cancels this generator when the worker disconnects, which
+        # cancels the queued or running generation
+        try:
+            if not request.stream:
+                output = await scheduler.generate(request.prompt, request.max_new_tokens)
+                yield json.dumps({"output": output.dict()}) + "\n"
+                return
+            async for item in scheduler.stream(request.prompt, request.max_new_tokens):
+                if isinstance(item, GenerationOutput):
+                    yield json.dumps({"output": item.dict()}) + "\n"
+                else:
+                    yield json.dumps({"text": item}) + "\n"
+        except Exception as e:
+            logger.error(f"Error generating in sidecar: {str(e)}")
+            yield json.dumps({"error": str(e)}) + "\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@app.get("/health")
+async def health_check():
+    return {"status": "healthy", "timestamp": datetime.now()}
+
+@app.get("/ready")
+async def readiness_check():
+    if app.state.scheduler is None:
+        status = "failed" if app.state.startup_error else "loading"
+        raise HTTPException(status_code=503, detail=status)
+    return {"status": "ready", "timestamp": datetime.now()}
+
+@app.get("/stats")
+async def get_stats() -> Any:
+    if app.state.scheduler is None:
+        return {}
+    return {
+        "scheduler": app.state.scheduler.stats(),
+        "generator": app.state.generator.stats()
+    }
+
+if __name__ == "__main__":
+    import uvicorn
+    config = AtlasConfig()
+    endpoint = urlparse(config.INFERENCE_SIDECAR_URL)
+    # A single process by design: more workers would mean more model copies
+    uvicorn.run(
+        "atlas.services.inference_server:app",
+        host=endpoint.hostname or "127.0.0.1",
+        port=endpoint.port or 8100,
+        workers=1
+    )
@@ -1,15 +1,27 @@
-from fastapi import FastAPI, HTTPException, Depends, Security
+import asyncio
+import json
+import time
+from fastapi import FastAPI, HTTPException, Depends, Security, Request
 from fastapi.security.api_key import APIKeyHeader
+from fastapi.responses import Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi_prometheus import PrometheusFastApiInstrumentator
+from prometheus_fastapi_instrumentator import Instrumentator
 from pydantic import BaseModel
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, AsyncIterator, Awaitable, Callable, List, Tuple, TypeVar, Union
 from datetime import datetime
 
-from ..core.agent import AtlasAgent, QueryContext, AtlasResponse
+from ..core.agent import AtlasAgent, QueryContext, AtlasResponse, StreamEvent
 from ..core.config import AtlasConfig
+from ..core.deadline import DeadlineExceeded, check_deadline, deadline_passed, request_deadline
+from ..core.metrics import SlowRequestProfiler, render_metrics, stats_collector
+from ..core.singleflight import SingleFlight, query_key
+from ..core.tools import ToolCall, ToolResult
+from .admission import AdmissionController, parse_deadline
+from .auth import ApiKeyAuth
 from loguru import logger
 
+T = TypeVar("T")
+
 app = FastAPI(
     title="Atlas AI API",
     description="Native AI Agent System for Insight Generation & Adaptive Intelligence",
@@ -25,8 +37,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize Prometheus monitoring
-PrometheusFastApiInstrumentator.instrument(app)
+# Whole-request HTTP metrics; per-stage timings come from atlas.core.metrics
+# and both are served by /metrics below
+Instrumentator(excluded_handlers=["/metrics"]).instrument(app)
+
+# Coalesces identical /query requests that arrive while one is running
+inflight = SingleFlight(layer="api")
 
 # Initialize API key security
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
@@ -42,65 +58,363 @@ class ErrorResponse(BaseModel):
     timestamp: datetime
     request_id: str
 
-# Dependency for API key validation
-async def verify_api_key(api_key: str = Security(api_key_header)):
-    config = AtlasConfig()
-    if config.API_KEY and (not api_key or api_key != config.API_KEY):
-        raise HTTPException(
-            status_code=403,
-            detail="Invalid API key"
-        )
-    return api_key
+# Dependency for API key validation. The request holds one of its client's
+# concurrency slots until the response, streamed or not, has been sent.
+async def verify_api_key(
+    request: Request,
+    api_key: Optional[str] = Security(api_key_header)
+) -> AsyncIterator[Optional[str]]:
+    auth: ApiKeyAuth = request.app.state.auth
+    client = auth.authenticate(api_key)
+    if client is None:
+        yield None
+        return
+    auth.acquire(client)
+    try:
+        yield client.name
+    finally:
+        auth.release(client)
 
-# Initialize Atlas agent
-@app.on_event("startup")
-async def startup_event():
+# Initialize Atlas agent. The model load runs after the server is listening,
+# so /health answers immediately and /ready reports when queries can be served.
+async def initialize_agent(config: AtlasConfig) -> None:
     try:
-        app.state.config = AtlasConfig()
-        app.state.agent = AtlasAgent(app.state.config)
+        loop = asyncio.get_running_loop()
+        agent = await loop.run_in_executor(None, AtlasAgent, config)
+        await agent.start()
+        stats_collector.register("agent", agent.stats)
+        stats_collector.register("memory", agent.memory.stats)
+        app.state.agent = agent
         logger.info("Atlas API initialized successfully")
     except Exception as e:
+        app.state.startup_error = str(e)
         logger.error(f"Failed to initialize Atlas API: {str(e)}")
-        raise
 
-@app.post("/query", response_model=AtlasResponse, dependencies=[Depends(verify_api_key)])
-async def handle_query(request: QueryRequest):
+@app.on_event("startup")
+async def startup_event():
+    # Resolved once; request handlers read app.state instead of the environment
+    app.state.config = AtlasConfig()
+    app.state.auth = ApiKeyAuth.from_config(app.state.config)
+    app.state.admission = AdmissionController.from_config(app.state.config) if app.state.config.ADMISSION_ENABLED else None
+    app.state.agent = None
+    app.state.startup_error = None
+    app.state.profiler = SlowRequestProfiler(
+        directory=app.state.config.PROFILE_DIR,
+        slow_seconds=app.state.config.PROFILE_SLOW_SECONDS,
+        sample_rate=app.state.config.PROFILE_SAMPLE_RATE,
+        backend=app.state.config.PROFILE_BACKEND,
+        max_files=app.state.config.PROFILE_MAX_FILES
+    ) if app.state.config.PROFILE_SLOW_REQUESTS else None
+    stats_collector.register("api", lambda: {
+        "coalescing": inflight.stats(),
+        "auth": app.state.auth.stats(),
+        "admission": app.state.admission.stats() if app.state.admission else {},
+        "profiler": app.state.profiler.stats() if app.state.profiler else {}
+    })
+    app.state.initializing = asyncio.create_task(initialize_agent(app.state.config))
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    try:
+        if app.state.agent is not None:
+            await app.state.agent.shutdown()
+        logger.info("Atlas API shut down successfully")
+    except Exception as e:
+        logger.error(f"Failed to shut down Atlas API cleanly: {str(e)}")
+
+@app.middleware("http")
+async def profile_slow_requests(request: Request, call_next: Any) -> Any:
+    # Streaming responses are profiled up to their first byte
+    profiler = getattr(app.state, "profiler", None)
+    if profiler is None:
+        return await call_next(request)
+    return await profiler.run(request.url.path, lambda: call_next(request))
+
+def get_agent() -> AtlasAgent:
+    agent = getattr(app.state, "agent", None)
+    if agent is None:
+        raise HTTPException(
+            status_code=503,
+            detail="Atlas agent is starting",
+            headers={"Retry-After": "5"}
+        )
+    return agent
+
+# How often a running query checks whether its client is still connected
+DISCONNECT_POLL_SECONDS = 0.25
+
+async def cancel_on_disconnect(http_request: Request, coro: Any) -> Any:
+    # Cancels the work (and its queued generation) when the client goes away
+    # or the caller stops waiting, e.g. at its deadline
+    task = asyncio.ensure_future(coro)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SECONDS)
+            if done:
+                return task.result()
+            if await http_request.is_disconnected():
+                logger.info("Client disconnected, cancelled query")
+                raise HTTPException(
+                    status_code=499,
+                    detail="Client closed request"
+                )
+    finally:
+        task.cancel()
+
+def query_deadline(http_request: Request) -> Optional[float]:
+    config: AtlasConfig = app.state.config
+    return parse_deadline(
+        http_request.headers.get(config.ADMISSION_DEADLINE_HEADER),
+        config.ADMISSION_DEFAULT_TIMEOUT_SECONDS
+    )
+
+async def admitted(request: QueryRequest, deadline: Optional[float], call: Callable[[], Awaitable[T]]) -> T:
+    # Holds one of the worker's agent slots while call runs
+    admission: Optional[AdmissionController] = app.state.admission
+    if admission is None:
+        return await call()
+    async with admission.admit(admission.priority(request.persona, request.domain), deadline):
+        return await call()
+
+def deadline_error(error: Exception) -> bool:
+    return isinstance(error, DeadlineExceeded) or (isinstance(error, HTTPException) and error.status_code == 504)
+
+async def coalesced_run(key: str, deadline: Optional[float], call: Callable[[], Awaitable[T]]) -> Tuple[T, bool]:
+    # A joined run keeps the deadline of the request that started it. If that
+    # deadline stops it while this request still has time, start (or join)
+    # another run instead of failing with the leader's 504.
+    while True:
+        try:
+            return await inflight.run(key, call)
+        except (DeadlineExceeded, HTTPException) as e:
+            if not deadline_error(e) or deadline_passed(deadline):
+                raise
+            logger.info("Coalesced query hit another request's deadline, running it again")
+
+async def admitted_stream(
+    request: QueryRequest,
+    deadline: Optional[float],
+    events: Callable[[], AsyncIterator[StreamEvent]]
+) -> AsyncIterator[StreamEvent]:
+    request_deadline.set(deadline)
+    admission: Optional[AdmissionController] = app.state.admission
+    if admission is None:
+        async for event in events():
+            yield event
+        return
+    async with admission.admit(admission.priority(request.persona, request.domain), deadline):
+        async for event in events():
+            yield event
+
+async def sse_events(events: AsyncIterator[StreamEvent]) -> AsyncIterator[str]:
+    # Server-Sent Events framing; errors after the stream started become an event
+    try:
+        async for event in events:
+            yield f"event: {event.event}\ndata: {json.dumps(event.data, default=str)}\n\n"
+    except Exception as e:
+        yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
+
+@app.post("/query/stream")
+async def handle_query_stream(
+    request: QueryRequest,
+    http_request: Request,
+    client: Optional[str] = Depends(verify_api_key),
+    agent: AtlasAgent = Depends(get_agent)
+):
+    context = QueryContext(
+        persona=request.persona,
+        domain=request.domain,
+        user_id=client,
+        metadata=request.metadata
+    )
+    # Overload is refused with a status code here; the slot itself is taken
+    # by the stream, so a response that is never sent never holds one
+    deadline = query_deadline(http_request)
+    if app.state.admission is not None:
+        app.state.admission.check(app.state.admission.priority(request.persona, request.domain), deadline)
+    # Starlette cancels the generator when the client disconnects, which in
+    # turn cancels the queued or running generation
+    return StreamingResponse(
+        sse_events(admitted_stream(
+            request,
+            deadline,
+            lambda: agent.stream_query(query=request.text, context=context)
+        )),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def ndjson_results(
+    results: AsyncIterator[Tuple[int, Union[AtlasResponse, Exception]]]
+) -> AsyncIterator[str]:
+    # One JSON line per query in completion order; a failure that ends the
+    # whole batch becomes a final line without an index
+    try:
+        async for index, result in results:
+            if isinstance(result, Exception):
+                line = {"index": index, "error": str(result)}
+            else:
+                line = {"index": index, "response": result.dict()}
+            yield json.dumps(line, default=str) + "\n"
+    except Exception as e:
+        yield json.dumps({"error": str(e)}) + "\n"
+
+@app.post("/query/batch")
+async def handle_query_batch(
+    requests: List[QueryRequest],
+    client: Optional[str] = Depends(verify_api_key),
+    agent: AtlasAgent = Depends(get_agent)
+):
+    if len(requests) > app.state.config.QUERY_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch exceeds {app.state.config.QUERY_BATCH_MAX_SIZE} queries"
+        )
+    queries = [
+        (
+            request.text,
+            QueryContext(
+                persona=request.persona,
+                domain=request.domain,
+                user_id=client,
+                metadata=request.metadata
+            )
+        )
+        for request in requests
+    ]
+    return StreamingResponse(
+        ndjson_results(agent.process_queries(queries)),
+        media_type="application/x-ndjson"
+    )
+
+@app.post("/query", response_model=AtlasResponse)
+async def handle_query(
+    request: QueryRequest,
+    http_request: Request,
+    client: Optional[str] = Depends(verify_api_key),
+    agent: AtlasAgent = Depends(get_agent)
+):
+    if "text/event-stream" in http_request.headers.get("accept", ""):
+        return await handle_query_stream(request, http_request, client, agent)
+    deadline = query_deadline(http_request)
+    # Inherited by the coalesced run, so the agent drops it before
+    # generation once the deadline has passed
+    token = request_deadline.set(deadline)
     try:
+        check_deadline("admission")
+        # Memories and coalescing are scoped to the authenticated client
         context = QueryContext(
             persona=request.persona,
             domain=request.domain,
+            user_id=client,
             metadata=request.metadata
         )
         
-        response = await app.state.agent.process_query(
-            query=request.text,
-            context=context
+        # A client that disconnects only stops waiting; the shared run is
+        # cancelled when no identical request is left waiting for it
+        key = query_key(
+            request.text,
+            persona=request.persona,
+            domain=request.domain,
+            metadata=request.metadata,
+            user_id=client
+        )
+        # Only the coalesced run takes an admission slot; a request joining
+        # it stops waiting at its own deadline
+        response, coalesced = await asyncio.wait_for(
+            cancel_on_disconnect(
+                http_request,
+                coalesced_run(
+                    key,
+                    deadline,
+                    lambda: admitted(
+                        request,
+                        deadline,
+                        lambda: agent.process_query(
+                            query=request.text,
+                            context=context
+                        )
+                    )
+                )
+            ),
+            None if deadline is None else max(deadline - time.time(), 0)
         )
+        if coalesced:
+            response = response.copy(deep=True)
+            response.metadata["coalesced"] = True
         
         return response
+    except HTTPException:
+        raise
+    except (DeadlineExceeded, asyncio.TimeoutError):
+        raise HTTPException(
+            status_code=504,
+            detail="Request deadline passed"
+        )
     except Exception as e:
         logger.error(f"Error processing query: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=str(e)
         )
+    finally:
+        request_deadline.reset(token)
+
+@app.post("/tools", response_model=List[ToolResult], dependencies=[Depends(verify_api_key)])
+async def handle_tools(
+    calls: List[ToolCall],
+    agent: AtlasAgent = Depends(get_agent)
+):
+    # Independent tool calls run concurrently; a failing call comes back as
+    # a result with an error
+    unknown = sorted({call.name for call in calls if call.name not in agent.tools})
+    if unknown:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Unknown tools: {', '.join(unknown)}"
+        )
+    return await agent.run_tools(calls)
 
 @app.get("/health")
 async def health_check():
     return {"status": "healthy", "timestamp": datetime.now()}
 
+@app.get("/ready")
+async def readiness_check():
+    # Liveness stays on /health; this fails until the agent (and, in sidecar
+    # mode, the inference sidecar) can serve queries
+    agent = getattr(app.state, "agent", None)
+    if agent is None:
+        status = "failed" if getattr(app.state, "startup_error", None) else "starting"
+        raise HTTPException(status_code=503, detail=status)
+    if not await agent.ready():
+        raise HTTPException(status_code=503, detail="waiting for inference sidecar")
+    return {"status": "ready", "timestamp": datetime.now()}
+
 @app.get("/metrics")
-async def get_metrics(api_key: str = Security(api_key_header)):
-    # Custom metrics endpoint - implement as needed
-    pass
+async def get_metrics():
+    # Prometheus text exposition, scraped without credentials (prometheus.yml)
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
 
 if __name__ == "__main__":
+    import subprocess
+    import sys
     import uvicorn
     config = AtlasConfig()
-    uvicorn.run(
-        "atlas.services.query_handler:app",
-        host=config.API_HOST,
-        port=config.API_PORT,
-        workers=config.API_WORKERS,
-        reload=True
-    )
\ No newline at end of file
+    sidecar = None
+    if config.INFERENCE_MODE == "sidecar":
+        # Load the model once; every worker below talks to this process
+        sidecar = subprocess.Popen([sys.executable, "-m", "atlas.services.inference_server"])
+    try:
+        uvicorn.run(
+            "atlas.services.query_handler:app",
+            host=config.API_HOST,
+            port=config.API_PORT,
+            workers=config.API_WORKERS,
+            reload=True
+        )
+    finally:
+        if sidecar is not None:
+            sidecar.terminate()
+            sidecar.wait()
\ No newline at end of file
@@ -0,0 +1,186 @@
+import csv
+import os
+import shutil
+import time
+import uuid
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import numpy as np
+from pydantic import BaseModel
+from loguru import logger
+
+from ..core.analytics import Columns, columns_from_rows
+
+class DatasetRef(BaseModel):
+    # What activities pass to each other instead of the rows themselves
+    dataset_id: str
+    path: str
+    columns: List[str] = []
+    chunks: List[str] = []
+    num_rows: int = 0
+    created_at: float = 0.0
+
+def read_csv_chunks(path: str, chunk_rows: int) -> Iterator[Columns]:
+    with open(path, newline="") as f:
+        rows: List[Dict[str, Any]] = []
+        for row in csv.DictReader(f):
+            rows.append(row)
+            if len(rows) >= chunk_rows:
+                yield columns_from_rows(rows)
+                rows = []
+        if rows:
+            yield columns_from_rows(rows)
+
+class DatasetWriter:
+    # Buffers up to chunk_rows rows and writes each chunk as one .npy file per
+    # column. The dataset is built in a temporary directory and renamed to a
+    # fresh versioned directory on close, so a retried activity never leaves
+    # a partial dataset and rewriting a dataset never touches the directory
+    # a reader holding an older DatasetRef is mapping. Old versions are left
+    # to ArtifactStore.sweep.
+    def __init__(self, store: "ArtifactStore", dataset_id: str):
+        self.store = store
+        self.dataset_id = dataset_id
+        self.path = os.path.join(store.root, f"{dataset_id}.{uuid.uuid4().hex[:12]}")
+        self.tmp_path = f"{self.path}.tmp"
+        self.columns: List[str] = []
+        self.chunks: List[str] = []
+        self.num_rows = 0
+        self._pending: List[Columns] = []
+        self._pending_rows = 0
+    
+    def write(self, columns: Columns) -> None:
+        rows = {len(values) for values in columns.values()}
+        if len(rows) > 1:
+            raise ValueError(f"Columns have different lengths: {sorted(rows)}")
+        if not rows or rows == {0}:
+            return
+        if self.columns and set(columns) != set(self.columns):
+            raise ValueError(f"Columns {sorted(columns)} do not match dataset columns {sorted(self.columns)}")
+        for name, values in columns.items():
+            if values.dtype.hasobject:
+                raise ValueError(f"Column {name} has object dtype; convert it to numbers or str")
+        self.columns = self.columns or list(columns)
+        self._pending.append(columns)
+        self._pending_rows += rows.pop()
+        while self._pending_rows >= self.store.chunk_rows:
+            self._flush(self.store.chunk_rows)
+    
+    def _flush(self, limit: int) -> None:
+        # Concatenate only what is pending, which is at most about two chunks
+        merged = {
+            name: (
+                np.concatenate([part[name] for part in self._pending])
+                if len(self._pending) > 1 else self._pending[0][name]
+            )
+            for name in self.columns
+        }
+        chunk = {name: values[:limit] for name, values in merged.items()}
+        rest = {name: values[limit:] for name, values in merged.items()}
+        name = f"chunk_{len(self.chunks):05d}"
+        os.makedirs(os.path.join(self.tmp_path, name), exist_ok=True)
+        for column, values in chunk.items():
+            np.save(os.path.join(self.tmp_path, name, f"{column}.npy"), values)
+        self.chunks.append(name)
+        written = min(limit, self._pending_rows)
+        self.num_rows += written
+        self._pending_rows -= written
+        self._pending = [rest] if self._pending_rows else []
+    
+    def close(self) -> DatasetRef:
+        if self._pending_rows:
+            self._flush(self._pending_rows)
+        if self.chunks:
+            os.rename(self.tmp_path, self.path)
+        return DatasetRef(
+            dataset_id=self.dataset_id,
+            path=self.path,
+            columns=self.columns,
+            chunks=self.chunks,
+            num_rows=self.num_rows,
+            created_at=time.time()
+        )
+    
+    def abort(self) -> None:
+        shutil.rmtree(self.tmp_path, ignore_errors=True)
+
+class ArtifactStore:
+    # Local columnar store shared by the activities of one worker. Chunks are
+    # read back memory-mapped, so analysis touches one chunk at a time however
+    # large the dataset is. Datasets and abandoned temporary directories older
+    # than ttl_seconds are removed by sweep, which writes run at most once a
+    # minute; 0 keeps everything.
+    SWEEP_INTERVAL_SECONDS = 60.0
+    
+    def __init__(self, root: str = ".atlas/artifacts", chunk_rows: int = 65536, ttl_seconds: float = 86400.0):
+        self.root = root
+        self.chunk_rows = chunk_rows
+        self.ttl_seconds = ttl_seconds
+        self.swept = 0
+        self._last_sweep = 0.0
+    
+    def configure(self, root: str, chunk_rows: int, ttl_seconds: float = 86400.0) -> None:
+        self.root = root
+        self.chunk_rows = chunk_rows
+        self.ttl_seconds = ttl_seconds
+    
+    def writer(self, dataset_id: str) -> DatasetWriter:
+        return DatasetWriter(self, dataset_id)
+    
+    def write(self, dataset_id: str, chunks: Iterable[Columns]) -> DatasetRef:
+        if time.time() - self._last_sweep >= self.SWEEP_INTERVAL_SECONDS:
+            self.sweep()
+        writer = self.writer(dataset_id)
+        try:
+            for columns in chunks:
+                writer.write(columns)
+            return writer.close()
+        except Exception as e:
+            writer.abort()
+            logger.error(f"Failed to write dataset {dataset_id}: {str(e)}")
+            raise
+    
+    def iter_chunks(self, ref: DatasetRef, columns: Optional[List[str]] = None) -> Iterator[Columns]:
+        # A dataset removed under a reader (swept, deleted) fails the read
+        # rather than passing for an empty or partial one
+        names = columns or ref.columns
+        unknown = set(names) - set(ref.columns)
+        if unknown:
+            raise ValueError(f"Dataset {ref.dataset_id} has no columns {sorted(unknown)}")
+        if ref.chunks and not os.path.isdir(ref.path):
+            raise FileNotFoundError(f"Dataset {ref.dataset_id} is missing from {ref.path}; it may have expired")
+        for chunk in ref.chunks:
+            chunk_path = os.path.join(ref.path, chunk)
+            # np.load raises FileNotFoundError for a missing column file
+            yield {
+                name: np.load(os.path.join(chunk_path, f"{name}.npy"), mmap_mode="r")
+                for name in names
+            }
+    
+    def delete(self, ref: DatasetRef) -> None:
+        shutil.rmtree(ref.path, ignore_errors=True)
+    
+    def sweep(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        self._last_sweep = now
+        if self.ttl_seconds <= 0 or not os.path.isdir(self.root):
+            return 0
+        removed = 0
+        for entry in os.scandir(self.root):
+            try:
+                expired = entry.is_dir() and now - entry.stat().st_mtime > self.ttl_seconds
+            except FileNotFoundError:
+                continue
+            if expired:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed += 1
+        if removed:
+            logger.info(f"Removed {removed} expired artifacts from {self.root}")
+        self.swept += removed
+        return removed
+    
+    def stats(self) -> Dict[str, Any]:
+        return {"ttl_seconds": self.ttl_seconds, "swept": self.swept}
+
+# Shared by every activity in the worker process; WorkflowEngine applies the
+# configured location, chunk size and retention
+artifact_store = ArtifactStore()
\ No newline at end of file
@@ -0,0 +1,106 @@
+import functools
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+from prometheus_client import Counter
+from pydantic import BaseModel
+from loguru import logger
+
+T = TypeVar("T")
+
+ACTIVITY_CACHE_REQUESTS = Counter(
+    "atlas_activity_cache_requests_total",
+    "Workflow activity result cache lookups",
+    ["activity", "result"]
+)
+
+def content_hash(*parts: Any) -> str:
+    # Stable across processes: pydantic models are hashed by their fields
+    def default(value: Any) -> Any:
+        if isinstance(value, BaseModel):
+            return value.dict()
+        return str(value)
+    payload = json.dumps(parts, sort_keys=True, default=default)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class ActivityCache:
+    # In-process TTL cache for deterministic activity results, keyed by a
+    # hash of the activity name and its arguments. Lives in the worker, so a
+    # report regenerated in another format reuses the collected and analyzed
+    # data instead of recomputing it.
+    def __init__(self, ttl_seconds: float = 3600.0, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+    
+    def configure(self, ttl_seconds: float, max_entries: int) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+    
+    def get(self, name: str, key: str) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits[name] = self.hits.get(name, 0) + 1
+                ACTIVITY_CACHE_REQUESTS.labels(activity=name, result="hit").inc()
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses[name] = self.misses.get(name, 0) + 1
+            ACTIVITY_CACHE_REQUESTS.labels(activity=name, result="miss").inc()
+            return None
+    
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def cached(self, name: str) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+        # Decorates an activity body; apply below @activity.defn
+        def decorator(fn: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+            @functools.wraps(fn)
+            async def wrapper(*args: Any) -> T:
+                key = content_hash(name, *args)
+                cached = self.get(name, key)
+                if cached is not None:
+                    logger.info(f"Activity cache hit for {name}")
+                    return cached
+                result = await fn(*args)
+                self.put(key, result)
+                return result
+            return wrapper
+        return decorator
+    
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        names = set(self.hits) | set(self.misses)
+        return {
+            "entries": len(self._entries),
+            "activities": {
+                name: {
+                    "hits": self.hits.get(name, 0),
+                    "misses": self.misses.get(name, 0),
+                    "hit_rate": (
+                        self.hits.get(name, 0) / (self.hits.get(name, 0) + self.misses.get(name, 0))
+                    )
+                }
+                for name in sorted(names)
+            }
+        }
+
+# Shared by every activity in the worker process; WorkflowEngine applies the
+# configured TTL and size
+activity_cache = ActivityCache()
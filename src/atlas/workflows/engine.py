@@ -1,12 +1,25 @@
-from datetime import timedelta
-from typing import Dict, Any, List, Optional
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, Iterator, List, Optional, Callable, Awaitable, Sequence
 from temporalio import workflow, activity
-from temporalio.client import Client
+from temporalio.client import Client, WorkflowExecutionStatus
+from temporalio.common import WorkflowIDConflictPolicy, WorkflowIDReusePolicy
+from temporalio.exceptions import ApplicationError
+from temporalio.service import RPCError, RPCStatusCode
 from temporalio.worker import Worker
 from pydantic import BaseModel
+from prometheus_client import start_http_server
 from loguru import logger
 
 from ..core.config import AtlasConfig
+from .cache import activity_cache, content_hash
+
+# numpy does not survive the workflow sandbox re-importing this module
+with workflow.unsafe.imports_passed_through():
+    from ..core.analytics import AnalyticsEngine, Columns, render_report
+    from ..core.metrics import instrumented, stats_collector
+    from .artifacts import DatasetRef, artifact_store, read_csv_chunks
 
 class AnalysisResult(BaseModel):
     insights: List[Dict[str, Any]]
@@ -18,46 +31,236 @@ class ReportFormat(BaseModel):
     template: Optional[str] = None
     styling: Dict[str, Any] = {}
 
+def source_chunks(query: str, source: str, chunk_rows: int) -> Iterator[Columns]:
+    # Local CSV files (optionally file://) are streamed; other sources have no
+    # connector yet and yield nothing
+    path = source[len("file://"):] if source.startswith("file://") else source
+    if path.endswith(".csv") and os.path.isfile(path):
+        yield from read_csv_chunks(path, chunk_rows)
+    else:
+        logger.warning(f"No data connector for source: {source}")
+
+# Shared by the analysis activities; WorkflowEngine applies the configured
+# thresholds
+analytics = AnalyticsEngine()
+
+def _collect(query: str, sources: List[str]) -> Dict[str, Any]:
+    # Rows are written to the artifact store in columnar chunks; only the
+    # reference travels through Temporal
+    dataset_id = f"dataset_{content_hash(query, sources)[:32]}"
+    chunks = (
+        columns
+        for source in sources
+        for columns in source_chunks(query, source, artifact_store.chunk_rows)
+    )
+    dataset = artifact_store.write(dataset_id, chunks)
+    return {"dataset": dataset.dict(), "metadata": {"sources": sources, "rows": dataset.num_rows}}
+
+def _analyze(data: Dict[str, Any]) -> AnalysisResult:
+    # Datasets are read one memory-mapped chunk at a time; small inline
+    # {"data": [rows]} payloads are still accepted
+    if "dataset" in data:
+        dataset = DatasetRef(**data["dataset"])
+        insights = analytics.analyze_chunks(lambda: artifact_store.iter_chunks(dataset))
+        rows = dataset.num_rows
+    else:
+        rows = len(data.get("data", []))
+        insights = analytics.analyze(data["data"]) if rows else []
+    return AnalysisResult(
+        insights=insights,
+        confidence=analytics.confidence(insights),
+        metadata={"rows": rows}
+    )
+
 # Activity definitions
 @activity.defn
+@instrumented("workflow")
+@activity_cache.cached("collect_data")
 async def collect_data(query: str, sources: List[str]) -> Dict[str, Any]:
     try:
-        # Implement data collection logic
-        # This could involve calling external APIs, databases, or other data sources
-        return {"data": [], "metadata": {}}
+        # CSV parsing and chunk writes block, so they run off the worker's
+        # event loop
+        return await asyncio.get_running_loop().run_in_executor(None, _collect, query, sources)
     except Exception as e:
         logger.error(f"Error collecting data: {str(e)}")
         raise
 
 @activity.defn
+@instrumented("workflow")
+@activity_cache.cached("analyze_data")
 async def analyze_data(data: Dict[str, Any]) -> AnalysisResult:
     try:
-        # Implement analysis logic
+        return await asyncio.get_running_loop().run_in_executor(None, _analyze, data)
+    except Exception as e:
+        logger.error(f"Error analyzing data: {str(e)}")
+        raise
+
+@activity.defn
+@instrumented("workflow")
+async def merge_analyses(analyses: List[AnalysisResult]) -> AnalysisResult:
+    try:
+        # Confidence is weighted by how many insights each shard contributed
+        insights = [insight for analysis in analyses for insight in analysis.insights]
+        weights = [max(len(analysis.insights), 1) for analysis in analyses]
+        confidence = (
+            sum(analysis.confidence * weight for analysis, weight in zip(analyses, weights)) / sum(weights)
+            if analyses else 0.0
+        )
         return AnalysisResult(
-            insights=[],
-            confidence=0.0,
-            metadata={}
+            insights=insights,
+            confidence=confidence,
+            metadata={"shards": [analysis.metadata for analysis in analyses]}
         )
     except Exception as e:
-        logger.error(f"Error analyzing data: {str(e)}")
+        logger.error(f"Error merging analyses: {str(e)}")
         raise
 
 @activity.defn
+@instrumented("workflow")
 async def generate_report(
     analysis: AnalysisResult,
     format_config: ReportFormat
 ) -> Dict[str, Any]:
     try:
-        # Implement report generation logic
-        return {
-            "content": "",
-            "format": format_config.format_type,
-            "metadata": {}
-        }
+        # The same renderer as the agent's report_generation tool
+        return render_report(analysis.dict(), format_config.format_type)
+    except ValueError as e:
+        # An unsupported format fails the same way on every attempt
+        logger.error(f"Error generating report: {str(e)}")
+        raise ApplicationError(str(e), non_retryable=True) from e
     except Exception as e:
         logger.error(f"Error generating report: {str(e)}")
         raise
 
+# Declarative workflow DAGs
+ActivityFn = Callable[[Any, List[Any], timedelta], Awaitable[Any]]
+
+async def execute_activity(activity_fn: Any, args: List[Any], timeout: timedelta) -> Any:
+    return await workflow.execute_activity(
+        activity_fn,
+        args=args,
+        start_to_close_timeout=timeout
+    )
+
+class DagStep:
+    # One node of a workflow DAG. args(results) builds the activity arguments
+    # from the workflow inputs and earlier step results, keyed by name.
+    # With for_each, the step runs once per item of a workflow input list
+    # (args(results, item)); if for_each names another for_each step, item i
+    # starts as soon as that step's item i finishes and receives its result,
+    # so one slow shard does not hold up the others. A for_each step's result
+    # is the list of per-item results in input order.
+    def __init__(
+        self,
+        name: str,
+        activity_fn: Any,
+        args: Callable[..., List[Any]],
+        depends_on: Sequence[str] = (),
+        for_each: Optional[str] = None,
+        timeout: timedelta = timedelta(minutes=5)
+    ):
+        self.name = name
+        self.activity_fn = activity_fn
+        self.args = args
+        self.depends_on = list(depends_on)
+        self.for_each = for_each
+        self.timeout = timeout
+
+class WorkflowDag:
+    # Runs DagSteps concurrently inside a workflow: every step starts once its
+    # dependencies are done, and at most max_parallelism activities run at
+    # the same time. Steps must be listed after the steps they depend on.
+    def __init__(self, steps: List[DagStep]):
+        names = set()
+        for step in steps:
+            missing = [name for name in step.depends_on if name not in names]
+            if missing:
+                raise ValueError(f"Step {step.name} depends on unknown or later steps: {missing}")
+            if step.name in names:
+                raise ValueError(f"Duplicate step name: {step.name}")
+            names.add(step.name)
+        self.steps = steps
+    
+    async def run(
+        self,
+        inputs: Dict[str, Any],
+        max_parallelism: int,
+        execute: ActivityFn = execute_activity
+    ) -> Dict[str, Any]:
+        results: Dict[str, Any] = dict(inputs)
+        semaphore = asyncio.Semaphore(max_parallelism)
+        steps: Dict[str, asyncio.Future] = {}
+        shards: Dict[str, List[asyncio.Future]] = {}
+        
+        async def call(step: DagStep, args: List[Any]) -> Any:
+            async with semaphore:
+                return await execute(step.activity_fn, args, step.timeout)
+        
+        async def run_shard(step: DagStep, index: int) -> Any:
+            if step.for_each in shards:
+                item = await shards[step.for_each][index]
+            else:
+                item = inputs[step.for_each][index]
+            await asyncio.gather(*[steps[name] for name in step.depends_on])
+            return await call(step, step.args(results, item))
+        
+        async def run_step(step: DagStep) -> Any:
+            await asyncio.gather(*[steps[name] for name in step.depends_on])
+            if step.for_each:
+                results[step.name] = list(await asyncio.gather(*shards[step.name]))
+            else:
+                results[step.name] = await call(step, step.args(results))
+            return results[step.name]
+        
+        for step in self.steps:
+            if step.for_each:
+                width = (
+                    len(shards[step.for_each]) if step.for_each in shards
+                    else len(inputs[step.for_each])
+                )
+                shards[step.name] = [
+                    asyncio.ensure_future(run_shard(step, index)) for index in range(width)
+                ]
+            steps[step.name] = asyncio.ensure_future(run_step(step))
+        try:
+            await asyncio.gather(*steps.values())
+        finally:
+            for future in [*steps.values(), *[f for futures in shards.values() for f in futures]]:
+                future.cancel()
+        return results
+
+# collect and analyze fan out per source; merge waits for every shard
+INSIGHT_PIPELINE = WorkflowDag([
+    DagStep(
+        "collect",
+        collect_data,
+        args=lambda results, source: [results["query"], [source]],
+        for_each="sources",
+        timeout=timedelta(minutes=5)
+    ),
+    DagStep(
+        "analyze",
+        analyze_data,
+        args=lambda results, data: [data],
+        for_each="collect",
+        timeout=timedelta(minutes=10)
+    ),
+    DagStep(
+        "merge",
+        merge_analyses,
+        args=lambda results: [results["analyze"]],
+        depends_on=["analyze"],
+        timeout=timedelta(minutes=1)
+    ),
+    DagStep(
+        "report",
+        generate_report,
+        args=lambda results: [results["merge"], results["report_format"]],
+        depends_on=["merge"],
+        timeout=timedelta(minutes=5)
+    )
+])
+
 # Workflow definition
 @workflow.defn
 class InsightGenerationWorkflow:
@@ -66,33 +269,19 @@ class InsightGenerationWorkflow:
         self,
         query: str,
         sources: List[str],
-        report_format: ReportFormat
+        report_format: ReportFormat,
+        max_parallelism: int = 8
     ) -> Dict[str, Any]:
         try:
-            # 1. Data Collection
-            data = await workflow.execute_activity(
-                collect_data,
-                args=[query, sources],
-                start_to_close_timeout=timedelta(minutes=5)
-            )
-            
-            # 2. Analysis
-            analysis = await workflow.execute_activity(
-                analyze_data,
-                args=[data],
-                start_to_close_timeout=timedelta(minutes=10)
-            )
-            
-            # 3. Report Generation
-            report = await workflow.execute_activity(
-                generate_report,
-                args=[analysis, report_format],
-                start_to_close_timeout=timedelta(minutes=5)
+            # Collection and analysis run per source, then merge and report
+            results = await INSIGHT_PIPELINE.run(
+                {"query": query, "sources": sources, "report_format": report_format},
+                max_parallelism=max_parallelism
             )
             
             return {
-                "report": report,
-                "analysis": analysis.dict(),
+                "report": results["report"],
+                "analysis": results["merge"].dict(),
                 "metadata": {
                     "query": query,
                     "sources": sources,
@@ -108,18 +297,42 @@ class WorkflowEngine:
         self.config = config
         self.client = None
         self.worker = None
+        self.started = 0
+        self.attached = 0  # Duplicate submissions joined to a running execution
+        self.reused = 0  # Duplicate submissions answered by a completed execution
+        activity_cache.configure(
+            ttl_seconds=config.ACTIVITY_CACHE_TTL_SECONDS,
+            max_entries=config.ACTIVITY_CACHE_MAX_ENTRIES
+        )
+        artifact_store.configure(
+            root=config.ARTIFACT_STORE_PATH,
+            chunk_rows=config.ARTIFACT_CHUNK_ROWS,
+            ttl_seconds=config.ARTIFACT_TTL_SECONDS
+        )
+        analytics.configure(
+            anomaly_z_score=config.ANALYTICS_ANOMALY_Z_SCORE,
+            min_correlation=config.ANALYTICS_MIN_CORRELATION,
+            min_trend=config.ANALYTICS_MIN_TREND
+        )
+        stats_collector.register("workflow", self.stats)
     
     async def initialize(self):
         try:
             # Initialize Temporal client
             self.client = await Client.connect(self.config.WORKFLOW_ENGINE_URL)
             
+            # Activities run in this process; without an API process alongside,
+            # their metrics need an endpoint of their own
+            if self.config.WORKFLOW_METRICS_PORT:
+                start_http_server(self.config.WORKFLOW_METRICS_PORT)
+                logger.info(f"Serving workflow metrics on port {self.config.WORKFLOW_METRICS_PORT}")
+            
             # Initialize worker
             self.worker = Worker(
                 self.client,
                 task_queue="atlas_tasks",
                 workflows=[InsightGenerationWorkflow],
-                activities=[collect_data, analyze_data, generate_report]
+                activities=[collect_data, analyze_data, merge_analyses, generate_report]
             )
             
             logger.info("Workflow engine initialized successfully")
@@ -134,6 +347,11 @@ class WorkflowEngine:
             logger.error(f"Worker execution failed: {str(e)}")
             raise
     
+    @staticmethod
+    def workflow_id(query: str, sources: List[str], report_format: ReportFormat) -> str:
+        # Content-addressed, so identical submissions map to one execution
+        return f"insight_generation_{content_hash(query, sources, report_format)[:32]}"
+    
     async def execute_workflow(
         self,
         query: str,
@@ -141,13 +359,55 @@ class WorkflowEngine:
         report_format: ReportFormat
     ) -> Dict[str, Any]:
         try:
-            result = await self.client.execute_workflow(
+            workflow_id = self.workflow_id(query, sources, report_format)
+            handle = self.client.get_workflow_handle(workflow_id)
+            description = await self._describe(handle)
+            
+            # Duplicate submission: join the running execution or reuse a
+            # recent completed one
+            if description is not None:
+                if description.status == WorkflowExecutionStatus.RUNNING:
+                    self.attached += 1
+                    return await handle.result()
+                if self._is_fresh(description):
+                    self.reused += 1
+                    return await handle.result()
+            
+            # USE_EXISTING still attaches if an identical run started meanwhile
+            handle = await self.client.start_workflow(
                 InsightGenerationWorkflow.run,
-                args=[query, sources, report_format],
-                id=f"insight_generation_{datetime.now().timestamp()}",
-                task_queue="atlas_tasks"
+                args=[query, sources, report_format, self.config.WORKFLOW_MAX_PARALLELISM],
+                id=workflow_id,
+                task_queue="atlas_tasks",
+                id_reuse_policy=WorkflowIDReusePolicy.ALLOW_DUPLICATE,
+                id_conflict_policy=WorkflowIDConflictPolicy.USE_EXISTING
             )
-            return result
+            self.started += 1
+            return await handle.result()
         except Exception as e:
             logger.error(f"Failed to execute workflow: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+    
+    @staticmethod
+    async def _describe(handle: Any) -> Any:
+        try:
+            return await handle.describe()
+        except RPCError as e:
+            if e.status == RPCStatusCode.NOT_FOUND:
+                return None
+            raise
+    
+    def _is_fresh(self, description: Any) -> bool:
+        if description.status != WorkflowExecutionStatus.COMPLETED or description.close_time is None:
+            return False
+        age = datetime.now(timezone.utc) - description.close_time
+        return age.total_seconds() <= self.config.WORKFLOW_RESULT_TTL_SECONDS
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "started": self.started,
+            "attached": self.attached,
+            "reused": self.reused,
+            "activity_cache": activity_cache.stats(),
+            "artifacts": artifact_store.stats()
+        }
\ No newline at end of file
@@ -0,0 +1,179 @@
+import asyncio
+import time
+import httpx
+import pytest
+from fastapi import HTTPException
+from atlas.core.agent import AtlasResponse
+from atlas.core.config import AtlasConfig
+from atlas.core.deadline import check_deadline
+from atlas.services import query_handler
+from atlas.services.admission import AdmissionController, parse_deadline
+from atlas.services.auth import ApiKeyAuth, hash_api_key
+
+@pytest.fixture
+def admission():
+    return AdmissionController(
+        max_concurrent=1,
+        max_queue=2,
+        priorities={"persona:analyst": 10, "domain:reporting": -5},
+        initial_service_time=2.0
+    )
+
+class SlowAgent:
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.started = 0
+        self.cancelled = 0
+    
+    async def process_query(self, query, context):
+        self.started += 1
+        try:
+            await asyncio.sleep(self.seconds)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        check_deadline("generation")
+        return AtlasResponse(text=query, confidence=1.0)
+
+@pytest.fixture
+def api(admission):
+    query_handler.app.state.config = AtlasConfig()
+    query_handler.app.state.auth = ApiKeyAuth({"web": hash_api_key("web-key")})
+    query_handler.app.state.admission = admission
+    yield query_handler.app
+    query_handler.app.state.admission = None
+    query_handler.app.state.agent = None
+
+def deadline_in(seconds):
+    return {"X-API-Key": "web-key", "X-Request-Deadline": str(time.time() + seconds)}
+
+@pytest.mark.asyncio
+async def test_queued_queries_admitted_by_priority(admission):
+    # Arrange
+    order = []
+    
+    async def query(name, priority):
+        async with admission.admit(priority):
+            order.append(name)
+    
+    await admission.acquire()
+    low = asyncio.create_task(query("low", admission.priority(domain="reporting")))
+    await asyncio.sleep(0)
+    high = asyncio.create_task(query("high", admission.priority(persona="analyst", domain="reporting")))
+    await asyncio.sleep(0)
+    
+    # Act
+    admission.release(0.5)
+    await asyncio.gather(low, high)
+    
+    # Assert
+    assert order == ["high", "low"]
+    stats = admission.stats()
+    assert stats["active"] == 0
+    assert stats["queued"] == 0
+    assert stats["admitted"] == 3
+
+@pytest.mark.asyncio
+async def test_full_queue_sheds_with_retry_after_from_service_time(admission):
+    # Arrange
+    await admission.acquire()
+    first = asyncio.create_task(admission.acquire(priority=0))
+    second = asyncio.create_task(admission.acquire(priority=0))
+    await asyncio.sleep(0)
+    
+    # Act
+    with pytest.raises(HTTPException) as shed:
+        await admission.acquire(priority=0)
+    high = asyncio.create_task(admission.acquire(priority=10))
+    await asyncio.sleep(0)
+    admission.release()
+    await high
+    
+    # Assert
+    assert shed.value.status_code == 503
+    assert shed.value.headers["Retry-After"] == "6"
+    with pytest.raises(HTTPException) as evicted:
+        await second
+    assert evicted.value.status_code == 503
+    assert not first.done()
+    stats = admission.stats()
+    assert stats["rejected"]["queue_full"] == 1
+    assert stats["rejected"]["evicted"] == 1
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    assert admission.stats()["queued"] == 0
+
+@pytest.mark.asyncio
+async def test_deadlines_refused_or_expired_in_queue(admission):
+    # Arrange
+    admission.service_time = 0.01
+    await admission.acquire()
+    
+    # Act
+    with pytest.raises(HTTPException) as expired:
+        await admission.acquire(deadline=time.time() - 1)
+    with pytest.raises(HTTPException) as unreachable:
+        await admission.acquire(deadline=time.time() + 0.005)
+    with pytest.raises(HTTPException) as timed_out:
+        await admission.acquire(deadline=time.time() + 0.05)
+    
+    # Assert
+    assert expired.value.status_code == 504
+    assert unreachable.value.status_code == 503
+    assert timed_out.value.status_code == 504
+    assert admission.stats()["rejected"] == {"queue_full": 0, "evicted": 0, "deadline_unreachable": 1, "expired": 2}
+    assert admission.stats()["queued"] == 0
+
+def test_deadline_header_parsing():
+    # Act
+    explicit = parse_deadline("1700000030.5", default_timeout=60.0, now=1700000000.0)
+    capped = parse_deadline("1800000000", default_timeout=60.0, now=1700000000.0)
+    default = parse_deadline(None, default_timeout=60.0, now=1700000000.0)
+    
+    # Assert
+    assert explicit == 1700000030.5
+    assert capped == 1700000060.0
+    assert default == 1700000060.0
+    assert parse_deadline(None) is None
+    with pytest.raises(HTTPException) as error:
+        parse_deadline("tomorrow")
+    assert error.value.status_code == 400
+
+@pytest.mark.asyncio
+async def test_timed_out_query_stops_agent_and_frees_slot(api, admission):
+    # Arrange
+    agent = SlowAgent(seconds=10)
+    api.state.agent = agent
+    transport = httpx.ASGITransport(app=api)
+    
+    # Act
+    async with httpx.AsyncClient(transport=transport, base_url="http://atlas") as client:
+        response = await client.post("/query", json={"text": "slow"}, headers=deadline_in(0.5))
+        await asyncio.sleep(0.01)
+    
+    # Assert
+    assert response.status_code == 504
+    assert (agent.started, agent.cancelled) == (1, 1)
+    assert admission.active == 0
+    assert query_handler.inflight.stats()["in_flight"] == 0
+
+@pytest.mark.asyncio
+async def test_follower_outlives_leader_deadline(api):
+    # Arrange
+    agent = SlowAgent(seconds=1.0)
+    api.state.agent = agent
+    transport = httpx.ASGITransport(app=api)
+    
+    # Act
+    async with httpx.AsyncClient(transport=transport, base_url="http://atlas") as client:
+        leader, follower = await asyncio.gather(
+            client.post("/query", json={"text": "shared"}, headers=deadline_in(0.5)),
+            client.post("/query", json={"text": "shared"}, headers=deadline_in(5))
+        )
+    
+    # Assert
+    assert leader.status_code == 504
+    assert follower.status_code == 200
+    assert follower.json()["text"] == "shared"
+    assert agent.started == 2
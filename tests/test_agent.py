@@ -1,7 +1,8 @@
 import pytest
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 from atlas.core.agent import AtlasAgent, QueryContext, AtlasResponse
 from atlas.core.config import AtlasConfig
+from atlas.core.scheduler import GenerationOutput
 
 @pytest.fixture
 def config():
@@ -100,4 +101,49 @@ async def test_process_query_with_context(agent, mock_memory):
     assert call_args is not None
     stored_metadata = call_args[1].get('metadata', {})
     assert 'context' in stored_metadata
-    assert stored_metadata['context'].get('domain') == 'healthcare'
\ No newline at end of file
+    assert stored_metadata['context'].get('domain') == 'healthcare'
+
+class WordTokenizer:
+    def __call__(self, texts, add_special_tokens=False):
+        return {"input_ids": [text.split() for text in texts]}
+
+class FakeScheduler:
+    async def generate(self, prompt, max_new_tokens=None):
+        if "fail" in prompt.body:
+            raise RuntimeError("generation failed")
+        return GenerationOutput(text="answer", num_tokens=1, confidence=0.9)
+
+@pytest.fixture
+async def batch_agent(config):
+    config.SEMANTIC_CACHE_ENABLED = False
+    memory = Mock()
+    memory.embeddings.embed_many = AsyncMock()
+    memory.retrieve_relevant_many = AsyncMock(side_effect=lambda queries, partitions=None: [[] for _ in queries])
+    memory.store_memories = AsyncMock()
+    with patch('atlas.core.agent.AtlasAgent._initialize_memory', return_value=memory), \
+         patch('atlas.core.agent.AtlasAgent._initialize_llm', return_value=Mock()), \
+         patch('atlas.core.agent.AtlasAgent._initialize_tokenizer', return_value=WordTokenizer()):
+        agent = AtlasAgent(config)
+        agent.scheduler = FakeScheduler()
+        return agent
+
+@pytest.mark.asyncio
+async def test_process_queries_reports_failures_per_item(batch_agent):
+    # Arrange
+    queries = [
+        ("asthma trends", QueryContext(domain="healthcare")),
+        ("this will fail", None),
+        ("inhaler adherence", None)
+    ]
+    
+    # Act
+    results = dict([item async for item in batch_agent.process_queries(queries)])
+    
+    # Assert
+    assert isinstance(results[0], AtlasResponse)
+    assert isinstance(results[1], RuntimeError)
+    assert isinstance(results[2], AtlasResponse)
+    batch_agent.memory.embeddings.embed_many.assert_awaited_once()
+    batch_agent.memory.retrieve_relevant_many.assert_awaited_once()
+    stored = batch_agent.memory.store_memories.call_args[0][0]
+    assert sorted(text for text, _ in stored) == ["asthma trends", "inhaler adherence"]
\ No newline at end of file
@@ -0,0 +1,72 @@
+import numpy as np
+import pytest
+from atlas.core.analytics import AnalyticsEngine
+
+def synthetic(rows, seed=0):
+    rng = np.random.default_rng(seed)
+    spend = np.linspace(0, 100, rows) + rng.normal(0, 5, rows)
+    revenue = 2 * spend + rng.normal(0, 5, rows)
+    noise = rng.normal(0, 1, rows)
+    noise[[10, 500]] = [25.0, -30.0]
+    return {"spend": spend, "revenue": revenue, "noise": noise, "district": np.array(["a"] * rows)}
+
+def by_type(insights, kind):
+    return [insight for insight in insights if insight["type"] == kind]
+
+def test_standard_insight_set():
+    # Arrange
+    engine = AnalyticsEngine(block_rows=256)
+    data = synthetic(2000)
+    
+    # Act
+    insights = engine.analyze(data)
+    
+    # Assert
+    aggregates = {insight["column"]: insight for insight in by_type(insights, "aggregate")}
+    assert set(aggregates) == {"spend", "revenue", "noise"}
+    assert aggregates["spend"]["mean"] == pytest.approx(data["spend"].mean())
+    assert aggregates["spend"]["std"] == pytest.approx(data["spend"].std())
+    assert aggregates["noise"]["max"] == 25.0
+    
+    trends = {insight["column"]: insight for insight in by_type(insights, "trend")}
+    assert trends["spend"]["direction"] == "increasing"
+    assert "noise" not in trends
+    
+    anomalies = {insight["column"]: insight for insight in by_type(insights, "anomaly")}
+    assert [example["row"] for example in anomalies["noise"]["examples"][:2]] == [500, 10]
+    
+    correlations = by_type(insights, "correlation")
+    assert [insight["columns"] for insight in correlations] == [["spend", "revenue"]]
+    assert correlations[0]["r"] == pytest.approx(np.corrcoef(data["spend"], data["revenue"])[0, 1])
+    assert all(0.0 <= insight["confidence"] <= 1.0 for insight in insights)
+
+def test_chunked_matches_in_memory():
+    # Arrange
+    data = synthetic(3000, seed=1)
+    chunks = [{name: values[i:i + 700] for name, values in data.items()} for i in range(0, 3000, 700)]
+    
+    # Act
+    whole = AnalyticsEngine(block_rows=10 ** 6).analyze(data)
+    chunked = AnalyticsEngine().analyze_chunks(lambda: iter(chunks))
+    
+    # Assert
+    assert [insight["type"] for insight in whole] == [insight["type"] for insight in chunked]
+    for expected, actual in zip(whole, chunked):
+        for key in ("mean", "std", "r", "count"):
+            if key in expected:
+                assert actual[key] == pytest.approx(expected[key])
+
+def test_missing_values_and_rows_input():
+    # Arrange
+    engine = AnalyticsEngine()
+    rows = [{"x": 1, "y": "a"}, {"x": None, "y": "b"}, {"x": 3, "y": "c"}]
+    
+    # Act
+    insights = engine.analyze(rows)
+    
+    # Assert
+    assert by_type(insights, "aggregate") == [{
+        "type": "aggregate", "column": "x", "count": 2, "missing": 1, "sum": 4.0,
+        "mean": 2.0, "std": 1.0, "min": 1.0, "max": 3.0, "confidence": pytest.approx(2 / 3)
+    }]
+    assert engine.analyze({"y": np.array(["a", "b"])}) == []
\ No newline at end of file
@@ -0,0 +1,142 @@
+import csv
+import os
+import threading
+import time
+import numpy as np
+import pytest
+from atlas.workflows.artifacts import ArtifactStore, DatasetRef, artifact_store
+from atlas.workflows.cache import activity_cache
+from atlas.workflows import engine
+from atlas.workflows.engine import analyze_data, collect_data
+
+@pytest.fixture
+def store(tmp_path):
+    root, chunk_rows = artifact_store.root, artifact_store.chunk_rows
+    artifact_store.configure(root=str(tmp_path / "artifacts"), chunk_rows=100)
+    activity_cache.clear()
+    yield artifact_store
+    artifact_store.configure(root=root, chunk_rows=chunk_rows)
+    activity_cache.clear()
+
+def test_chunks_round_trip_across_writes(tmp_path):
+    # Arrange
+    store = ArtifactStore(root=str(tmp_path), chunk_rows=4)
+    parts = [
+        {"x": np.arange(start, start + 3, dtype=np.float64), "label": np.array(["a", "b", "c"])}
+        for start in (0, 3, 6)
+    ]
+    
+    # Act
+    ref = store.write("dataset", parts)
+    chunks = list(store.iter_chunks(ref))
+    
+    # Assert
+    assert ref.num_rows == 9
+    assert [len(chunk["x"]) for chunk in chunks] == [4, 4, 1]
+    assert np.concatenate([chunk["x"] for chunk in chunks]).tolist() == list(range(9))
+    assert isinstance(chunks[0]["x"], np.memmap)
+
+def test_object_columns_rejected(tmp_path):
+    # Arrange
+    store = ArtifactStore(root=str(tmp_path))
+    
+    # Act & Assert
+    with pytest.raises(ValueError):
+        store.write("dataset", [{"x": np.array([{"a": 1}], dtype=object)}])
+    assert list(tmp_path.iterdir()) == []
+
+def test_rewrite_leaves_earlier_version_readable(tmp_path):
+    # Arrange
+    store = ArtifactStore(root=str(tmp_path), chunk_rows=4)
+    first = store.write("dataset", [{"x": np.arange(3, dtype=np.float64)}])
+    reader = store.iter_chunks(first)
+    mapped = next(reader)
+    
+    # Act
+    second = store.write("dataset", [{"x": np.arange(10, 13, dtype=np.float64)}])
+    
+    # Assert
+    assert second.path != first.path
+    assert mapped["x"].tolist() == [0, 1, 2]
+    assert [chunk["x"].tolist() for chunk in store.iter_chunks(first)] == [[0, 1, 2]]
+    assert [chunk["x"].tolist() for chunk in store.iter_chunks(second)] == [[10, 11, 12]]
+
+def test_missing_dataset_files_fail_the_read(tmp_path):
+    # Arrange
+    store = ArtifactStore(root=str(tmp_path), chunk_rows=2)
+    swept = store.write("swept", [{"x": np.arange(3, dtype=np.float64)}])
+    partial = store.write("partial", [{"x": np.arange(3, dtype=np.float64)}])
+    store.delete(swept)
+    os.remove(os.path.join(partial.path, partial.chunks[1], "x.npy"))
+    
+    # Act & Assert
+    with pytest.raises(FileNotFoundError):
+        list(store.iter_chunks(swept))
+    with pytest.raises(FileNotFoundError):
+        list(store.iter_chunks(partial))
+    with pytest.raises(ValueError):
+        list(store.iter_chunks(partial, columns=["y"]))
+
+def test_sweep_removes_expired_datasets(tmp_path):
+    # Arrange
+    store = ArtifactStore(root=str(tmp_path), ttl_seconds=60)
+    old = store.write("old", [{"x": np.arange(3, dtype=np.float64)}])
+    abandoned = tmp_path / "abandoned.tmp"
+    abandoned.mkdir()
+    os.utime(old.path, (time.time() - 120, time.time() - 120))
+    os.utime(abandoned, (time.time() - 120, time.time() - 120))
+    fresh = store.write("fresh", [{"x": np.arange(3, dtype=np.float64)}])
+    
+    # Act
+    removed = store.sweep()
+    
+    # Assert
+    assert removed == 2
+    assert [entry.name for entry in tmp_path.iterdir()] == [os.path.basename(fresh.path)]
+    assert store.stats()["swept"] == 2
+
+@pytest.mark.asyncio
+async def test_collect_passes_reference_and_analysis_streams_chunks(store, tmp_path):
+    # Arrange
+    path = tmp_path / "budget.csv"
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["district", "spend"])
+        writer.writerows([[f"d{i % 7}", i] for i in range(1000)])
+    
+    # Act
+    collected = await collect_data("spend by district", [str(path)])
+    analysis = await analyze_data(collected)
+    
+    # Assert
+    dataset = DatasetRef(**collected["dataset"])
+    assert "data" not in collected
+    assert dataset.num_rows == 1000
+    assert len(dataset.chunks) == 10
+    spend = next(
+        insight for insight in analysis.insights
+        if insight["type"] == "aggregate" and insight["column"] == "spend"
+    )
+    assert spend["count"] == 1000
+    assert spend["mean"] == pytest.approx(499.5)
+    assert spend["std"] == pytest.approx(np.arange(1000).std())
+    assert spend["max"] == 999
+
+@pytest.mark.asyncio
+async def test_activities_run_off_the_event_loop(store, tmp_path, monkeypatch):
+    # Arrange
+    path = tmp_path / "budget.csv"
+    path.write_text("spend\n1\n2\n")
+    threads = []
+    read_csv_chunks = engine.read_csv_chunks
+    def tracking(*args):
+        threads.append(threading.get_ident())
+        return read_csv_chunks(*args)
+    monkeypatch.setattr(engine, "read_csv_chunks", tracking)
+    
+    # Act
+    collected = await collect_data("spend", [str(path)])
+    
+    # Assert
+    assert threads and threads[0] != threading.get_ident()
+    assert collected["metadata"]["rows"] == 2
\ No newline at end of file
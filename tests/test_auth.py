@@ -0,0 +1,118 @@
+import asyncio
+import httpx
+import pytest
+from fastapi import HTTPException
+from atlas.core.agent import AtlasResponse
+from atlas.core.config import AtlasConfig
+from atlas.services import query_handler
+from atlas.services.auth import ApiKeyAuth, hash_api_key
+
+@pytest.fixture
+def auth():
+    return ApiKeyAuth(
+        {"web": hash_api_key("web-key"), "etl": hash_api_key("etl-key")},
+        rate=1000.0,
+        burst=2,
+        max_concurrent=1,
+        overrides={"etl": {"concurrency": 3}}
+    )
+
+def test_hashed_keys_resolve_to_their_client(auth):
+    # Act
+    client = auth.authenticate("etl-key")
+    
+    # Assert
+    assert client.name == "etl"
+    with pytest.raises(HTTPException) as error:
+        auth.authenticate("etl-key ")
+    assert error.value.status_code == 403
+    with pytest.raises(HTTPException):
+        auth.authenticate(None)
+    assert auth.stats()["unauthorized"] == 2
+
+def test_concurrency_quota_rejects_until_released(auth):
+    # Arrange
+    client = auth.authenticate("web-key")
+    auth.acquire(client)
+    
+    # Act
+    with pytest.raises(HTTPException) as error:
+        auth.acquire(client)
+    auth.release(client)
+    auth.acquire(client)
+    
+    # Assert
+    assert error.value.status_code == 429
+    assert error.value.headers["Retry-After"] == "1"
+    assert auth.stats()["clients"]["web"]["concurrency_limited"] == 1
+
+def test_token_bucket_limits_bursts_per_client():
+    # Arrange
+    auth = ApiKeyAuth({"web": hash_api_key("web-key"), "etl": hash_api_key("etl-key")}, rate=0.5, burst=2)
+    web = auth.authenticate("web-key")
+    
+    # Act
+    auth.acquire(web)
+    auth.acquire(web)
+    with pytest.raises(HTTPException) as error:
+        auth.acquire(web)
+    auth.acquire(auth.authenticate("etl-key"))
+    
+    # Assert
+    assert error.value.status_code == 429
+    assert error.value.headers["Retry-After"] == "2"
+    assert auth.stats()["clients"]["web"]["rate_limited"] == 1
+
+@pytest.mark.asyncio
+async def test_endpoint_checks_key_before_agent():
+    # Arrange
+    query_handler.app.state.auth = ApiKeyAuth({"web": hash_api_key("web-key")})
+    query_handler.app.state.agent = None
+    transport = httpx.ASGITransport(app=query_handler.app)
+    
+    # Act
+    async with httpx.AsyncClient(transport=transport, base_url="http://atlas") as client:
+        rejected = await client.post("/query", json={"text": "q"}, headers={"X-API-Key": "wrong"})
+        accepted = await client.post("/query", json={"text": "q"}, headers={"X-API-Key": "web-key"})
+    
+    # Assert
+    assert rejected.status_code == 403
+    assert accepted.status_code == 503
+    assert query_handler.app.state.auth.clients["web"].active == 0
+
+class RecordingAgent:
+    def __init__(self):
+        self.users = []
+    
+    async def process_query(self, query, context):
+        self.users.append(context.user_id)
+        await asyncio.sleep(0.1)
+        return AtlasResponse(text=query, confidence=1.0)
+
+@pytest.mark.asyncio
+async def test_query_scoped_to_authenticated_client():
+    # Arrange
+    agent = RecordingAgent()
+    query_handler.app.state.config = AtlasConfig()
+    query_handler.app.state.auth = ApiKeyAuth(
+        {"web": hash_api_key("web-key"), "etl": hash_api_key("etl-key")},
+        max_concurrent=2
+    )
+    query_handler.app.state.admission = None
+    query_handler.app.state.agent = agent
+    transport = httpx.ASGITransport(app=query_handler.app)
+    
+    # Act
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://atlas") as client:
+            responses = await asyncio.gather(*[
+                client.post("/query", json={"text": "q"}, headers={"X-API-Key": key})
+                for key in ("web-key", "web-key", "etl-key")
+            ])
+    finally:
+        query_handler.app.state.agent = None
+    
+    # Assert
+    assert [response.status_code for response in responses] == [200, 200, 200]
+    assert sorted(agent.users) == ["etl", "web"]
+    assert sum(bool(response.json()["metadata"].get("coalesced")) for response in responses) == 1
@@ -0,0 +1,194 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
+import numpy as np
+import pytest
+from atlas.core.agent import AtlasAgent
+from atlas.core.config import AtlasConfig
+from atlas.memory.compaction import MemoryCompactor, cold_collection, deduplicate
+from atlas.memory.local_store import LocalVectorStore
+from atlas.memory.vector_store import AtlasMemory
+
+DAY = 86400
+
+async def run(fn, *args):
+    return fn(*args)
+
+def unit(vectors):
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+@pytest.fixture
+def store(tmp_path):
+    store = LocalVectorStore(str(tmp_path), nlist=4)
+    store.ensure_collection("memories", 8)
+    store.ensure_collection(cold_collection("memories"), 8)
+    yield store
+    store.close()
+
+def insert(store, name, vectors, timestamps):
+    store.insert(
+        name,
+        [f"memory {i}" for i in range(len(vectors))],
+        vectors.tolist(),
+        list(timestamps),
+        [{"i": i} for i in range(len(vectors))]
+    )
+
+def test_near_duplicates_fold_into_newest():
+    # Arrange
+    base = unit(np.eye(3, 8))
+    rows = [
+        {"id": 0, "text": "old", "timestamp": 100, "metadata": {}, "embedding": base[0]},
+        {"id": 1, "text": "new", "timestamp": 200, "metadata": {}, "embedding": base[0] * 0.999},
+        {"id": 2, "text": "other", "timestamp": 150, "metadata": {}, "embedding": base[1]}
+    ]
+    
+    # Act
+    representatives = deduplicate(rows, max_distance=0.05)
+    
+    # Assert
+    assert [row["text"] for row in representatives] == ["new", "other"]
+    assert representatives[0]["metadata"] == {"merged_count": 2, "first_timestamp": 100}
+
+@pytest.mark.asyncio
+async def test_compaction_moves_old_memories_in_bounded_batches(store):
+    # Arrange
+    now = 100 * DAY
+    vectors = unit(np.random.default_rng(0).standard_normal((60, 8)).astype(np.float32))
+    insert(store, "memories", vectors[:50], [now - 10 * DAY] * 50)
+    insert(store, "memories", vectors[50:], [now] * 10)
+    compactor = MemoryCompactor(
+        store, run, "memories", hot_age_seconds=7 * DAY, max_age_seconds=30 * DAY,
+        batch_size=10, max_batches=2
+    )
+    store.fetch_older_than = Mock(wraps=store.fetch_older_than)
+    
+    # Act
+    first = await compactor.compact(now=now)
+    second = await compactor.compact(now=now)
+    await compactor.compact(now=now)
+    
+    # Assert
+    assert first["demoted"] == 20
+    assert second["demoted"] == 20
+    assert all(call.args[2] == 10 for call in store.fetch_older_than.call_args_list)
+    assert store.stats()["memories"]["live"] == 10
+    assert store.stats()[cold_collection("memories")]["live"] == 50
+    assert compactor.stats()["demoted"] == 50
+
+@pytest.mark.asyncio
+async def test_expired_memories_removed_from_both_tiers(store):
+    # Arrange
+    now = 100 * DAY
+    vectors = unit(np.random.default_rng(1).standard_normal((20, 8)).astype(np.float32))
+    insert(store, "memories", vectors[:10], [now - 40 * DAY] * 5 + [now] * 5)
+    insert(store, cold_collection("memories"), vectors[10:], [now - 40 * DAY] * 5 + [now - 10 * DAY] * 5)
+    compactor = MemoryCompactor(store, run, "memories", hot_age_seconds=7 * DAY, max_age_seconds=30 * DAY)
+    
+    # Act
+    expired = await compactor.expire(int(now - 30 * DAY))
+    
+    # Assert
+    assert expired == 10
+    assert store.stats()["memories"]["live"] == 5
+    assert store.stats()[cold_collection("memories")]["live"] == 5
+
+@pytest.mark.asyncio
+async def test_demoted_duplicate_updates_cold_entry(store):
+    # Arrange
+    now = 100 * DAY
+    vector, other = unit(np.eye(2, 8)).tolist()
+    cold = cold_collection("memories")
+    store.insert(cold, ["old"], [vector], [now - 20 * DAY], [{"merged_count": 3, "first_timestamp": now - 30 * DAY}])
+    store.insert("memories", ["new"], [vector], [now - 10 * DAY], [{}])
+    compactor = MemoryCompactor(store, run, "memories", hot_age_seconds=7 * DAY, max_age_seconds=60 * DAY)
+    
+    # Act
+    first = await compactor.compact(now=now)
+    # A pass that crashed after copying to the cold tier, before the delete
+    store.insert("memories", ["copied"], [other], [now - 8 * DAY], [{}])
+    store.insert(cold, ["copied"], [other], [now - 8 * DAY], [{"merged_count": 1, "first_timestamp": now - 8 * DAY}])
+    second = await compactor.compact(now=now)
+    
+    # Assert: the first pass folds into the cold entry; the rerun adds nothing
+    hits = store.search(cold, [vector, other], 1, {})
+    assert first == {"demoted": 1, "merged": 1, "expired": 0}
+    assert second == {"demoted": 1, "merged": 1, "expired": 0}
+    assert store.stats()[cold]["live"] == 2
+    assert hits[0][0]["text"] == "new"
+    assert hits[0][0]["metadata"] == {"merged_count": 4, "first_timestamp": now - 30 * DAY}
+    assert hits[1][0]["metadata"] == {"merged_count": 1, "first_timestamp": now - 8 * DAY}
+
+@pytest.mark.asyncio
+async def test_retrieval_reranks_across_tiers_with_decay(tmp_path):
+    # Arrange
+    config = AtlasConfig(
+        VECTOR_STORE_BACKEND="local",
+        LOCAL_STORE_PATH=str(tmp_path),
+        EMBEDDING_DIM=64,
+        MEMORY_WRITE_BEHIND=False,
+        MEMORY_DECAY_FACTOR=0.9
+    )
+    memory = AtlasMemory(config)
+    name = config.MEMORY_COLLECTION_NAME
+    now = time.time()
+    embeddings = await memory.embeddings.embed_many([
+        "asthma medication adherence in the UK",
+        "asthma medication adherence trends",
+        "municipal budget deficit forecast"
+    ])
+    memory.store.insert(
+        cold_collection(name), ["asthma medication adherence in the UK"], embeddings[:1].tolist(),
+        [int(now - 60 * DAY)], [{}]
+    )
+    memory.store.insert(
+        name, ["asthma medication adherence trends", "municipal budget deficit forecast"],
+        embeddings[1:].tolist(), [int(now), int(now)], [{}, {}]
+    )
+    
+    # Act
+    memories = await memory.retrieve_relevant("asthma medication adherence in the UK", k=2)
+    memory.close()
+    
+    # Assert: the exact but two-month-old match ranks below the fresh one
+    assert [m["text"] for m in memories][0] == "asthma medication adherence trends"
+    assert "asthma medication adherence in the UK" in [m["text"] for m in memories]
+    assert memories[0]["score"] >= memories[1]["score"]
+
+def test_agent_builds_off_loop(tmp_path):
+    # Arrange: like Python 3.9, asyncio primitives need a loop where they are made
+    def needs_loop(cls):
+        def build(*args, **kwargs):
+            asyncio.get_running_loop()
+            return cls(*args, **kwargs)
+        return build
+    
+    config = AtlasConfig(VECTOR_STORE_BACKEND="local", LOCAL_STORE_PATH=str(tmp_path), EMBEDDING_DIM=64)
+    primitives = [
+        patch(f"asyncio.{name}", needs_loop(getattr(asyncio, name)))
+        for name in ("Lock", "Event", "Condition", "Semaphore", "Queue")
+    ]
+    
+    # Act
+    with patch("atlas.core.agent.AtlasAgent._initialize_llm", return_value=Mock()), \
+         patch("atlas.core.agent.AtlasAgent._initialize_tokenizer", return_value=Mock()):
+        for primitive in primitives:
+            primitive.start()
+        try:
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                agent = executor.submit(AtlasAgent, config).result()
+        finally:
+            for primitive in primitives:
+                primitive.stop()
+    
+    async def use():
+        await agent.start()
+        async with agent.memory.compactor.paused():
+            pass
+        result = await agent.memory.compactor.compact()
+        await agent.shutdown()
+        return result
+    
+    # Assert
+    assert asyncio.run(use()) == {"demoted": 0, "merged": 0, "expired": 0}
\ No newline at end of file
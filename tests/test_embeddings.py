@@ -0,0 +1,100 @@
+import asyncio
+import threading
+import numpy as np
+import pytest
+from unittest.mock import patch
+from atlas.core.config import AtlasConfig
+from atlas.memory.embeddings import EmbeddingCache, EmbeddingEngine, HashingEmbedder
+
+@pytest.fixture
+def engine():
+    engine = EmbeddingEngine(HashingEmbedder(dim=256), max_batch_size=32, max_wait=0.01)
+    yield engine
+    engine.close()
+
+def test_hashing_embedder_is_deterministic_and_discriminative():
+    # Arrange
+    embedder = HashingEmbedder(dim=256)
+    
+    # Act
+    vectors = embedder.embed_batch([
+        "asthma medication adherence trends",
+        "asthma medication adherence trends",
+        "asthma adherence trends in the UK",
+        "quarterly municipal budget deficit"
+    ])
+    
+    # Assert
+    assert vectors.shape == (4, 256)
+    assert np.allclose(np.linalg.norm(vectors, axis=1), 1.0)
+    assert np.array_equal(vectors[0], vectors[1])
+    assert vectors[0] @ vectors[2] > vectors[0] @ vectors[3]
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_batch(engine):
+    # Act
+    with patch.object(engine.batcher, "fn", wraps=engine.batcher.fn) as embed_batch:
+        await asyncio.gather(*[engine.embed(f"query {i}") for i in range(10)])
+    
+    # Assert
+    assert embed_batch.call_count == 1
+    assert engine.stats()["batch_sizes"] == {16: 1}
+
+@pytest.mark.asyncio
+async def test_repeated_text_served_from_cache(engine):
+    # Act
+    first = await engine.embed("asthma trends")
+    second = await engine.embed("asthma trends")
+    
+    # Assert
+    assert np.array_equal(first, second)
+    assert engine.stats()["cache_hits"] == 1
+    assert engine.stats()["cache_hit_rate"] == 0.5
+
+def test_disk_cache_survives_reopen(tmp_path):
+    # Arrange
+    path = str(tmp_path / "embeddings.db")
+    cache = EmbeddingCache(max_entries=10, path=path)
+    cache.put("key", np.ones(4, dtype=np.float32))
+    cache.close()
+    
+    # Act
+    reopened = EmbeddingCache(max_entries=10, path=path)
+    
+    # Assert
+    assert reopened.get("key") is None
+    assert np.array_equal(reopened.load(["key", "other"])["key"], np.ones(4, dtype=np.float32))
+    assert np.array_equal(reopened.get("key"), np.ones(4, dtype=np.float32))
+
+@pytest.mark.asyncio
+async def test_disk_cache_io_runs_on_embedding_thread_in_batches(tmp_path):
+    # Arrange
+    path = str(tmp_path / "embeddings.db")
+    writer = EmbeddingEngine(HashingEmbedder(dim=64), cache=EmbeddingCache(path=path), max_wait=0.01)
+    await asyncio.gather(*[writer.embed(f"query {i}") for i in range(5)])
+    writer.close()
+    engine = EmbeddingEngine(HashingEmbedder(dim=64), cache=EmbeddingCache(path=path), max_wait=0.01)
+    loop_thread = threading.get_ident()
+    threads = []
+    load = engine.cache.load
+    def tracking(keys):
+        threads.append(threading.get_ident())
+        return load(keys)
+    
+    # Act
+    with patch.object(engine.cache, "load", side_effect=tracking), \
+         patch.object(engine.embedder, "embed_batch", wraps=engine.embedder.embed_batch) as embed_batch:
+        vectors = await asyncio.gather(*[engine.embed(f"query {i}") for i in range(8)])
+    engine.close()
+    
+    # Assert
+    assert len(threads) == 1 and threads[0] != loop_thread
+    assert embed_batch.call_count == 1
+    assert len(embed_batch.call_args[0][0]) == 3
+    assert np.array_equal(vectors[0], HashingEmbedder(dim=64).embed_batch(["query 0"])[0])
+    assert engine.stats()["cache_disk_hits"] == 5
+    assert engine.stats()["cache_misses"] == 3
+
+def test_embedding_dim_validated():
+    with pytest.raises(ValueError):
+        AtlasConfig(EMBEDDING_DIM=0)
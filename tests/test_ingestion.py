@@ -0,0 +1,123 @@
+import asyncio
+import os
+import subprocess
+import sys
+import pytest
+from unittest.mock import AsyncMock
+from atlas.memory.ingestion import IngestionQueue, MemoryRecord
+
+def make_record(i: int) -> MemoryRecord:
+    return MemoryRecord(
+        text=f"query {i}",
+        metadata={"response": f"answer {i}"},
+        timestamp=1700000000 + i,
+        collection_name="atlas_memories"
+    )
+
+@pytest.fixture
+def flush_fn():
+    return AsyncMock()
+
+@pytest.mark.asyncio
+async def test_records_flushed_in_batches(flush_fn):
+    # Arrange
+    queue = IngestionQueue(flush_fn, max_batch_size=5, flush_interval=60.0)
+    
+    # Act
+    for i in range(10):
+        await queue.put(make_record(i))
+    await queue.stop()
+    
+    # Assert
+    assert flush_fn.await_count == 2
+    collection_name, records = flush_fn.await_args_list[0].args
+    assert collection_name == "atlas_memories"
+    assert [r.text for r in records] == [f"query {i}" for i in range(5)]
+    assert queue.stats()["records_flushed"] == 10
+
+@pytest.mark.asyncio
+async def test_put_applies_backpressure_when_full(flush_fn):
+    # Arrange
+    queue = IngestionQueue(flush_fn, max_batch_size=100, flush_interval=60.0, max_queue_size=2)
+    await queue.put(make_record(0))
+    await queue.put(make_record(1))
+    
+    # Act
+    blocked = asyncio.create_task(queue.put(make_record(2)))
+    await asyncio.sleep(0.05)
+    was_blocked = not blocked.done()
+    await queue.flush()
+    await asyncio.wait_for(blocked, timeout=1.0)
+    await queue.stop()
+    
+    # Assert
+    assert was_blocked
+    assert queue.stats()["records_flushed"] == 3
+
+@pytest.mark.asyncio
+async def test_unflushed_records_recovered_from_spill(tmp_path, flush_fn):
+    # Arrange
+    spill_path = str(tmp_path / "spill.jsonl")
+    failing = AsyncMock(side_effect=Exception("Database error"))
+    queue = IngestionQueue(failing, max_batch_size=100, flush_interval=60.0, spill_path=spill_path)
+    for i in range(3):
+        await queue.put(make_record(i))
+    await queue.stop()
+    
+    # Act
+    recovered = IngestionQueue(flush_fn, max_batch_size=100, flush_interval=60.0, spill_path=spill_path)
+    await recovered.start()
+    await recovered.stop()
+    
+    # Assert
+    _, records = flush_fn.await_args.args
+    assert [r.text for r in records] == ["query 0", "query 1", "query 2"]
+    assert open(recovered.spill_file).read() == ""
+
+@pytest.mark.asyncio
+async def test_spill_files_are_per_process_and_claimed_from_dead_workers(tmp_path, flush_fn):
+    # Arrange
+    exited = subprocess.Popen([sys.executable, "-c", "pass"])
+    exited.wait()
+    files = {
+        f"spill.{exited.pid}.jsonl": [make_record(0), make_record(1)],
+        f"spill.{os.getppid()}.jsonl": [make_record(2)],
+        "spill.jsonl": [make_record(3)]
+    }
+    for name, records in files.items():
+        (tmp_path / name).write_text("".join(record.json() + "\n" for record in records))
+    queue = IngestionQueue(flush_fn, max_batch_size=100, flush_interval=60.0, spill_path=str(tmp_path / "spill.jsonl"))
+    
+    # Act
+    await queue.put(make_record(4))
+    spilled = open(queue.spill_file).read().splitlines()
+    await queue.stop()
+    
+    # Assert
+    _, records = flush_fn.await_args.args
+    assert sorted(r.text for r in records) == ["query 0", "query 1", "query 3", "query 4"]
+    assert len(spilled) == 4
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted([
+        f"spill.{os.getppid()}.jsonl",
+        f"spill.{os.getpid()}.jsonl"
+    ])
+
+@pytest.mark.asyncio
+async def test_concurrent_first_puts_share_one_start(tmp_path, flush_fn):
+    # Arrange
+    spill_path = tmp_path / "spill.jsonl"
+    queue = IngestionQueue(flush_fn, max_batch_size=100, flush_interval=60.0, spill_path=str(spill_path))
+    (tmp_path / os.path.basename(queue.spill_file)).write_text(make_record(9).json() + "\n")
+    
+    # Act
+    await asyncio.gather(*[queue.put(make_record(i)) for i in range(3)])
+    condition, task = queue._not_full, queue._task
+    running = [t for t in asyncio.all_tasks() if t.get_coro().__name__ == "_run"]
+    await queue.stop()
+    
+    # Assert
+    _, records = flush_fn.await_args.args
+    assert [r.text for r in records] == ["query 9", "query 0", "query 1", "query 2"]
+    assert running == [task]
+    assert queue._not_full is condition
+    assert task.done()
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+from atlas.core.kv_cache import PrefixKVCache, to_layers
+
+def past(num_layers=2, seq_len=4, value=0.0):
+    # [batch, heads, seq_len, head_dim] float32 -> 4 * 2 * seq_len * 8 bytes per tensor
+    return tuple(
+        (np.full((1, 2, seq_len, 8), value, dtype=np.float32), np.full((1, 2, seq_len, 8), value, dtype=np.float32))
+        for _ in range(num_layers)
+    )
+
+def test_compute_runs_once_per_prefix():
+    # Arrange
+    cache = PrefixKVCache(max_bytes=1 << 20)
+    calls = []
+    
+    def compute():
+        calls.append(1)
+        return past(), [1, 2, 3, 4]
+    
+    # Act
+    first = cache.get_or_compute("healthcare_analyst/healthcare/abc", compute)
+    second = cache.get_or_compute("healthcare_analyst/healthcare/abc", compute)
+    
+    # Assert
+    assert len(calls) == 1
+    assert second is first
+    assert second.num_tokens == 4
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["prefill_tokens_reused"] == 4
+
+def test_lru_evicted_beyond_byte_budget():
+    # Arrange
+    entry_bytes = 2 * 2 * (2 * 4 * 8 * 4)
+    cache = PrefixKVCache(max_bytes=2 * entry_bytes)
+    cache.put("a", past(), [1, 2, 3, 4])
+    cache.put("b", past(), [1, 2, 3, 4])
+    cache.get("a")
+    
+    # Act
+    cache.put("c", past(), [1, 2, 3, 4])
+    
+    # Assert
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+    assert cache.stats()["bytes"] == 2 * entry_bytes
+    assert cache.stats()["evictions"] == 1
+
+def test_entry_larger_than_budget_not_stored():
+    # Arrange
+    cache = PrefixKVCache(max_bytes=16)
+    
+    # Act
+    entry = cache.put("a", past(), [1, 2, 3, 4])
+    
+    # Assert
+    assert entry.num_tokens == 4
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 0
+
+def test_to_layers_accepts_cache_objects():
+    # Arrange
+    class Layer:
+        def __init__(self, keys, values):
+            self.keys = keys
+            self.values = values
+    
+    class Cache:
+        def __init__(self, layers):
+            self.layers = [Layer(keys, values) for keys, values in layers]
+    
+    legacy = past()
+    
+    # Act
+    layers = to_layers(Cache(legacy))
+    
+    # Assert
+    assert len(layers) == 2
+    assert layers[0][0] is legacy[0][0]
+    with pytest.raises(TypeError):
+        to_layers(object())
\ No newline at end of file
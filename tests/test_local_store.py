@@ -0,0 +1,166 @@
+import numpy as np
+import pytest
+from atlas.core.config import AtlasConfig
+from atlas.memory.local_store import LocalVectorStore
+from atlas.memory.vector_store import AtlasMemory
+
+@pytest.fixture
+def vectors():
+    return np.random.default_rng(0).standard_normal((2000, 16)).astype(np.float32)
+
+@pytest.fixture
+def store(tmp_path, vectors):
+    store = LocalVectorStore(str(tmp_path), nlist=16)
+    store.ensure_collection("memories", 16)
+    store.insert(
+        "memories",
+        [f"memory {i}" for i in range(len(vectors))],
+        vectors.tolist(),
+        list(range(len(vectors))),
+        [{"i": i} for i in range(len(vectors))]
+    )
+    yield store
+    store.close()
+
+def test_ivf_search_finds_exact_match(store, vectors):
+    # Act
+    hits = store.search("memories", [vectors[42].tolist()], 3, {"params": {"nprobe": 4}})
+    
+    # Assert
+    assert store.stats()["memories"]["trained"]
+    assert hits[0][0]["id"] == 42
+    assert hits[0][0]["metadata"] == {"i": 42}
+    assert hits[0][0]["distance"] == pytest.approx(0.0, abs=1e-4)
+
+def test_probing_every_list_matches_brute_force(store, vectors):
+    # Arrange
+    queries = np.random.default_rng(1).standard_normal((5, 16)).astype(np.float32)
+    distances = ((queries[:, None, :] - vectors[None, :, :]) ** 2).sum(axis=2)
+    expected = np.argsort(distances, axis=1)[:, :5]
+    
+    # Act
+    hits = store.search("memories", queries.tolist(), 5, {"params": {"nprobe": 32}})
+    
+    # Assert
+    assert [[hit["id"] for hit in found] for found in hits] == expected.tolist()
+    for found, row, query in zip(hits, expected, distances):
+        assert [hit["distance"] for hit in found] == pytest.approx(query[row].tolist(), rel=1e-4)
+
+def test_delete_older_than_survives_reopen(tmp_path, store, vectors):
+    # Act
+    store.delete_older_than("memories", 1000)
+    store.close()
+    reopened = LocalVectorStore(str(tmp_path), nlist=16)
+    reopened.ensure_collection("memories", 16)
+    hits = reopened.search("memories", [vectors[42].tolist()], 5, {"params": {"nprobe": 16}})
+    
+    # Assert
+    assert reopened.stats()["memories"] == {"rows": 2000, "live": 1000, "trained": True}
+    assert all(hit["timestamp"] >= 1000 for hit in hits[0])
+
+def test_dimension_mismatch_rejected(store):
+    with pytest.raises(ValueError):
+        store.ensure_collection("memories", 32)
+
+@pytest.mark.asyncio
+async def test_atlas_memory_on_local_backend(tmp_path):
+    # Arrange
+    config = AtlasConfig(
+        VECTOR_STORE_BACKEND="local",
+        LOCAL_STORE_PATH=str(tmp_path),
+        EMBEDDING_DIM=256,
+        MEMORY_WRITE_BEHIND=False
+    )
+    memory = AtlasMemory(config)
+    
+    # Act
+    await memory.store_memory("asthma medication adherence in the UK", metadata={"domain": "healthcare"})
+    await memory.store_memory("municipal budget deficit forecast", metadata={"domain": "civic"})
+    memories = await memory.retrieve_relevant("asthma adherence", k=1)
+    memory.close()
+    
+    # Assert
+    assert memories[0]["text"] == "asthma medication adherence in the UK"
+    assert memories[0]["metadata"] == {"domain": "healthcare"}
+
+def test_delete_ids_survives_reopen(tmp_path, store, vectors):
+    # Act
+    store.delete_ids("memories", [42, 43])
+    store.close()
+    reopened = LocalVectorStore(str(tmp_path), nlist=16)
+    reopened.ensure_collection("memories", 16)
+    hits = reopened.search("memories", [vectors[42].tolist()], 1, {"params": {"nprobe": 16}})
+    
+    # Assert
+    assert reopened.stats()["memories"]["live"] == 1998
+    assert hits[0][0]["id"] != 42
+def test_sq8_index_search_survives_reopen(tmp_path, vectors):
+    # Arrange
+    store = LocalVectorStore(str(tmp_path), nlist=16, index_type="IVF_SQ8")
+    store.ensure_collection("memories", 16)
+    store.insert("memories", [""] * len(vectors), vectors.tolist(), list(range(len(vectors))), [{}] * len(vectors))
+    store.close()
+    
+    # Act
+    reopened = LocalVectorStore(str(tmp_path), nlist=16)
+    reopened.ensure_collection("memories", 16)
+    hits = reopened.search("memories", [vectors[42].tolist()], 3, {"params": {"nprobe": 4}})
+    
+    # Assert
+    assert reopened._collection("memories").index_type == "IVF_SQ8"
+    assert hits[0][0]["id"] == 42
+    assert hits[0][0]["distance"] == pytest.approx(0.0, abs=1e-4)
+
+def test_reindex_keeps_rows_inserted_during_build(store, vectors):
+    # Arrange
+    collection = store._collection("memories")
+    index = collection._build("IVF_SQ8", 8)
+    extra = np.random.default_rng(1).standard_normal((10, 16)).astype(np.float32)
+    store.insert("memories", [""] * 10, extra.tolist(), [5000] * 10, [{}] * 10)
+    
+    # Act
+    with collection._lock:
+        collection._install(index)
+    hits = store.search("memories", [extra[3].tolist()], 1, {"params": {"nprobe": 8}})
+    
+    # Assert
+    assert collection.index_type == "IVF_SQ8"
+    assert len(collection._centroids) == 8
+    assert hits[0][0]["id"] == len(vectors) + 3
+
+def test_interrupted_reindex_retrains_on_open(tmp_path, store, vectors):
+    # Arrange
+    collection = store._collection("memories")
+    collection._save_meta(building=True)
+    store.close()
+    
+    # Act
+    reopened = LocalVectorStore(str(tmp_path), nlist=16)
+    reopened.ensure_collection("memories", 16)
+    hits = reopened.search("memories", [vectors[7].tolist()], 1, {"params": {"nprobe": 4}})
+    
+    # Assert
+    assert reopened.stats()["memories"]["trained"]
+    assert hits[0][0]["id"] == 7
+
+@pytest.mark.asyncio
+async def test_atlas_memory_reindex_switches_search_params(tmp_path):
+    # Arrange
+    config = AtlasConfig(
+        VECTOR_STORE_BACKEND="local",
+        LOCAL_STORE_PATH=str(tmp_path),
+        EMBEDDING_DIM=64,
+        MEMORY_WRITE_BEHIND=False
+    )
+    memory = AtlasMemory(config)
+    await memory.store_memory("quarterly revenue by region", metadata={})
+    
+    # Act
+    await memory.reindex("FLAT", {}, search_params={"nprobe": 1})
+    memories = await memory.retrieve_relevant("quarterly revenue by region", k=1)
+    memory.close()
+    
+    # Assert
+    assert memory.search_params == {"metric_type": "L2", "params": {"nprobe": 1}}
+    assert memory.compactor.search_params is memory.search_params
+    assert memories[0]["text"] == "quarterly revenue by region"
\ No newline at end of file
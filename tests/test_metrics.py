@@ -0,0 +1,87 @@
+import asyncio
+import pstats
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+from atlas.core.metrics import SlowRequestProfiler, instrumented, render_metrics, stage, stats_collector
+from atlas.services import query_handler
+
+def sample(name, component, stage_name):
+    return REGISTRY.get_sample_value(name, {"component": component, "stage": stage_name}) or 0.0
+
+@pytest.mark.asyncio
+async def test_stage_records_latency_in_flight_and_errors():
+    # Arrange
+    @instrumented("test")
+    async def lookup(fail):
+        assert sample("atlas_stage_in_flight", "test", "lookup") == 1
+        await asyncio.sleep(0)
+        if fail:
+            raise KeyError("missing")
+        return "found"
+    before = sample("atlas_stage_duration_seconds_count", "test", "lookup")
+    
+    # Act
+    result = await lookup(False)
+    with pytest.raises(KeyError):
+        await lookup(True)
+    with stage("test", "block"):
+        pass
+    
+    # Assert
+    assert result == "found"
+    assert sample("atlas_stage_duration_seconds_count", "test", "lookup") == before + 2
+    assert sample("atlas_stage_errors_total", "test", "lookup") >= 1
+    assert sample("atlas_stage_in_flight", "test", "lookup") == 0
+    assert sample("atlas_stage_duration_seconds_count", "test", "block") >= 1
+
+def test_stats_dicts_are_exposed_as_gauges():
+    # Arrange
+    stats_collector.register("fake", lambda: {"cache": {"hits": 3, "hit_rate": 0.75}, "mode": "local", "trained": True})
+    
+    # Act
+    payload, content_type = render_metrics()
+    stats_collector.unregister("fake")
+    
+    # Assert
+    text = payload.decode()
+    assert content_type.startswith("text/plain")
+    assert "atlas_fake_cache_hits 3.0" in text
+    assert "atlas_fake_cache_hit_rate 0.75" in text
+    assert "atlas_fake_trained 1.0" in text
+    assert "atlas_fake_mode" not in text
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_serves_exposition_without_api_key():
+    # Arrange
+    transport = httpx.ASGITransport(app=query_handler.app)
+    
+    # Act
+    async with httpx.AsyncClient(transport=transport, base_url="http://atlas") as client:
+        response = await client.get("/metrics")
+    
+    # Assert
+    assert response.status_code == 200
+    assert "# TYPE atlas_stage_duration_seconds histogram" in response.text
+
+@pytest.mark.asyncio
+async def test_profiler_keeps_only_slow_request_profiles(tmp_path):
+    # Arrange
+    profiler = SlowRequestProfiler(str(tmp_path), slow_seconds=0.05, sample_rate=1.0)
+    
+    async def slow():
+        await asyncio.sleep(0.06)
+        return "slow"
+    
+    async def fast():
+        return "fast"
+    
+    # Act
+    results = [await profiler.run("/query", slow), await profiler.run("/query", fast)]
+    
+    # Assert
+    files = list(tmp_path.iterdir())
+    assert results == ["slow", "fast"]
+    assert profiler.stats() == {"sampled": 2, "kept": 1, "failures": 0}
+    assert len(files) == 1 and files[0].name.endswith("-query.prof")
+    pstats.Stats(str(files[0]))
\ No newline at end of file
@@ -0,0 +1,138 @@
+import time
+import numpy as np
+import pytest
+from atlas.core.config import AtlasConfig
+from atlas.memory.compaction import MemoryCompactor, cold_collection
+from atlas.memory.local_store import LocalVectorStore
+from atlas.memory.store import VectorStore, partition_key
+from atlas.memory.vector_store import AtlasMemory
+
+DAY = 86400
+
+async def run(fn, *args):
+    return fn(*args)
+
+@pytest.fixture
+def store(tmp_path):
+    store = LocalVectorStore(str(tmp_path), nlist=4)
+    store.ensure_collection("memories", 4)
+    store.ensure_collection(cold_collection("memories"), 4)
+    yield store
+    store.close()
+
+def test_partition_key():
+    # Act & Assert
+    assert partition_key("alice", "finance") == "alice/finance"
+    assert partition_key("alice") == "alice/_"
+    assert partition_key() is None
+
+def test_vector_store_requires_every_method():
+    # Arrange
+    class SearchOnly(VectorStore):
+        def search(self, name, vectors, k, search_params, partitions=None):
+            return [[] for _ in vectors]
+    
+    # Act & Assert
+    with pytest.raises(TypeError):
+        SearchOnly()
+
+def test_scoped_search_sees_only_its_partition(tmp_path, store):
+    # Arrange
+    vectors = np.eye(4).tolist()
+    store.insert("memories", ["a0", "b0", "a1"], vectors[:3], [1, 1, 1], [{}, {}, {}], ["a/_", "b/_", "a/_"])
+    store.close()
+    reopened = LocalVectorStore(str(tmp_path), nlist=4)
+    
+    # Act
+    scoped = reopened.search("memories", [vectors[1]], 3, {}, ["a/_"])
+    loaded_after_scoped = sorted(reopened.stats())
+    unscoped = reopened.search("memories", [vectors[1]], 3, {})
+    missing = reopened.search("memories", [vectors[1]], 3, {}, ["nobody/_"])
+    
+    # Assert
+    assert sorted(hit["text"] for hit in scoped[0]) == ["a0", "a1"]
+    assert loaded_after_scoped == ["memories", "memories[a/_]"]
+    assert unscoped[0][0]["text"] == "b0"
+    assert missing == [[]]
+    reopened.close()
+
+def test_partitions_opened_for_a_sweep_are_closed(tmp_path, store):
+    # Arrange
+    vectors = np.eye(4).tolist()
+    store.insert("memories", ["a0", "b0"], vectors[:2], [1, 1], [{}, {}], ["a/_", "b/_"])
+    store.close()
+    reopened = LocalVectorStore(str(tmp_path), nlist=4)
+    reopened.search("memories", [vectors[0]], 3, {}, ["a/_"])
+    
+    # Act
+    unscoped = reopened.search("memories", [vectors[1]], 3, {})
+    
+    # Assert: the partition a scoped search opened stays open
+    assert unscoped[0][0]["text"] == "b0"
+    assert sorted(reopened.stats()) == ["memories", "memories[a/_]"]
+    reopened.close()
+
+def test_least_recently_used_partitions_closed(tmp_path):
+    # Arrange
+    store = LocalVectorStore(str(tmp_path), nlist=4, max_open_partitions=2)
+    store.ensure_collection("memories", 4)
+    vectors = np.eye(4).tolist()
+    
+    # Act
+    for i, tenant in enumerate(["a/_", "b/_", "c/_"]):
+        store.insert("memories", [f"{tenant} memory"], [vectors[i]], [1], [{}], [tenant])
+    store.search("memories", [vectors[0]], 1, {}, ["a/_"])
+    evicted_after_search = store.partition_evictions
+    idle = store.evict_partitions(now=time.monotonic() + store.idle_timeout)
+    
+    # Assert: b/_ went first; a/_ reopened from disk when searched
+    assert evicted_after_search == 2
+    assert idle == 2
+    assert sorted(store.stats()) == ["memories"]
+    store.close()
+
+@pytest.mark.asyncio
+async def test_compaction_keeps_partitions_apart(store):
+    # Arrange: the same memory stored by two tenants is not merged across them
+    vector = [1.0, 0.0, 0.0, 0.0]
+    store.insert("memories", ["same", "same"], [vector, vector], [0, 0], [{}, {}], ["a/_", "b/_"])
+    compactor = MemoryCompactor(store, run, "memories", hot_age_seconds=DAY, max_age_seconds=30 * DAY)
+    
+    # Act
+    result = await compactor.compact(now=2 * DAY)
+    
+    # Assert
+    assert result == {"demoted": 2, "merged": 0, "expired": 0}
+    for partition in ("a/_", "b/_"):
+        hits = store.search(cold_collection("memories"), [vector], 5, {}, [partition])
+        assert [hit["text"] for hit in hits[0]] == ["same"]
+
+@pytest.mark.asyncio
+async def test_memory_retrieval_is_tenant_scoped(tmp_path):
+    # Arrange
+    config = AtlasConfig(
+        VECTOR_STORE_BACKEND="local",
+        LOCAL_STORE_PATH=str(tmp_path),
+        EMBEDDING_DIM=64,
+        MEMORY_WRITE_BEHIND=False
+    )
+    memory = AtlasMemory(config)
+    await memory.store_memory("asthma adherence in the UK", {}, partition=partition_key("alice", "health"))
+    await memory.store_memories(
+        [("asthma adherence in Wales", {})],
+        partitions=[partition_key("bob", "health")]
+    )
+    
+    # Act
+    alice = await memory.retrieve_relevant("asthma adherence", k=5, partition=partition_key("alice", "health"))
+    both = await memory.retrieve_relevant_many(
+        ["asthma adherence", "asthma adherence"],
+        k=5,
+        partitions=[partition_key("bob", "health"), None]
+    )
+    memory.close()
+    
+    # Assert
+    assert [m["text"] for m in alice] == ["asthma adherence in the UK"]
+    assert [m["text"] for m in both[0]] == ["asthma adherence in Wales"]
+    assert len(both[1]) == 2
\ No newline at end of file
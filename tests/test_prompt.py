@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+import pytest
+from atlas.core.prompt import PromptBuilder
+
+class WordTokenizer:
+    def __init__(self):
+        self.calls = 0
+    
+    def __call__(self, texts, add_special_tokens=False):
+        self.calls += 1
+        return {"input_ids": [text.split() for text in texts]}
+
+@pytest.fixture
+def tokenizer():
+    return WordTokenizer()
+
+def memory(text, days_old, distance):
+    return {
+        "text": text,
+        "timestamp": datetime.now() - timedelta(days=days_old),
+        "metadata": {},
+        "similarity": distance
+    }
+
+def test_memories_packed_by_relevance_and_recency(tokenizer):
+    # Arrange
+    builder = PromptBuilder(tokenizer, token_budget=60, decay_factor=0.5)
+    memories = [
+        memory("old but relevant " * 5, days_old=10, distance=0.1),
+        memory("recent and relevant " * 5, days_old=0, distance=0.2),
+        memory("recent but unrelated " * 5, days_old=0, distance=1.8)
+    ]
+    
+    # Act
+    prompt = builder.build("asthma trends", memories, persona="healthcare_analyst", domain="healthcare")
+    
+    # Assert
+    assert prompt.memories_used == 1
+    assert "recent and relevant" in prompt.body
+    assert prompt.prompt_tokens <= 60
+    assert prompt.tokens_saved > 0
+    assert prompt.sources[0]["text"].startswith("recent and relevant")
+
+def test_prefix_tokenized_once_per_persona(tokenizer):
+    # Arrange
+    builder = PromptBuilder(tokenizer, token_budget=1000)
+    builder.build("first", [], persona="healthcare_analyst", domain="healthcare")
+    calls = tokenizer.calls
+    
+    # Act
+    prompt = builder.build("first", [], persona="healthcare_analyst", domain="healthcare")
+    
+    # Assert
+    assert tokenizer.calls == calls
+    assert prompt.prefix.startswith("You are Atlas")
+    assert "Domain: healthcare." in prompt.prefix
+    assert builder.stats()["prompts_built"] == 2
+
+def test_prefix_key_shared_per_persona_and_domain(tokenizer):
+    # Arrange
+    builder = PromptBuilder(tokenizer, token_budget=1000)
+    
+    # Act
+    first = builder.build("first", [], persona="healthcare_analyst", domain="healthcare")
+    second = builder.build("second", [], persona="healthcare_analyst", domain="healthcare")
+    other = builder.build("first", [], persona="finance_analyst", domain="healthcare")
+    
+    # Assert
+    assert first.prefix_key == second.prefix_key
+    assert first.prefix_key.startswith("healthcare_analyst/healthcare/")
+    assert other.prefix_key != first.prefix_key
\ No newline at end of file
@@ -0,0 +1,103 @@
+import asyncio
+import time
+import pytest
+from atlas.core.deadline import DeadlineExceeded, request_deadline
+from atlas.core.scheduler import InferenceScheduler, GenerationOutput
+
+class FakeModel:
+    def __init__(self, step_seconds: float = 0.05):
+        self.step_seconds = step_seconds
+        self.batches = []
+    
+    def generate_batch(self, prompts, max_new_tokens, should_stop, on_token):
+        self.batches.append(list(prompts))
+        time.sleep(self.step_seconds)
+        if on_token is not None:
+            for index, prompt in enumerate(prompts):
+                for word in prompt.upper().split(" "):
+                    on_token(index, word)
+        return [GenerationOutput(text=prompt.upper(), num_tokens=4, confidence=0.9) for prompt in prompts]
+
+@pytest.fixture
+def model():
+    return FakeModel()
+
+@pytest.fixture
+async def scheduler(model):
+    scheduler = InferenceScheduler(model.generate_batch, max_batch_size=4, max_wait=0.02)
+    yield scheduler
+    await scheduler.stop()
+
+@pytest.mark.asyncio
+async def test_concurrent_prompts_batched(scheduler, model):
+    # Act
+    outputs = await asyncio.gather(*[scheduler.generate(f"prompt {i}") for i in range(8)])
+    
+    # Assert
+    assert [output.text for output in outputs] == [f"PROMPT {i}" for i in range(8)]
+    assert [len(batch) for batch in model.batches] == [4, 4]
+    stats = scheduler.stats()
+    assert stats["completed"] == 8
+    assert stats["tokens_generated"] == 32
+    assert stats["tokens_per_second"] > 0
+
+@pytest.mark.asyncio
+async def test_cancelled_request_skipped(scheduler, model):
+    # Arrange
+    first = asyncio.create_task(scheduler.generate("running"))
+    await asyncio.sleep(0.03)
+    abandoned = asyncio.create_task(scheduler.generate("abandoned"))
+    kept = asyncio.create_task(scheduler.generate("kept"))
+    await asyncio.sleep(0)
+    
+    # Act
+    abandoned.cancel()
+    await first
+    output = await kept
+    
+    # Assert
+    assert output.text == "KEPT"
+    assert model.batches == [["running"], ["kept"]]
+    assert scheduler.stats()["cancelled"] == 1
+
+@pytest.mark.asyncio
+async def test_expired_request_dropped_before_generation(scheduler, model):
+    # Arrange
+    first = asyncio.create_task(scheduler.generate("running"))
+    await asyncio.sleep(0.03)
+    token = request_deadline.set(time.time() + 0.005)
+    late = asyncio.create_task(scheduler.generate("late"))
+    request_deadline.reset(token)
+    kept = asyncio.create_task(scheduler.generate("kept"))
+    
+    # Act
+    await first
+    output = await kept
+    
+    # Assert
+    with pytest.raises(DeadlineExceeded):
+        await late
+    assert output.text == "KEPT"
+    assert model.batches == [["running"], ["kept"]]
+    assert scheduler.stats()["expired"] == 1
+
+@pytest.mark.asyncio
+async def test_generation_error_propagates(scheduler, model):
+    # Arrange
+    def fail(prompts, max_new_tokens, should_stop, on_token):
+        raise RuntimeError("out of memory")
+    scheduler.generate_batch = fail
+    
+    # Act & Assert
+    with pytest.raises(RuntimeError):
+        await scheduler.generate("prompt")
+
+@pytest.mark.asyncio
+async def test_stream_yields_tokens_then_output(scheduler):
+    # Act
+    items = [item async for item in scheduler.stream("hello streaming world")]
+    
+    # Assert
+    assert items[:-1] == ["HELLO", "STREAMING", "WORLD"]
+    assert isinstance(items[-1], GenerationOutput)
+    assert items[-1].text == "HELLO STREAMING WORLD"
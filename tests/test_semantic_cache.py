@@ -0,0 +1,142 @@
+import time
+import pytest
+from unittest.mock import AsyncMock, Mock, patch
+from atlas.core.agent import AtlasAgent, AtlasResponse, QueryContext
+from atlas.core.config import AtlasConfig
+from atlas.core.semantic_cache import SemanticCache
+from atlas.memory.embeddings import EmbeddingEngine, HashingEmbedder
+
+@pytest.fixture
+def cache():
+    embedder = HashingEmbedder(dim=512)
+    
+    async def embed(text):
+        return embedder.embed_batch([text])[0]
+    
+    return SemanticCache(embed, threshold=0.9, ttl_seconds=60, max_entries=2)
+
+@pytest.fixture
+def response():
+    return AtlasResponse(text="Adherence rose 4% in 2024", confidence=0.8)
+
+@pytest.mark.asyncio
+async def test_near_identical_query_hits(cache, response):
+    # Arrange
+    await cache.store("asthma adherence trends UK 2024", "healthcare_analyst", "healthcare", response)
+    
+    # Act
+    hit = await cache.lookup("Asthma adherence trends, UK 2024?", "healthcare_analyst", "healthcare")
+    other_persona = await cache.lookup("asthma adherence trends UK 2024", "finance_analyst", "healthcare")
+    
+    # Assert
+    assert hit is not None and hit[0] == response and hit[1] >= 0.9
+    assert other_persona is None
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+@pytest.mark.asyncio
+async def test_expired_entry_misses(cache, response):
+    # Arrange
+    await cache.store("asthma adherence", None, "healthcare", response)
+    next(iter(cache._entries.values())).expires_at = time.monotonic() - 1
+    
+    # Act & Assert
+    assert await cache.lookup("asthma adherence", None, "healthcare") is None
+    assert cache.stats()["entries"] == 0
+
+@pytest.mark.asyncio
+async def test_lru_eviction(cache, response):
+    # Act
+    for query in ["first question", "second question", "third question"]:
+        await cache.store(query, None, "civic", response)
+    
+    # Assert
+    assert await cache.lookup("first question", None, "civic") is None
+    assert await cache.lookup("third question", None, "civic") is not None
+    assert cache.stats()["evictions"] == 1
+
+@pytest.mark.asyncio
+async def test_new_memory_invalidates_domain(cache, response):
+    # Arrange
+    await cache.store("asthma adherence", None, "healthcare", response)
+    await cache.store("budget deficit", None, "civic", response)
+    
+    # Act
+    cache.on_memory_stored("atlas_memories", {"context": {"domain": "healthcare"}})
+    
+    # Assert
+    assert await cache.lookup("asthma adherence", None, "healthcare") is None
+    assert await cache.lookup("budget deficit", None, "civic") is not None
+
+class ListeningMemory:
+    # Calls store listeners like AtlasMemory.store_memory does
+    def __init__(self):
+        self.embeddings = EmbeddingEngine(HashingEmbedder(dim=512))
+        self.listeners = []
+        self.stored = []
+    
+    def add_store_listener(self, listener):
+        self.listeners.append(listener)
+    
+    async def retrieve_relevant(self, query, partition=None):
+        return []
+    
+    async def store_memory(self, text, metadata, partition=None):
+        self.stored.append(text)
+        for listener in self.listeners:
+            listener("atlas_memories", metadata)
+
+@pytest.mark.asyncio
+async def test_interleaved_near_duplicates_hit_on_second_run(response):
+    # Arrange
+    memory = ListeningMemory()
+    with patch("atlas.core.agent.AtlasAgent._initialize_memory", return_value=memory), \
+         patch("atlas.core.agent.AtlasAgent._initialize_llm", return_value=Mock()), \
+         patch("atlas.core.agent.AtlasAgent._initialize_tokenizer", return_value=Mock()):
+        agent = AtlasAgent(AtlasConfig(SEMANTIC_CACHE_THRESHOLD=0.9))
+    agent._prepare_prompt = Mock()
+    agent._generate_response = AsyncMock(return_value=response)
+    context = QueryContext(persona="healthcare_analyst", domain="healthcare")
+    queries = ["asthma adherence trends UK 2024", "inhaler refill rates by region"]
+    
+    # Act
+    for query in queries:
+        await agent.process_query(query, context)
+    second = [await agent.process_query(f"{query}?", context) for query in queries]
+    
+    # Assert
+    assert agent._generate_response.await_count == 2
+    assert all(result.metadata.get("cache") == "hit" for result in second)
+    assert agent.cache.stats()["invalidations"] == 0
+    assert len(memory.stored) == 2
+    agent.cache.on_memory_stored("atlas_memories", {"context": {"domain": "healthcare"}})
+    assert agent.cache.stats()["entries"] == 0
+
+@pytest.mark.asyncio
+async def test_cached_answers_scoped_to_user(response):
+    # Arrange
+    memory = ListeningMemory()
+    with patch("atlas.core.agent.AtlasAgent._initialize_memory", return_value=memory), \
+         patch("atlas.core.agent.AtlasAgent._initialize_llm", return_value=Mock()), \
+         patch("atlas.core.agent.AtlasAgent._initialize_tokenizer", return_value=Mock()):
+        agent = AtlasAgent(AtlasConfig())
+    agent._prepare_prompt = Mock()
+    agent._generate_response = AsyncMock(return_value=response)
+    query = "asthma adherence trends UK 2024"
+    web = QueryContext(domain="healthcare", user_id="web")
+    etl = QueryContext(domain="healthcare", user_id="etl")
+    
+    # Act
+    first_web = await agent.process_query(query, web)
+    first_etl = await agent.process_query(query, etl)
+    second_web = await agent.process_query(query, web)
+    agent.cache.on_memory_stored("atlas_memories", {"context": {"domain": "healthcare", "user_id": "etl"}})
+    third_web = await agent.process_query(query, web)
+    third_etl = await agent.process_query(query, etl)
+    
+    # Assert
+    assert "cache" not in first_web.metadata
+    assert "cache" not in first_etl.metadata
+    assert second_web.metadata["cache"] == "hit"
+    assert third_web.metadata["cache"] == "hit"
+    assert "cache" not in third_etl.metadata
+    assert agent._generate_response.await_count == 3
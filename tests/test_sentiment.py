@@ -0,0 +1,112 @@
+import functools
+import itertools
+import numpy as np
+import pytest
+from atlas.core.sentiment import LexiconClassifier, SentimentEngine, analyze_sentiment, process_engine
+from atlas.core.tools import ToolCall, ToolRuntime
+
+class CountingClassifier(LexiconClassifier):
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+    
+    def score_batch(self, texts):
+        self.batches.append(list(texts))
+        return super().score_batch(texts)
+
+@pytest.fixture
+def classifier():
+    return CountingClassifier()
+
+def test_lexicon_scores_polarity_with_negation():
+    # Arrange
+    engine = SentimentEngine(LexiconClassifier())
+    texts = [
+        "The new bus route is great and the drivers are friendly",
+        "Potholes everywhere, terrible road maintenance",
+        "The library opens at nine",
+        "The staff were not very helpful",
+        "Not bad at all"
+    ]
+    
+    # Act
+    results = engine.analyze(texts)
+    
+    # Assert
+    assert [result.label for result in results] == ["positive", "negative", "neutral", "negative", "positive"]
+    assert all(-1 <= result.score <= 1 for result in results)
+    assert results[2].score == 0.0
+
+def test_results_stream_in_bounded_batches(classifier):
+    # Arrange
+    engine = SentimentEngine(classifier, batch_size=4)
+    consumed = []
+    
+    def feedback():
+        for i in itertools.count():
+            consumed.append(i)
+            yield f"complaint number {i} about the slow service"
+    
+    # Act
+    results = engine.analyze_iter(feedback())
+    first = list(itertools.islice(results, 6))
+    
+    # Assert
+    assert len(first) == 6
+    assert len(consumed) == 8
+    assert [len(batch) for batch in classifier.batches] == [4, 4]
+    assert all(result.label == "negative" for result in first)
+
+def test_repeated_texts_scored_once(classifier):
+    # Arrange
+    engine = SentimentEngine(classifier, batch_size=8)
+    texts = ["Great park", "Dirty streets", "Great park", "Dirty streets", "Great park"]
+    
+    # Act
+    first = engine.analyze(texts)
+    again = engine.analyze(["Dirty streets", "New text, clean and safe"])
+    
+    # Assert
+    assert first[0] == first[2] == first[4]
+    assert again[0] == first[1]
+    assert classifier.batches == [["Great park", "Dirty streets"], ["New text, clean and safe"]]
+    stats = engine.stats()
+    assert stats["cache_misses"] == 3
+    assert stats["cache_hits"] == 4
+
+def test_summary_and_vectorized_batch_agree_with_single_texts():
+    # Arrange
+    classifier = LexiconClassifier()
+    texts = ["good", "not good", "awful, just awful", "", "thanks for the quick fix"]
+    
+    # Act
+    batch = classifier.score_batch(texts)
+    single = np.concatenate([classifier.score_batch([text]) for text in texts])
+    summary = SentimentEngine.summarize(SentimentEngine(classifier).analyze(texts))
+    
+    # Assert
+    np.testing.assert_allclose(batch, single)
+    assert summary["count"] == 5
+    assert summary["counts"] == {"positive": 2, "negative": 2, "neutral": 1}
+
+@pytest.mark.asyncio
+async def test_sentiment_tool_runs_in_worker_process_with_its_own_engine():
+    # Arrange
+    runtime = ToolRuntime(max_workers=1, timeout=30.0)
+    runtime.register("sentiment_analysis", functools.partial(analyze_sentiment, "lexicon", "", 16, 100), kind="cpu", memoize=False)
+    calls = [ToolCall(name="sentiment_analysis", args={"texts": ["great service", "awful delays"]})]
+    
+    # Act
+    try:
+        first, = await runtime.run(calls)
+        second, = await runtime.run(calls)
+    finally:
+        runtime.shutdown()
+    local = analyze_sentiment("lexicon", "", 16, 100, texts=["great service", "awful delays"])
+    
+    # Assert
+    assert first.error is None and first.pool_size == 1
+    assert first.output == second.output == local
+    assert [result["label"] for result in local["results"]] == ["positive", "negative"]
+    assert process_engine("lexicon", "", 16, 100) is process_engine("lexicon", "", 16, 100)
+    assert process_engine("lexicon", "", 16, 100).stats()["cache_misses"] == 2
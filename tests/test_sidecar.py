@@ -0,0 +1,75 @@
+import httpx
+import pytest
+from atlas.core.prompt import PreparedPrompt
+from atlas.core.scheduler import GenerationOutput
+from atlas.core.sidecar import InferenceClient
+from atlas.services import inference_server
+
+class FakeScheduler:
+    def __init__(self):
+        self.prompts = []
+    
+    async def generate(self, prompt, max_new_tokens=None):
+        self.prompts.append(prompt)
+        return GenerationOutput(text="Adherence rose", num_tokens=2, confidence=0.9)
+    
+    async def stream(self, prompt, max_new_tokens=None):
+        self.prompts.append(prompt)
+        yield "Adherence"
+        yield " rose"
+        yield GenerationOutput(text="Adherence rose", num_tokens=2, confidence=0.9)
+    
+    def stats(self):
+        return {}
+
+@pytest.fixture
+def scheduler():
+    fake = FakeScheduler()
+    inference_server.app.state.scheduler = fake
+    yield fake
+    inference_server.app.state.scheduler = None
+
+@pytest.fixture
+def client():
+    return InferenceClient(
+        "http://sidecar",
+        transport=httpx.ASGITransport(app=inference_server.app)
+    )
+
+@pytest.mark.asyncio
+async def test_generate_round_trips_prepared_prompt(scheduler, client):
+    # Arrange
+    prompt = PreparedPrompt(prefix="You are Atlas\n", prefix_key="a/b/c", body="Question: q\nAnswer:")
+    
+    # Act
+    output = await client.generate(prompt)
+    
+    # Assert
+    assert output.text == "Adherence rose"
+    assert scheduler.prompts[0].prefix_key == "a/b/c"
+    assert scheduler.prompts[0].body == prompt.body
+    assert await client.ready()
+    await client.stop()
+
+@pytest.mark.asyncio
+async def test_stream_yields_deltas_then_output(scheduler, client):
+    # Act
+    items = [item async for item in client.stream("plain prompt")]
+    
+    # Assert
+    assert items[:2] == ["Adherence", " rose"]
+    assert isinstance(items[-1], GenerationOutput)
+    assert scheduler.prompts == ["plain prompt"]
+    assert client.stats()["completed"] == 1
+    await client.stop()
+
+@pytest.mark.asyncio
+async def test_not_ready_while_model_loads(client):
+    # Act
+    ready = await client.ready()
+    
+    # Assert
+    assert not ready
+    with pytest.raises(httpx.HTTPStatusError):
+        await client.generate("plain prompt")
+    await client.stop()
\ No newline at end of file
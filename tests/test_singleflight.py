@@ -0,0 +1,103 @@
+import asyncio
+import pytest
+from atlas.core.singleflight import SingleFlight, query_key
+
+@pytest.fixture
+def inflight():
+    return SingleFlight(layer="test")
+
+@pytest.mark.asyncio
+async def test_identical_calls_share_one_execution(inflight):
+    # Arrange
+    calls = 0
+    
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return "answer"
+    
+    # Act
+    results = await asyncio.gather(*[inflight.run("key", work) for _ in range(10)])
+    
+    # Assert
+    assert calls == 1
+    assert [result for result, _ in results] == ["answer"] * 10
+    assert sum(coalesced for _, coalesced in results) == 9
+    assert inflight.stats() == {"executions": 1, "coalesced": 9, "abandoned": 0, "in_flight": 0}
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_others_running(inflight):
+    # Arrange
+    async def work():
+        await asyncio.sleep(0.05)
+        return "answer"
+    
+    first = asyncio.ensure_future(inflight.run("key", work))
+    second = asyncio.ensure_future(inflight.run("key", work))
+    await asyncio.sleep(0.01)
+    
+    # Act
+    first.cancel()
+    result, coalesced = await second
+    
+    # Assert
+    assert first.cancelled()
+    assert result == "answer" and coalesced
+    assert inflight.stats()["abandoned"] == 0
+
+@pytest.mark.asyncio
+async def test_execution_cancelled_when_every_waiter_leaves(inflight):
+    # Arrange
+    cancelled = asyncio.Event()
+    
+    async def work():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return "never"
+    
+    async def quick():
+        return "fresh"
+    
+    waiter = asyncio.ensure_future(inflight.run("key", work))
+    await asyncio.sleep(0.01)
+    
+    # Act
+    waiter.cancel()
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+    result, coalesced = await inflight.run("key", quick)
+    
+    # Assert
+    assert result == "fresh" and not coalesced
+    assert inflight.stats()["abandoned"] == 1
+
+@pytest.mark.asyncio
+async def test_error_reaches_every_waiter(inflight):
+    # Arrange
+    async def work():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("generation failed")
+    
+    # Act
+    results = await asyncio.gather(
+        inflight.run("key", work),
+        inflight.run("key", work),
+        return_exceptions=True
+    )
+    
+    # Assert
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert inflight.stats()["in_flight"] == 0
+
+def test_query_key_normalizes_text_and_metadata():
+    # Act
+    first = query_key("Asthma  trends ", "analyst", "healthcare", {"region": "UK", "year": 2024})
+    second = query_key("asthma trends", "analyst", "healthcare", {"year": 2024, "region": "UK"})
+    other = query_key("asthma trends", "analyst", "finance", {"year": 2024, "region": "UK"})
+    
+    # Assert
+    assert first == second
+    assert first != other
\ No newline at end of file
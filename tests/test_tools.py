@@ -0,0 +1,147 @@
+import asyncio
+import functools
+import os
+import time
+from unittest.mock import Mock, patch
+import httpx
+import numpy as np
+import pytest
+from atlas.core.agent import AtlasAgent
+from atlas.core.analytics import AnalyticsEngine, analyze_data
+from atlas.core.config import AtlasConfig
+from atlas.core.tools import ToolCall, ToolRuntime, ToolTimeout, call_key
+from atlas.services import query_handler
+from atlas.services.auth import ApiKeyAuth, hash_api_key
+
+@pytest.fixture
+async def runtime():
+    runtime = ToolRuntime(max_workers=2, timeout=1.0)
+    yield runtime
+    runtime.shutdown()
+
+@pytest.mark.asyncio
+async def test_independent_io_calls_run_concurrently(runtime):
+    # Arrange
+    async def lookup(seconds):
+        await asyncio.sleep(seconds)
+        return seconds
+    runtime.register("lookup", lookup)
+    
+    # Act
+    start = time.perf_counter()
+    results = await runtime.run([ToolCall(name="lookup", args={"seconds": 0.1 + i / 1000}) for i in range(5)])
+    elapsed = time.perf_counter() - start
+    
+    # Assert
+    assert [result.output for result in results] == [0.1 + i / 1000 for i in range(5)]
+    assert elapsed < 0.3
+    assert all(result.latency_ms >= 100 for result in results)
+
+@pytest.mark.asyncio
+async def test_results_memoized_and_shared_in_flight(runtime):
+    # Arrange
+    executions = []
+    
+    async def score(values):
+        executions.append(values)
+        await asyncio.sleep(0.05)
+        return sum(values)
+    runtime.register("score", score)
+    
+    # Act
+    first = await asyncio.gather(*[runtime.call("score", values=[1, 2, 3]) for _ in range(3)])
+    again = await runtime.call("score", values=[1, 2, 3])
+    other = await runtime.call("score", values=[1, 2])
+    
+    # Assert
+    assert [result.output for result in first] == [6, 6, 6]
+    assert again.cached and again.output == 6
+    assert other.output == 3
+    assert executions == [[1, 2, 3], [1, 2]]
+    assert runtime.stats()["tools"]["score"]["cache_hits"] == 1
+    assert call_key("score", {"values": np.arange(3)}) != call_key("score", {"values": np.arange(1, 4)})
+    assert call_key("score", {"values": object()}) is None
+
+@pytest.mark.asyncio
+async def test_timeouts_and_errors_reported_per_call(runtime):
+    # Arrange
+    async def slow():
+        await asyncio.sleep(5)
+    
+    async def broken():
+        raise ValueError("bad input")
+    runtime.register("slow", slow, timeout=0.05)
+    runtime.register("broken", broken)
+    
+    # Act
+    with pytest.raises(ToolTimeout):
+        await runtime.call("slow")
+    results = await runtime.run([ToolCall(name="slow"), ToolCall(name="broken"), ToolCall(name="missing")])
+    
+    # Assert
+    assert [result.error for result in results] == [
+        "Tool slow timed out after 0.05s",
+        "bad input",
+        "'Unknown tool: missing'"
+    ]
+    stats = runtime.stats()["tools"]
+    assert stats["slow"]["timeouts"] == 2
+    assert stats["broken"]["errors"] == 1
+
+@pytest.mark.asyncio
+async def test_cpu_tools_run_in_worker_processes(runtime):
+    # Arrange
+    runtime.register("pid", os.getpid, kind="cpu", memoize=False)
+    runtime.register("data_analysis", functools.partial(analyze_data, AnalyticsEngine()), kind="cpu", timeout=30.0)
+    x = np.arange(200, dtype=np.float64)
+    
+    # Act
+    results = await runtime.run([
+        ToolCall(name="pid"),
+        ToolCall(name="data_analysis", args={"data": {"columns": {"x": x, "y": 2 * x + 1}}})
+    ])
+    
+    # Assert
+    assert results[0].error is None and results[0].output != os.getpid()
+    analysis = results[1].output
+    assert analysis["metadata"]["insight_count"] > 0
+    assert any(insight["type"] == "correlation" for insight in analysis["insights"])
+    assert all(result.pool_size == 2 and result.pool_busy >= 1 for result in results)
+    assert runtime.stats()["pool"]["busy"] == 0
+
+@pytest.mark.asyncio
+async def test_tools_endpoint_dispatches_through_agent():
+    # Arrange
+    with patch("atlas.core.agent.AtlasAgent._initialize_memory", return_value=Mock()), \
+         patch("atlas.core.agent.AtlasAgent._initialize_llm", return_value=Mock()), \
+         patch("atlas.core.agent.AtlasAgent._initialize_tokenizer", return_value=Mock()):
+        agent = AtlasAgent(AtlasConfig())
+    query_handler.app.state.auth = ApiKeyAuth({"web": hash_api_key("web-key")})
+    query_handler.app.state.agent = agent
+    analysis = analyze_data(AnalyticsEngine(), {"columns": {"spend": np.arange(50.0), "visits": np.arange(50.0) * 2}})
+    calls = [
+        {"name": "sentiment_analysis", "args": {"texts": ["great results", "terrible delays"]}},
+        {"name": "report_generation", "args": {"analysis": analysis}},
+        {"name": "report_generation", "args": {"analysis": analysis, "format_type": "pptx"}}
+    ]
+    transport = httpx.ASGITransport(app=query_handler.app)
+    
+    # Act
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://atlas") as client:
+            response = await client.post("/tools", json=calls, headers={"X-API-Key": "web-key"})
+            unknown = await client.post("/tools", json=[{"name": "missing"}], headers={"X-API-Key": "web-key"})
+    finally:
+        query_handler.app.state.agent = None
+        agent.tools.shutdown()
+    
+    # Assert
+    sentiment, report, unsupported = response.json()
+    assert response.status_code == 200
+    assert [result["label"] for result in sentiment["output"]["results"]] == ["positive", "negative"]
+    assert report["output"]["content"].startswith("# Insight Report")
+    assert "## Trends" in report["output"]["content"]
+    assert "- spend and visits are correlated" in report["output"]["content"]
+    assert unsupported["error"] == "Unsupported report format: pptx"
+    assert unknown.status_code == 404
+    assert agent.stats()["tools"]["tools"]["report_generation"]["calls"] == 2
@@ -0,0 +1,275 @@
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import Mock, patch
+from pymilvus import CollectionSchema, DataType, FieldSchema
+from atlas.core.config import AtlasConfig
+from atlas.memory.vector_store import CollectionManager, AtlasMemory, MilvusVectorStore
+
+class SlowCollection:
+    schema = CollectionSchema(fields=[
+        FieldSchema(name="id", dtype=DataType.INT64, is_primary=True, auto_id=True),
+        FieldSchema(name="embedding", dtype=DataType.FLOAT_VECTOR, dim=1536)
+    ])
+    
+    def __init__(self, name, using="default"):
+        self.name = name
+    
+    def load(self):
+        pass
+    
+    def release(self):
+        pass
+    
+    def insert(self, data):
+        time.sleep(0.2)
+    
+    def search(self, **kwargs):
+        time.sleep(0.2)
+        return []
+
+@pytest.fixture
+def factory():
+    return Mock(side_effect=lambda name: Mock(name=name))
+
+@pytest.fixture
+def memory():
+    config = AtlasConfig(MEMORY_IO_CONCURRENCY=8, MEMORY_WRITE_BEHIND=False, MEMORY_TIERED=False)
+    with patch('atlas.memory.vector_store.connection_pool') as pool, \
+         patch('atlas.memory.vector_store.utility') as utility, \
+         patch('atlas.memory.vector_store.Collection', SlowCollection):
+        pool.acquire.return_value = "test"
+        utility.has_collection.return_value = True
+        memory = AtlasMemory(config)
+        yield memory
+        memory.close()
+
+@pytest.fixture
+def manager(factory):
+    return CollectionManager(idle_timeout=60.0, collection_factory=factory)
+
+def test_collection_loaded_once(manager, factory):
+    # Act
+    for _ in range(5):
+        with manager.acquire("atlas_memories") as collection:
+            collection.search()
+    
+    # Assert
+    assert factory.call_count == 1
+    assert collection.load.call_count == 1
+    assert not collection.release.called
+    assert manager.stats()["loads"] == 1
+
+def test_idle_collection_evicted(manager):
+    # Arrange
+    with manager.acquire("atlas_memories") as collection:
+        pass
+    
+    # Act
+    evicted = manager.evict_idle(now=manager._last_used["atlas_memories"] + 61.0)
+    
+    # Assert
+    assert evicted == 1
+    assert collection.release.called
+    assert manager.stats() == {"loads": 1, "evictions": 1, "resident": 0, "in_use": 0}
+
+def test_in_use_collection_not_evicted(manager):
+    # Arrange & Act
+    with manager.acquire("atlas_memories") as collection:
+        evicted = manager.evict_idle(now=manager._last_used["atlas_memories"] + 61.0)
+    
+    # Assert
+    assert evicted == 0
+    assert not collection.release.called
+
+def test_drain_waits_for_earlier_checkouts(manager):
+    # Arrange
+    held = threading.Event()
+    done = threading.Event()
+    
+    def hold():
+        with manager.acquire("atlas_memories"):
+            held.set()
+            done.wait()
+    
+    thread = threading.Thread(target=hold)
+    thread.start()
+    held.wait()
+    
+    # Act
+    timed_out = manager.drain("atlas_memories", timeout=0.05)
+    drained = []
+    drainer = threading.Thread(target=lambda: drained.append(manager.drain("atlas_memories", timeout=5.0)))
+    drainer.start()
+    while not manager._returned._waiters:
+        time.sleep(0.001)
+    with manager.acquire("atlas_memories"):
+        done.set()
+        drainer.join()
+    thread.join()
+    
+    # Assert: the checkout made after the drain began, still open, doesn't hold it up
+    assert not timed_out
+    assert drained == [True]
+
+def test_reindex_releases_old_generation_by_name():
+    # Arrange
+    collections = {}
+    
+    def collection(name, using="default", **kwargs):
+        if name not in collections:
+            handle = Mock(name=name, schema=SlowCollection.schema)
+            handle.query_iterator.return_value.next.return_value = []
+            collections[name] = handle
+        return collections[name]
+    
+    config = AtlasConfig(MEMORY_WRITE_BEHIND=False, MEMORY_TIERED=False)
+    with patch('atlas.memory.vector_store.connection_pool') as pool, \
+         patch('atlas.memory.vector_store.utility') as utility, \
+         patch('atlas.memory.vector_store.Collection', side_effect=collection):
+        pool.acquire.return_value = "test"
+        utility.list_collections.return_value = []
+        store = MilvusVectorStore(config)
+        with store.collections.acquire("atlas_memories") as served:
+            pass
+        
+        # Act
+        store.reindex("atlas_memories", "FLAT", {})
+    
+    # Assert: the alias now serves the new generation, which stays loaded
+    target = next(name for name in collections if name.startswith("atlas_memories__v") and name != "atlas_memories__v0")
+    assert collections["atlas_memories__v0"].release.called
+    assert not collections[target].release.called
+    assert not served.release.called
+    utility.drop_collection.assert_called_once_with("atlas_memories__v0", using="test")
+
+def test_legacy_collection_refuses_scoped_search_until_reindexed():
+    # Arrange: SlowCollection's schema has no partition field
+    rows = [
+        {"id": 1, "text": "a", "embedding": [0.0], "timestamp": 1, "metadata": {"context": {"user_id": "alice", "domain": "oncology"}}},
+        {"id": 2, "text": "b", "embedding": [0.0], "timestamp": 2, "metadata": {}}
+    ]
+    collections = {}
+    
+    def collection(name, using="default", **kwargs):
+        if name not in collections:
+            handle = Mock(name=name, schema=SlowCollection.schema)
+            batches = [rows, []] if name == "atlas_memories" else [[]]
+            handle.query_iterator.return_value.next.side_effect = lambda: batches.pop(0) if batches else []
+            handle.search.return_value = [[]]
+            collections[name] = handle
+        return collections[name]
+    
+    config = AtlasConfig(MEMORY_WRITE_BEHIND=False, MEMORY_TIERED=False)
+    with patch('atlas.memory.vector_store.connection_pool') as pool, \
+         patch('atlas.memory.vector_store.utility') as utility, \
+         patch('atlas.memory.vector_store.Collection', side_effect=collection):
+        pool.acquire.return_value = "test"
+        utility.has_collection.return_value = True
+        utility.list_collections.return_value = []
+        store = MilvusVectorStore(config)
+        store.ensure_collection("atlas_memories", 1536)
+        
+        # Act
+        unscoped = store.search("atlas_memories", [[0.0]], 5, {}, [None])
+        with pytest.raises(ValueError):
+            store.search("atlas_memories", [[0.0]], 5, {}, ["alice/oncology"])
+        store.reindex("atlas_memories", "FLAT", {})
+        scoped = store.search("atlas_memories", [[0.0]], 5, {}, ["alice/oncology"])
+    
+    # Assert: rows are placed by the user and domain in their stored context
+    target = next(name for name in collections if name.startswith("atlas_memories__v") and name != "atlas_memories__v0")
+    columns = collections[target].insert.call_args[0][0]
+    assert unscoped == [[]] and scoped == [[]]
+    assert columns[-1] == ["alice/oncology", "_default"]
+
+def test_compaction_reads_are_strongly_consistent():
+    # Arrange
+    handle = Mock(schema=SlowCollection.schema)
+    handle.query.return_value = []
+    handle.search.return_value = [[]]
+    config = AtlasConfig(MEMORY_WRITE_BEHIND=False, MEMORY_TIERED=False)
+    with patch('atlas.memory.vector_store.connection_pool') as pool, \
+         patch('atlas.memory.vector_store.utility'), \
+         patch('atlas.memory.vector_store.Collection', return_value=handle):
+        pool.acquire.return_value = "test"
+        store = MilvusVectorStore(config)
+        
+        # Act
+        store.fetch_older_than("atlas_memories", 100, 10)
+        store.search("atlas_memories", [[0.0]], 1, {"params": {"nprobe": 10}, "consistency_level": "Strong"})
+        store.search("atlas_memories", [[0.0]], 1, {"params": {"nprobe": 10}})
+    
+    # Assert
+    assert handle.query.call_args.kwargs["consistency_level"] == "Strong"
+    strong, default = handle.search.call_args_list
+    assert strong.kwargs["consistency_level"] == "Strong"
+    assert strong.kwargs["param"] == {"params": {"nprobe": 10}}
+    assert "consistency_level" not in default.kwargs
+
+@pytest.mark.asyncio
+async def test_parallel_memory_calls_overlap(memory):
+    # Arrange
+    n = 8
+    
+    # Act
+    start = time.perf_counter()
+    await asyncio.gather(
+        *[memory.retrieve_relevant(f"query {i}") for i in range(n // 2)],
+        *[memory.store_memory(f"query {i}", metadata={}) for i in range(n // 2)]
+    )
+    elapsed = time.perf_counter() - start
+    
+    # Assert: eight 200ms calls finish in roughly the time of one
+    assert elapsed < 0.2 * n / 2
+    assert memory.executor.stats()["completed"] == n
+
+@pytest.mark.asyncio
+async def test_event_loop_not_blocked_by_memory_io(memory):
+    # Arrange
+    ticks = 0
+    
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+    
+    # Act
+    task = asyncio.create_task(ticker())
+    await memory.retrieve_relevant("query")
+    task.cancel()
+    
+    # Assert
+    assert ticks >= 10
+
+@pytest.fixture
+def local_memory(tmp_path):
+    config = AtlasConfig(
+        VECTOR_STORE_BACKEND="local",
+        LOCAL_STORE_PATH=str(tmp_path),
+        EMBEDDING_DIM=64,
+        MEMORY_WRITE_BEHIND=False
+    )
+    memory = AtlasMemory(config)
+    yield memory
+    memory.close()
+
+@pytest.mark.asyncio
+async def test_bulk_store_and_retrieve_share_one_call(local_memory):
+    # Arrange
+    local_memory.store.insert = Mock(wraps=local_memory.store.insert)
+    local_memory.store.search = Mock(wraps=local_memory.store.search)
+    items = [(f"asthma adherence in region {i}", {"response": f"answer {i}"}) for i in range(10)]
+    
+    # Act
+    await local_memory.store_memories(items)
+    results = await local_memory.retrieve_relevant_many(["asthma adherence in region 3", "region 7"], k=3)
+    
+    # Assert
+    assert local_memory.store.insert.call_count == 1
+    assert local_memory.store.search.call_count == 2  # One batched search per tier
+    assert len(results) == 2
+    assert results[0][0]["text"] == "asthma adherence in region 3"
+    assert all(len(hits) == 3 for hits in results)
\ No newline at end of file
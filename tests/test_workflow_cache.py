@@ -0,0 +1,71 @@
+import time
+import pytest
+from atlas.workflows.cache import ActivityCache, activity_cache
+from atlas.workflows.engine import ReportFormat, WorkflowEngine, collect_data
+
+@pytest.mark.asyncio
+async def test_cached_activity_runs_once_per_input():
+    # Arrange
+    cache = ActivityCache(ttl_seconds=60, max_entries=8)
+    calls = []
+    
+    @cache.cached("double")
+    async def double(value):
+        calls.append(value)
+        return {"value": value * 2}
+    
+    # Act
+    first = await double(2)
+    second = await double(2)
+    other = await double(3)
+    
+    # Assert
+    assert first == second == {"value": 4}
+    assert other == {"value": 6}
+    assert calls == [2, 3]
+    assert cache.stats()["activities"]["double"] == {"hits": 1, "misses": 2, "hit_rate": 1 / 3}
+
+def test_entries_expire_and_are_bounded():
+    # Arrange
+    cache = ActivityCache(ttl_seconds=0.05, max_entries=2)
+    
+    # Act
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.put("c", 3)
+    evicted = cache.get("test", "a")
+    fresh = cache.get("test", "c")
+    time.sleep(0.06)
+    expired = cache.get("test", "c")
+    
+    # Assert
+    assert evicted is None
+    assert fresh == 3
+    assert expired is None
+
+@pytest.mark.asyncio
+async def test_collect_data_is_cached_by_arguments():
+    # Arrange
+    activity_cache.clear()
+    before = activity_cache.stats()["activities"].get("collect_data", {"hits": 0})["hits"]
+    
+    # Act
+    await collect_data("query", ["a", "b"])
+    await collect_data("query", ["a", "b"])
+    
+    # Assert
+    assert activity_cache.stats()["activities"]["collect_data"]["hits"] == before + 1
+
+def test_workflow_id_is_content_addressed():
+    # Arrange
+    report_format = ReportFormat(format_type="pdf")
+    
+    # Act
+    first = WorkflowEngine.workflow_id("query", ["a", "b"], report_format)
+    same = WorkflowEngine.workflow_id("query", ["a", "b"], ReportFormat(format_type="pdf"))
+    other = WorkflowEngine.workflow_id("query", ["a", "c"], report_format)
+    
+    # Assert
+    assert first == same
+    assert first != other
+    assert first.startswith("insight_generation_")
\ No newline at end of file
@@ -0,0 +1,97 @@
+import asyncio
+import time
+import pytest
+from temporalio.exceptions import ApplicationError
+from atlas.workflows.engine import (
+    INSIGHT_PIPELINE,
+    DagStep,
+    ReportFormat,
+    WorkflowDag,
+    AnalysisResult,
+    analyze_data,
+    collect_data,
+    generate_report
+)
+
+def fake_executor(delays, log):
+    # Runs the real activity bodies with a per-source delay
+    active = 0
+    
+    async def execute(activity_fn, args, timeout):
+        nonlocal active
+        active += 1
+        log.append(("start", activity_fn.__name__, time.perf_counter(), active))
+        source = args[1][0] if activity_fn is collect_data else None
+        await asyncio.sleep(delays.get(source, 0.05))
+        active -= 1
+        return await activity_fn(*args)
+    
+    return execute
+
+@pytest.mark.asyncio
+async def test_sources_collected_and_analyzed_in_parallel():
+    # Arrange
+    log = []
+    inputs = {"query": "q", "sources": ["a", "b", "c", "d"], "report_format": ReportFormat()}
+    
+    # Act
+    start = time.perf_counter()
+    results = await INSIGHT_PIPELINE.run(inputs, max_parallelism=8, execute=fake_executor({}, log))
+    elapsed = time.perf_counter() - start
+    
+    # Assert: collect, analyze, merge and report in series would take ~0.5s
+    assert elapsed < 0.3
+    assert len(results["collect"]) == 4
+    assert len(results["analyze"]) == 4
+    assert results["report"]["format"] == "markdown"
+    assert sum(1 for entry in log if entry[1] == "collect_data") == 4
+
+@pytest.mark.asyncio
+async def test_slow_source_does_not_gate_other_shards():
+    # Arrange
+    log = []
+    inputs = {"query": "q", "sources": ["slow", "fast"], "report_format": ReportFormat()}
+    
+    # Act
+    start = time.perf_counter()
+    await INSIGHT_PIPELINE.run(inputs, max_parallelism=8, execute=fake_executor({"slow": 0.3}, log))
+    
+    # Assert: the fast shard's analysis starts before the slow collection ends
+    first_analysis = min(entry[2] for entry in log if entry[1] == "analyze_data")
+    assert first_analysis - start < 0.2
+
+@pytest.mark.asyncio
+async def test_parallelism_capped():
+    # Arrange
+    log = []
+    inputs = {"query": "q", "sources": [str(i) for i in range(6)], "report_format": ReportFormat()}
+    
+    # Act
+    await INSIGHT_PIPELINE.run(inputs, max_parallelism=2, execute=fake_executor({}, log))
+    
+    # Assert
+    assert max(entry[3] for entry in log) == 2
+
+def test_unknown_dependency_rejected():
+    # Act & Assert
+    with pytest.raises(ValueError):
+        WorkflowDag([DagStep("analyze", analyze_data, args=lambda results: [], depends_on=["collect"])])
+
+@pytest.mark.asyncio
+async def test_report_rendered_from_analysis():
+    # Arrange
+    analysis = AnalysisResult(
+        insights=[{"type": "trend", "column": "sales", "direction": "up", "slope_per_row": 2.0, "r": 0.9}],
+        confidence=0.8
+    )
+    
+    # Act
+    report = await generate_report(analysis, ReportFormat())
+    
+    # Assert
+    assert report["format"] == "markdown"
+    assert "sales" in report["content"]
+    assert report["metadata"] == {"insight_count": 1}
+    with pytest.raises(ApplicationError) as error:
+        await generate_report(analysis, ReportFormat(format_type="pdf"))
+    assert error.value.non_retryable
\ No newline at end of file